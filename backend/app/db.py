@@ -1,9 +1,183 @@
 import os
+import time
+import threading
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import extensions
 
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable is not set")
 
+# Per process, so each gunicorn worker holds at most DB_POOL_SIZE connections
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+# Seconds a checkout waits for a free connection before raising PoolTimeout
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+# Connections idle for longer than this are pinged with SELECT 1 before reuse
+POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 30))
+
+
 def get_conn():
+    """Unpooled connection, for scripts and startup work that runs outside a worker."""
     return psycopg2.connect(DATABASE_URL)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe psycopg2 connection pool.
+
+    Idle connections are reused most-recently-returned first; one that has sat
+    idle for longer than ping_after is validated with SELECT 1 and replaced if
+    the server dropped it. Connections come back from connection() rolled back
+    to a clean state, so callers commit their own writes exactly as with a
+    fresh psycopg2.connect(). After a fork the child starts with an empty pool
+    and never touches the sockets it inherited.
+    """
+
+    def __init__(self, dsn, maxsize=POOL_SIZE, timeout=POOL_TIMEOUT, ping_after=POOL_PING_AFTER):
+        self.dsn = dsn
+        self.maxsize = max(int(maxsize), 1)
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._cond = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []        # (conn, monotonic time it was returned)
+        self._size = 0         # idle + checked out
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            with self._cond:
+                if self._pid != os.getpid():
+                    # Closing the parent's connections here would end its sessions;
+                    # keep them referenced and unused instead
+                    _inherited.extend(conn for conn, _ in self._idle)
+                    self._reset()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a `with` block."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def getconn(self):
+        self._check_fork()
+        with self._cond:
+            self.checkouts += 1
+            waited_from = None
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.maxsize:
+                    conn, returned_at = None, None
+                    self._size += 1
+                    break
+                now = time.monotonic()
+                if waited_from is None:
+                    waited_from = now
+                    self.waits += 1
+                remaining = waited_from + self.timeout - now
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self.wait_seconds += now - waited_from
+                    raise PoolTimeout(f"No database connection free after {self.timeout:g}s "
+                                      f"({self.maxsize} in use)")
+                self._cond.wait(remaining)
+            if waited_from is not None:
+                self.wait_seconds += time.monotonic() - waited_from
+
+        # The slot is ours now; connect / validate outside the lock
+        if conn is not None and (conn.closed or (time.monotonic() - returned_at > self.ping_after
+                                                 and not _ping(conn))):
+            self._close(conn)
+            conn = None
+            with self._cond:
+                self.discarded += 1
+        if conn is None:
+            try:
+                conn = psycopg2.connect(self.dsn)
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.created += 1
+        return conn
+
+    def putconn(self, conn):
+        if self._pid != os.getpid():
+            return
+        if not conn.closed and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        if conn.closed or conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self.discarded += 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def stats(self):
+        self._check_fork()
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'maxsize': self.maxsize,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'discarded': self.discarded,
+            }
+
+
+def _ping(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+_inherited = []
+pool = ConnectionPool(DATABASE_URL)
+
+
+def connection():
+    """Pooled connection as a context manager: `with connection() as conn: ...`"""
+    return pool.connection()
@@ -1,7 +1,7 @@
 import logging
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import create_access_token
-from app.db import get_conn
+from app.db import connection
 
 bcrypt = Bcrypt()
 logger = logging.getLogger(__name__)
@@ -9,24 +9,22 @@ logger = logging.getLogger(__name__)
 
 def register_user(username, password):
     try:
-        conn = get_conn()
-        cursor = conn.cursor()
+        with connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-        if cursor.fetchone():
-            cursor.close()
-            conn.close()
-            return {"error": "Username already exists"}, 400
+            cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+            if cursor.fetchone():
+                cursor.close()
+                return {"error": "Username already exists"}, 400
 
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
-        cursor.execute(
-            "INSERT INTO users (username, password) VALUES (%s, %s) RETURNING id",
-            (username, hashed_password)
-        )
-        user_id = cursor.fetchone()[0]
-        conn.commit()
-        cursor.close()
-        conn.close()
+            hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+            cursor.execute(
+                "INSERT INTO users (username, password) VALUES (%s, %s) RETURNING id",
+                (username, hashed_password)
+            )
+            user_id = cursor.fetchone()[0]
+            conn.commit()
+            cursor.close()
 
         access_token = create_access_token(identity=user_id)
 
@@ -42,14 +40,13 @@ def register_user(username, password):
 
 def authenticate_user(username, password):
     try:
-        conn = get_conn()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, password FROM users WHERE username = %s", (username,)
-        )
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, password FROM users WHERE username = %s", (username,)
+            )
+            user = cursor.fetchone()
+            cursor.close()
 
         if not user:
             return {"error": "Invalid credentials"}, 401
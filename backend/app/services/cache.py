@@ -0,0 +1,155 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize):
+        self.maxsize = max(int(maxsize), 0)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class _Flight:
+    """One in-progress computation that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Read-through cache for expensive, rarely-changing results.
+
+    get_or_compute() returns a stored value until its TTL runs out or one of
+    its tags is invalidated. On a miss only the first caller runs `compute`;
+    callers arriving while it runs wait for that result (or its exception)
+    instead of recomputing, so a cold key under load costs one computation.
+    A result whose tags were invalidated while it was being computed is
+    handed to the waiting callers but not stored.
+    """
+
+    def __init__(self):
+        self._data = {}        # key -> (value, stored_at, expires_at, tags)
+        self._flights = {}     # key -> _Flight
+        self._generation = {}  # tag -> invalidation count
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, compute, ttl, tags=()):
+        """Return (value, age_seconds); age is 0.0 for a value computed by this call."""
+        with self._lock:
+            entry = self._data.get(key)
+            now = time.monotonic()
+            if entry is not None and now < entry[2]:
+                self.hits += 1
+                return entry[0], now - entry[1]
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                self.misses += 1
+                flight = self._flights[key] = _Flight()
+                started = [self._generation.get(tag, 0) for tag in tags]
+            else:
+                self.waits += 1
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, 0.0
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                unchanged = started == [self._generation.get(tag, 0) for tag in tags]
+                if flight.error is None and unchanged:
+                    now = time.monotonic()
+                    self._data[key] = (flight.value, now, now + ttl, tuple(tags))
+            flight.done.set()
+        return flight.value, 0.0
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of `tags`."""
+        with self._lock:
+            for tag in tags:
+                self._generation[tag] = self._generation.get(tag, 0) + 1
+            stale = [key for key, entry in self._data.items() if set(entry[3]) & set(tags)]
+            for key in stale:
+                del self._data[key]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'invalidations': self.invalidations,
+            }
+
+
+# Aggregates behind /fighter_analytics, /top_performers and /prediction_history.
+# Writers call invalidate() with the table they changed: 'fighters', 'fights' or 'predictions';
+# cache_sync applies the same invalidations for writes committed by other processes.
+analytics_cache = TTLCache()
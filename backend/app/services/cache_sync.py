@@ -0,0 +1,80 @@
+import os
+import time
+import select
+import threading
+from app.db import get_conn
+from app.services.cache import analytics_cache
+from database.migrations import CACHE_CHANNEL
+
+# Seconds to wait before reconnecting after the listening connection drops
+RECONNECT_AFTER = float(os.environ.get('CACHE_SYNC_RECONNECT', 5))
+# Seconds the first cached read waits for LISTEN to be in place
+READY_TIMEOUT = float(os.environ.get('CACHE_SYNC_READY_TIMEOUT', 2))
+
+
+class InvalidationListener:
+    """
+    Applies writes committed by any process to this process's TTLCache.
+
+    Triggers on the cached tables NOTIFY the table name on commit (migration
+    11); a daemon thread holds one unpooled connection LISTENing on that
+    channel and invalidates the matching tags. Whenever it (re)connects it
+    clears the whole cache, since notifications sent while it wasn't listening
+    are lost. Started lazily per process, so gunicorn workers each start their
+    own after the fork.
+    """
+
+    def __init__(self, cache, channel=CACHE_CHANNEL):
+        self.cache = cache
+        self.channel = channel
+        self.received = 0
+        self._pid = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._ready = threading.Event()
+                    threading.Thread(target=self._run, name='cache-listener', daemon=True).start()
+            # A result cached before LISTEN is in place could miss its invalidation
+            self._ready.wait(READY_TIMEOUT)
+
+    def _run(self):
+        while True:
+            conn = None
+            try:
+                conn = get_conn()
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {self.channel}")
+                cursor.close()
+                self.cache.clear()
+                self._ready.set()
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    tags = {n.payload for n in conn.notifies}
+                    conn.notifies.clear()
+                    if tags:
+                        self.received += len(tags)
+                        self.cache.invalidate(*tags)
+            except Exception as e:
+                print(f"[CacheSync] Listener lost its connection ({e}); retrying in {RECONNECT_AFTER}s")
+                # Serve the cache (TTL-bounded) rather than stalling reads while reconnecting
+                self._ready.set()
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                time.sleep(RECONNECT_AFTER)
+
+    def stats(self):
+        return {'listening': self._pid == os.getpid() and self._ready.is_set(), 'received': self.received}
+
+
+analytics_listener = InvalidationListener(analytics_cache)
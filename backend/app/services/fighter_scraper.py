@@ -1,150 +1,181 @@
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-from app.db import get_conn
+import io
+import os
+import time
+from datetime import datetime, timezone
+from app.db import connection
+from app.services.fighter_store import record_fighter_write
+from app.services.scrape_engine import ScrapeEngine, fetch, HOST_RATE
+from app.services.page_parser import parse_html
+from app.services.cache import analytics_cache
+from database.migrations import BOUT_KEY
+
+# Where listings and searches are fetched from; benchmarks point it at a local
+# stand-in (detail pages are fetched from whatever URL the listing links to)
+BASE_URL = os.environ.get('UFCSTATS_BASE_URL', 'http://www.ufcstats.com').rstrip('/')
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
 }
 
-def scrape_fighter_page(letter):
-    url = f"http://www.ufcstats.com/statistics/fighters?char={letter}&page=all"
+def scrape_fighter_page(letter, raise_errors=False):
+    """
+    The fighters listed under `letter`. A page that can't be fetched or parsed
+    gives [] unless raise_errors, for callers that must tell it from an empty letter.
+    """
+    url = f"{BASE_URL}/statistics/fighters?char={letter}&page=all"
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=15)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        rows = soup.select('tr.b-statistics__table-row')
-        fighters = []
+        resp = fetch(url, headers=HEADERS, timeout=15)
+        return parse_fighter_listing(parse_html(resp.text))
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"[FighterScraper] Error on letter {letter}: {e}")
+        return []
 
-        for row in rows:
-            cols = row.select('td.b-statistics__table-col')
-            if len(cols) < 10:
-                continue
 
-            first = cols[0].get_text(strip=True)
-            last = cols[1].get_text(strip=True)
-            if not first and not last:
-                continue
+def parse_fighter_listing(soup):
+    """Fighters (listing columns and detail_url) from a letter listing page."""
+    rows = soup.select('tr.b-statistics__table-row')
+    fighters = []
 
-            name = f"{first} {last}".strip()
+    for row in rows:
+        cols = row.select('td.b-statistics__table-col')
+        if len(cols) < 10:
+            continue
 
-            height_raw = cols[3].get_text(strip=True)
-            reach_raw = cols[5].get_text(strip=True)
-            stance = cols[6].get_text(strip=True)
-            wins_raw = cols[7].get_text(strip=True)
-            losses_raw = cols[8].get_text(strip=True)
-            draws_raw = cols[9].get_text(strip=True)
+        first = cols[0].get_text(strip=True)
+        last = cols[1].get_text(strip=True)
+        if not first and not last:
+            continue
 
-            wins = safe_int(wins_raw)
-            losses = safe_int(losses_raw)
-            draws = safe_int(draws_raw)
+        name = f"{first} {last}".strip()
+        nickname = cols[2].get_text(strip=True)
 
-            detail_link = cols[0].select_one('a')
-            detail_url = detail_link['href'] if detail_link else None
+        height_raw = cols[3].get_text(strip=True)
+        reach_raw = cols[5].get_text(strip=True)
+        stance = cols[6].get_text(strip=True)
+        wins_raw = cols[7].get_text(strip=True)
+        losses_raw = cols[8].get_text(strip=True)
+        draws_raw = cols[9].get_text(strip=True)
 
-            fighters.append({
-                'name': name,
-                'height': parse_height(height_raw),
-                'reach': parse_reach(reach_raw),
-                'stance': stance if stance else 'Orthodox',
-                'wins': wins,
-                'losses': losses,
-                'draws': draws,
-                'total_fights': wins + losses + draws,
-                'detail_url': detail_url
-            })
+        wins = safe_int(wins_raw)
+        losses = safe_int(losses_raw)
+        draws = safe_int(draws_raw)
 
-        return fighters
+        detail_link = cols[0].select_one('a')
+        detail_url = detail_link['href'] if detail_link else None
 
-    except Exception as e:
-        print(f"[FighterScraper] Error on letter {letter}: {e}")
-        return []
+        fighters.append({
+            'name': name,
+            'nickname': nickname or None,
+            'height': parse_height(height_raw),
+            'reach': parse_reach(reach_raw),
+            'stance': stance if stance else 'Orthodox',
+            'wins': wins,
+            'losses': losses,
+            'draws': draws,
+            'total_fights': wins + losses + draws,
+            'detail_url': detail_url
+        })
+
+    return fighters
 
 
 def scrape_fighter_detail(detail_url):
+    """
+    Fetch and parse a fighter's detail page once: {'stats': profile stats,
+    win streak and KO wins, 'fights': FIGHT_COLUMNS rows}. On failure stats is
+    empty and fights is None, so callers leave the stored history alone.
+    """
     if not detail_url:
-        return {}
+        return {'stats': {}, 'fights': None}
     try:
-        resp = requests.get(detail_url, headers=HEADERS, timeout=15)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        stats = {}
-
-        boxes = soup.select('li.b-list__box-list-item')
-        for box in boxes:
-            label = box.select_one('i.b-list__box-item-title')
-            if not label:
-                continue
-            key = label.get_text(strip=True).lower().replace(':', '').strip()
-            value = box.get_text(strip=True).replace(label.get_text(strip=True), '').strip()
-
-            if 'slpm' in key:
-                stats['avg_sig_str'] = safe_float(value)
-            elif 'str. acc' in key:
-                stats['str_acc'] = safe_float(value.replace('%', ''))
-            elif 'td avg' in key:
-                stats['avg_td_pct'] = safe_float(value)
-            elif 'sub. avg' in key:
-                stats['avg_sub_att'] = safe_float(value)
-            elif 'dob' in key:
-                stats['dob'] = value
-            elif 'weight' in key:
-                # Map from lbs first, fall back to keyword map
-                wc = map_weight_class_from_lbs(value)
-                if not wc or wc == 'Unknown':
-                    wc = map_weight_class(value)
-                stats['weight_class'] = wc
-            elif 'height' in key and 'avg_sig_str' not in stats:
-                stats['height'] = parse_height(value)
-            elif 'reach' in key:
-                stats['reach'] = parse_reach(value)
-            elif 'stance' in key:
-                stats['stance'] = value
-
-        if 'dob' in stats:
-            stats['age'] = compute_age(stats['dob'])
-            del stats['dob']
-
-        fight_rows = soup.select(
-            'tr.b-fight-details__table-row.b-fight-details__table-row__hover'
-        )
-        win_streak = 0
-        ko_wins = 0
-        streak_broken = False
-
-        for row in fight_rows:
-            cols = row.select('td.b-fight-details__table-col')
-            if len(cols) < 8:
-                continue
-
-            result_ps = cols[0].select('p')
-            method_ps = cols[7].select('p')
-
-            result_text = result_ps[0].get_text(strip=True).lower() if result_ps else ''
-            method_text = method_ps[0].get_text(strip=True).upper() if method_ps else ''
-
-            if result_text == 'win':
-                if 'KO' in method_text or 'TKO' in method_text:
-                    ko_wins += 1
-                if not streak_broken:
-                    win_streak += 1
-            elif result_text in ('loss', 'nc', 'draw'):
-                streak_broken = True
-
-        stats['ko_wins'] = ko_wins
-        stats['win_streak'] = win_streak
-        return stats
-
+        resp = fetch(detail_url, headers=HEADERS, timeout=15)
+        soup = parse_html(resp.text)
+        stats = parse_fighter_stats(soup)
+        # The page's own weight class stands in for fights whose header lacks one
+        return {'stats': stats, 'fights': parse_fight_history(soup, stats.get('weight_class'))}
     except Exception as e:
         print(f"[FighterScraper] Detail error {detail_url}: {e}")
-        return {}
+        return {'stats': {}, 'fights': None}
+
+
+def parse_fighter_stats(soup):
+    """Profile stats, win streak and KO wins from a fighter detail page."""
+    stats = {}
+    boxes = soup.select('li.b-list__box-list-item')
+    for box in boxes:
+        label = box.select_one('i.b-list__box-item-title')
+        if not label:
+            continue
+        key = label.get_text(strip=True).lower().replace(':', '').strip()
+        value = box.get_text(strip=True).replace(label.get_text(strip=True), '').strip()
+
+        if 'slpm' in key:
+            stats['avg_sig_str'] = safe_float(value)
+        elif 'str. acc' in key:
+            stats['str_acc'] = safe_float(value.replace('%', ''))
+        elif 'td avg' in key:
+            stats['avg_td_pct'] = safe_float(value)
+        elif 'sub. avg' in key:
+            stats['avg_sub_att'] = safe_float(value)
+        elif 'dob' in key:
+            stats['dob'] = value
+        elif 'weight' in key:
+            # Map from lbs first, fall back to keyword map
+            wc = map_weight_class_from_lbs(value)
+            if not wc or wc == 'Unknown':
+                wc = map_weight_class(value)
+            stats['weight_class'] = wc
+        elif 'height' in key and 'avg_sig_str' not in stats:
+            stats['height'] = parse_height(value)
+        elif 'reach' in key:
+            stats['reach'] = parse_reach(value)
+        elif 'stance' in key:
+            stats['stance'] = value
+
+    if 'dob' in stats:
+        stats['age'] = compute_age(stats['dob'])
+        del stats['dob']
+
+    fight_rows = soup.select(
+        'tr.b-fight-details__table-row.b-fight-details__table-row__hover'
+    )
+    win_streak = 0
+    ko_wins = 0
+    streak_broken = False
+
+    for row in fight_rows:
+        cols = row.select('td.b-fight-details__table-col')
+        if len(cols) < 8:
+            continue
+
+        result_ps = cols[0].select('p')
+        method_ps = cols[7].select('p')
+
+        result_text = result_ps[0].get_text(strip=True).lower() if result_ps else ''
+        method_text = method_ps[0].get_text(strip=True).upper() if method_ps else ''
+
+        if result_text == 'win':
+            if 'KO' in method_text or 'TKO' in method_text:
+                ko_wins += 1
+            if not streak_broken:
+                win_streak += 1
+        elif result_text in ('loss', 'nc', 'draw'):
+            streak_broken = True
+
+    stats['ko_wins'] = ko_wins
+    stats['win_streak'] = win_streak
+    return stats
 
 
 def scrape_fighter_by_name(name):
     name_parts = name.strip().split()
     last_name = name_parts[-1] if name_parts else name
-    search_url = f"http://www.ufcstats.com/statistics/fighters/search?query={last_name}"
+    search_url = f"{BASE_URL}/statistics/fighters/search?query={last_name}"
     try:
-        resp = requests.get(search_url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = fetch(search_url, headers=HEADERS, timeout=10)
+        soup = parse_html(resp.text)
         rows = soup.select('tr.b-statistics__table-row')
 
         best_match = None
@@ -178,6 +209,7 @@ def scrape_fighter_by_name(name):
 
             fighter = {
                 'name': scraped_name,
+                'nickname': cols[2].get_text(strip=True) or None,
                 'height': parse_height(cols[3].get_text(strip=True)) if len(cols) > 3 else None,
                 'reach': parse_reach(cols[5].get_text(strip=True)) if len(cols) > 5 else None,
                 'stance': cols[6].get_text(strip=True) if len(cols) > 6 else 'Orthodox',
@@ -188,17 +220,23 @@ def scrape_fighter_by_name(name):
             }
 
             if detail_url:
-                detail_stats = scrape_fighter_detail(detail_url)
-                fighter.update(detail_stats)
                 fighter['detail_url'] = detail_url
 
             if is_exact:
-                return fighter  # perfect match, stop immediately
+                best_match = fighter  # perfect match, stop immediately
+                break
 
             # Keep as best candidate but keep scanning for an exact match
             if best_match is None:
                 best_match = fighter
 
+        # Only the chosen row's detail page is fetched, once, for stats and fights
+        if best_match and best_match.get('detail_url'):
+            detail = scrape_fighter_detail(best_match['detail_url'])
+            best_match.update(detail['stats'])
+            best_match['fights'] = detail['fights']
+        if best_match and best_match.get('fights') is None:
+            mark_unchecked(best_match)
         return best_match
 
     except Exception as e:
@@ -207,12 +245,16 @@ def scrape_fighter_by_name(name):
 
 
 def upsert_fighter(cursor, fighter):
+    """
+    Upsert one fighter in the caller's transaction. Returns the row as written;
+    pass it to publish_fighter_writes once the transaction commits.
+    """
     cursor.execute("""
         INSERT INTO fighters
             (name, height, reach, stance, age, weight_class,
              win_streak, ko_wins, avg_sig_str, avg_td_pct, avg_sub_att,
-             total_fights, last_scraped)
-        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+             total_fights, last_scraped, nickname, wins, losses, draws)
+        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
         ON CONFLICT (name) DO UPDATE SET
             height = EXCLUDED.height,
             reach = EXCLUDED.reach,
@@ -225,7 +267,14 @@ def upsert_fighter(cursor, fighter):
             avg_td_pct = EXCLUDED.avg_td_pct,
             avg_sub_att = EXCLUDED.avg_sub_att,
             total_fights = EXCLUDED.total_fights,
-            last_scraped = EXCLUDED.last_scraped
+            last_scraped = EXCLUDED.last_scraped,
+            nickname = COALESCE(EXCLUDED.nickname, fighters.nickname),
+            wins = EXCLUDED.wins,
+            losses = EXCLUDED.losses,
+            draws = EXCLUDED.draws
+        RETURNING name, height, reach, stance, age, weight_class,
+                  win_streak, ko_wins, avg_sig_str, avg_td_pct, avg_sub_att,
+                  total_fights, last_scraped, nickname
     """, (
         fighter.get('name'),
         fighter.get('height'),
@@ -239,135 +288,326 @@ def upsert_fighter(cursor, fighter):
         fighter.get('avg_td_pct', 0.0),
         fighter.get('avg_sub_att', 0.0),
         fighter.get('total_fights', 0),
-        datetime.now().isoformat()
+        datetime.now(timezone.utc),
+        fighter.get('nickname'),
+        fighter.get('wins'),
+        fighter.get('losses'),
+        fighter.get('draws')
     ))
-
-def upsert_fighter_fights(cursor, fighter_name, detail_url, fallback_weight_class=None):
-    if not detail_url:
-        return
-    try:
-        resp = requests.get(detail_url, headers=HEADERS, timeout=15)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-
-        cursor.execute(
-            "DELETE FROM fights WHERE RedFighter=%s OR BlueFighter=%s",
-            (fighter_name, fighter_name)
-        )
-
-        all_rows = soup.select('tr.b-fight-details__table-row')
-        current_date = ''
-        current_weight = fallback_weight_class or 'Unknown'
-        inserted = 0
-
-        for row in all_rows:
-            is_fight = 'b-fight-details__table-row__hover' in row.get('class', [])
-
-            if not is_fight:
-                for cell in row.select('td'):
-                    candidates = [cell.get_text(strip=True)]
-                    candidates += [a.get_text(strip=True) for a in cell.select('a')]
-                    for text in candidates:
-                        # Try to parse date
-                        for fmt in ('%B %d, %Y', '%b %d, %Y', '%b. %d, %Y'):
-                            try:
-                                parsed = datetime.strptime(text.strip(), fmt)
-                                current_date = parsed.strftime('%Y-%m-%d')
-                                break
-                            except ValueError:
-                                continue
-                        # Try to parse weight class from header text
-                        text_lower = text.lower()
-                        found_wc = None
-                        for key, val in WEIGHT_MAP.items():
-                            if key in text_lower:
-                                found_wc = val
-                                break
-                        if found_wc:
-                            current_weight = found_wc
-                continue
-
-            cols = row.select('td.b-fight-details__table-col')
-            if len(cols) < 8:
-                continue
-
-            def col_texts(idx):
-                if idx >= len(cols):
-                    return []
-                return [p.get_text(strip=True) for p in cols[idx].select('p')]
-
-            result_texts = col_texts(0)
-            result_text = result_texts[0].lower() if result_texts else ''
-
-            fighter_ps = col_texts(1)
-            if len(fighter_ps) < 2:
-                continue
-            red_fighter = fighter_ps[0]
-            blue_fighter = fighter_ps[1]
-
-            if not red_fighter or not blue_fighter:
-                continue
-
-            if result_text == 'win':
-                winner = 'Red'
-            elif result_text == 'loss':
-                winner = 'Blue'
-            else:
-                winner = 'Draw'
-
-            method = col_texts(7)[0] if col_texts(7) else ''
-            rounds_raw = col_texts(8)[0] if col_texts(8) else '3'
-            rounds = safe_int(rounds_raw) or 3
-
-            # Use current_weight from header row; fall back to fighter's own weight class
-            weight_class = current_weight
-
-            print(
-                f"[FightHistory] Inserting: {red_fighter} vs {blue_fighter} | {current_date} | {method} | {weight_class} | R{rounds}")
-
-            cursor.execute("""
-                           INSERT INTO fights
-                           (RedFighter, BlueFighter, Date, Winner, WeightClass, NumberOfRounds, Finish)
-                           VALUES (%s, %s, %s, %s, %s, %s, %s)
-                           """, (red_fighter, blue_fighter, current_date, winner, weight_class, rounds, method))
-            inserted += 1
-
-        print(f"[FightHistory] Done. Inserted {inserted} fights for {fighter_name}")
-
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"[FightHistory] Error for {fighter_name}: {e}")
-
-
-def run_fighter_scraper(letters=None, detail=True):
+    columns = [col[0] for col in cursor.description]
+    return dict(zip(columns, cursor.fetchone()))
+
+
+def publish_fighter_writes(rows, fights=False):
+    """
+    Apply committed fighter rows to this process's FighterStore and drop the
+    analytics cached from the old ones ('fights' too if histories were
+    replaced). Only after commit: a rolled-back write must not reach either.
+    """
+    for row in rows:
+        record_fighter_write(row)
+    analytics_cache.invalidate(*(('fighters', 'fights') if fights else ('fighters',)))
+
+def parse_fight_history(soup, fallback_weight_class=None):
+    """Fight rows from a fighter detail page, as FIGHT_COLUMNS tuples."""
+    all_rows = soup.select('tr.b-fight-details__table-row')
+    current_date = None
+    current_weight = fallback_weight_class or 'Unknown'
+    fights = []
+
+    for row in all_rows:
+        is_fight = 'b-fight-details__table-row__hover' in row.get('class', [])
+
+        if not is_fight:
+            for cell in row.select('td'):
+                candidates = [cell.get_text(strip=True)]
+                candidates += [a.get_text(strip=True) for a in cell.select('a')]
+                for text in candidates:
+                    # Try to parse date
+                    for fmt in ('%B %d, %Y', '%b %d, %Y', '%b. %d, %Y'):
+                        try:
+                            parsed = datetime.strptime(text.strip(), fmt)
+                            current_date = parsed.date()
+                            break
+                        except ValueError:
+                            continue
+                    # Try to parse weight class from header text
+                    text_lower = text.lower()
+                    found_wc = None
+                    for key, val in WEIGHT_MAP.items():
+                        if key in text_lower:
+                            found_wc = val
+                            break
+                    if found_wc:
+                        current_weight = found_wc
+            continue
+
+        cols = row.select('td.b-fight-details__table-col')
+        if len(cols) < 8:
+            continue
+
+        def col_texts(idx):
+            if idx >= len(cols):
+                return []
+            return [p.get_text(strip=True) for p in cols[idx].select('p')]
+
+        result_texts = col_texts(0)
+        result_text = result_texts[0].lower() if result_texts else ''
+
+        fighter_ps = col_texts(1)
+        if len(fighter_ps) < 2:
+            continue
+        red_fighter = fighter_ps[0]
+        blue_fighter = fighter_ps[1]
+
+        if not red_fighter or not blue_fighter:
+            continue
+
+        if result_text == 'win':
+            winner = 'Red'
+        elif result_text == 'loss':
+            winner = 'Blue'
+        else:
+            winner = 'Draw'
+
+        method = col_texts(7)[0] if col_texts(7) else ''
+        rounds_raw = col_texts(8)[0] if col_texts(8) else '3'
+        rounds = safe_int(rounds_raw) or 3
+
+        # Use current_weight from header row; fall back to fighter's own weight class
+        weight_class = current_weight
+
+        fights.append((red_fighter, blue_fighter, current_date, winner, weight_class, rounds, method))
+
+    return fights
+
+
+def upsert_scraped_fighters(cursor, fighters):
+    """
+    Upsert scraped fighters and replace the fight history of every one whose
+    detail page was parsed ('fights' is not None), in the caller's transaction.
+    Returns a function that publishes the writes (publish_fighter_writes), to
+    call once the transaction commits.
+    """
+    rows = [upsert_fighter(cursor, f) for f in fighters]
+    histories = {f['name']: f['fights'] for f in fighters if f.get('fights') is not None}
+    if histories:
+        replace_fight_histories(cursor, histories)
+    return lambda: publish_fighter_writes(rows, fights=bool(histories))
+
+
+FIGHT_COLUMNS = ['RedFighter', 'BlueFighter', 'Date', 'Winner', 'WeightClass', 'NumberOfRounds', 'Finish']
+
+STAGING_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS fights_staging
+    (
+        seq            INTEGER,
+        RedFighter     TEXT,
+        BlueFighter    TEXT,
+        Date           DATE,
+        Winner         TEXT,
+        WeightClass    TEXT,
+        NumberOfRounds INTEGER,
+        Finish         TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+# Replaces every batch fighter's fights in one statement. A bout appears on
+# both fighters' pages; staged copies collapse to the one scraped last, and
+# it is upserted on the bout key (uq_fights_bout), so each bout keeps one row
+# whichever page it came from. The batch fighters' other stored bouts, the
+# ones no page in the batch lists any more, are deleted. Rows naming a
+# fighter not in fighters yet are skipped rather than failing the batch's FK.
+MERGE_SQL = f"""
+    WITH staged AS (SELECT DISTINCT ON ({BOUT_KEY}) *
+                    FROM fights_staging s
+                    WHERE EXISTS (SELECT 1 FROM fighters WHERE name = s.RedFighter)
+                      AND EXISTS (SELECT 1 FROM fighters WHERE name = s.BlueFighter)
+                    ORDER BY {BOUT_KEY}, seq DESC),
+         gone AS (DELETE FROM fights f
+                  WHERE (f.RedFighter = ANY (%(owners)s) OR f.BlueFighter = ANY (%(owners)s))
+                    AND NOT EXISTS (SELECT 1 FROM staged s
+                                    WHERE LEAST(s.RedFighter, s.BlueFighter) = LEAST(f.RedFighter, f.BlueFighter)
+                                      AND GREATEST(s.RedFighter, s.BlueFighter) = GREATEST(f.RedFighter, f.BlueFighter)
+                                      AND s.Date IS NOT DISTINCT FROM f.Date))
+    INSERT INTO fights ({', '.join(FIGHT_COLUMNS)})
+    SELECT {', '.join(FIGHT_COLUMNS)}
+    FROM staged
+    ORDER BY seq
+    ON CONFLICT ({BOUT_KEY}) DO UPDATE
+        SET {', '.join(f'{c} = EXCLUDED.{c}' for c in FIGHT_COLUMNS)}
+        WHERE ({', '.join('fights.' + c for c in FIGHT_COLUMNS)})
+              IS DISTINCT FROM ({', '.join('EXCLUDED.' + c for c in FIGHT_COLUMNS)})
+"""
+
+
+def replace_fight_histories(cursor, histories):
+    """
+    Replace the fights of every fighter in `histories` ({name: FIGHT_COLUMNS tuples},
+    in scrape order) with the given rows. The rows are COPYed into a temporary
+    staging table and merged with one statement, so the caller's transaction
+    covers the whole batch and the fighter_career triggers fire once for it.
+    Returns the number of fights inserted or changed.
+    """
+    owners = list(histories)
+    if not owners:
+        return 0
+    cursor.execute(STAGING_SQL)
+    # Emptied on commit; this clears rows staged earlier in the same transaction
+    cursor.execute("TRUNCATE fights_staging")
+    buffer = io.StringIO()
+    staged = 0
+    for seq, fights in enumerate(histories.values(), start=1):
+        for fight in fights:
+            buffer.write('\t'.join([str(seq)] + [_copy_value(v) for v in fight]) + '\n')
+            staged += 1
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY fights_staging (seq, {', '.join(FIGHT_COLUMNS)}) FROM STDIN", buffer)
+    cursor.execute(MERGE_SQL, {'owners': owners})
+    written = cursor.rowcount
+
+    label = owners[0] if len(owners) == 1 else f"{len(owners)} fighters"
+    print(f"[FightHistory] {staged} rows staged, {written} fights inserted or changed for {label}")
+    return written
+
+
+def _copy_value(value):
+    """One field in COPY's text format."""
+    if value is None:
+        return '\\N'
+    text = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def run_fighter_scraper(letters=None, detail=True, incremental=False, cancel=None, on_progress=None):
+    """
+    Scrape the letter listings (and, with detail, every fighter's detail page)
+    and upsert the fighters, with their fight histories when the detail page
+    was read. Fetches run concurrently on a ScrapeEngine within the per-host
+    rate limit; one writer thread does all the writes.
+
+    With incremental, a fighter whose listing row (W/L/D, height, reach,
+    stance) matches the stored one is skipped entirely: no detail fetch and no
+    write. A fighter written without its detail page (detail off, no link, or
+    a failed fetch) is stored with W/L/D unset, so it never counts as
+    unchanged. Returns a summary of the run (a refresh job sums these per letter).
+
+    For background jobs: once `cancel` (a threading.Event) is set, no further
+    pages are fetched, and what is already fetched is still written.
+    on_progress(n) is called as n more listed fighters are done (written or
+    skipped as unchanged).
+    """
     if letters is None:
         import string
         letters = list(string.ascii_lowercase)
 
-    total = 0
+    started = time.monotonic()
+    stored = load_listing_records() if incremental else {}
+    engine = ScrapeEngine(upsert_scraped_fighters, on_written=on_progress)
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    def listing(letter):
+        if cancelled():
+            return
+        # A failed listing counts as a 'listing' stage error (summary['listing_errors'])
+        fighters = scrape_fighter_page(letter, raise_errors=True)
+        print(f"[FighterScraper] Letter {letter.upper()}: {len(fighters)} fighters")
+        engine.counters.add('listed', items=len(fighters))
+        for f in fighters:
+            if incremental:
+                known = stored.get(f['name'])
+                if known is not None and listing_unchanged(f, known):
+                    engine.counters.add('skipped')
+                    if on_progress:
+                        on_progress(1)
+                    continue
+                engine.counters.add('refreshed' if known is not None else 'new')
+            if detail and f.get('detail_url'):
+                engine.submit('detail', detail_page, f)
+            else:
+                mark_unchecked(f)
+                engine.write(f)
+
+    def detail_page(f):
+        if cancelled():
+            return
+        detail = scrape_fighter_detail(f['detail_url'])
+        f.update(detail['stats'])
+        f['fights'] = detail['fights']
+        if detail['fights'] is None:
+            mark_unchecked(f)
+        engine.write(f)
 
     for letter in letters:
-        print(f"[FighterScraper] Scraping letter: {letter.upper()}")
-        fighters = scrape_fighter_page(letter)
-
-        conn = get_conn()
+        engine.submit('listing', listing, letter)
+    total = engine.join()
+
+    stages = engine.counters.stats()
+
+    def count(stage):
+        return stages.get(stage, {}).get('items', 0)
+
+    summary = {
+        'fighters_updated': total,
+        'listed': count('listed'),
+        'skipped': count('skipped'),
+        'refreshed': count('refreshed'),
+        'new': count('new'),
+        'listing_errors': stages.get('listing', {}).get('errors', 0),
+        'seconds': round(time.monotonic() - started, 1),
+        'seconds_saved': round(count('skipped') * _detail_wall_seconds(stages, engine.concurrency), 1)
+                         if detail else 0.0,
+        'stages': stages,
+        'cancelled': cancelled(),
+    }
+    print(f"[FighterScraper] Done. Upserted {total} fighters: {engine.counters.summary()}")
+    if incremental:
+        print(f"[FighterScraper] Incremental: {summary['skipped']} unchanged fighters skipped, "
+              f"{summary['refreshed']} refreshed, {summary['new']} new, ~{summary['seconds_saved']}s saved")
+    return summary
+
+
+def load_listing_records():
+    """{name: (wins, losses, draws, height, reach, stance)} as last stored, for incremental runs."""
+    with connection() as conn:
         cursor = conn.cursor()
-        try:
-            for f in fighters:
-                if detail and f.get('detail_url'):
-                    detail_stats = scrape_fighter_detail(f['detail_url'])
-                    f.update(detail_stats)
-                upsert_fighter(cursor, f)
-                total += 1
-            conn.commit()
-        except Exception as e:
-            print(f"[FighterScraper] Write error on letter {letter}: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
-
-    print(f"[FighterScraper] Done. Upserted {total} fighters.")
-    return total
+        cursor.execute("SELECT name, wins, losses, draws, height, reach, stance FROM fighters")
+        records = {row[0]: row[1:] for row in cursor.fetchall()}
+        cursor.close()
+    return records
+
+
+def mark_unchecked(fighter):
+    """
+    Unset W/L/D on a fighter about to be written without its detail page (none
+    linked, not requested, or the fetch failed). Its row then holds default
+    stats, and listing_unchanged never takes it as current, so the next
+    incremental run reads the detail page.
+    """
+    fighter['wins'] = fighter['losses'] = fighter['draws'] = None
+
+
+def listing_unchanged(fighter, stored):
+    """True if a listing row matches the stored fighter (a never-checked W/L/D counts as changed)."""
+    wins, losses, draws, height, reach, stance = stored
+    if wins is None or (wins, losses, draws) != (fighter['wins'], fighter['losses'], fighter['draws']):
+        return False
+    # height / reach are REAL columns: compare at the 0.1 cm the parser rounds to
+    for new, old in ((fighter['height'], height), (fighter['reach'], reach)):
+        if (new is None) != (old is None) or (new is not None and abs(new - old) > 0.05):
+            return False
+    return (fighter['stance'] or 'Orthodox') == (stance or 'Orthodox')
+
+
+def _detail_wall_seconds(stages, concurrency):
+    """Wall time one detail fetch adds to a run: its share of the pool, but no less than the host rate allows."""
+    done = stages.get('detail', {})
+    per_fetch = done['busy_seconds'] / done['items'] if done.get('items') else 0.0
+    floor = 1 / HOST_RATE if HOST_RATE > 0 else 0.0
+    return max(per_fetch / max(concurrency, 1), floor)
 
 
 # ── helpers ───────────────────────────────────────────────────────────────────
@@ -0,0 +1,247 @@
+import os
+import time
+import threading
+import numpy as np
+from app.db import connection
+from app.services.name_index import NameIndex
+
+# Columns mirrored from the fighters table, in SELECT * order
+COLUMNS = ['name', 'height', 'reach', 'stance', 'age', 'weight_class', 'win_streak',
+           'ko_wins', 'avg_sig_str', 'avg_td_pct', 'avg_sub_att', 'total_fights', 'last_scraped',
+           'nickname']
+NUMERIC_COLUMNS = ['height', 'reach', 'age', 'win_streak', 'ko_wins',
+                   'avg_sig_str', 'avg_td_pct', 'avg_sub_att', 'total_fights']
+INTEGER_COLUMNS = {'age', 'win_streak', 'ko_wins', 'total_fights'}
+TEXT_COLUMNS = ['stance', 'weight_class', 'last_scraped', 'nickname']
+
+# Same fallbacks fill_missing_stats has always used; the averaged ones are
+# replaced by the population mean whenever the table has a value for them.
+DEFAULTS = {
+    'height': 180,
+    'reach': 180,
+    'stance': 'Orthodox',
+    'age': 30,
+    'win_streak': 0,
+    'ko_wins': 0,
+    'weight_class': 'Lightweight',
+    'avg_sig_str': 100,
+    'avg_td_pct': 30,
+    'avg_sub_att': 1.5,
+    'total_fights': 10
+}
+AVERAGED_COLUMNS = ['height', 'reach', 'age', 'avg_sig_str', 'avg_td_pct', 'avg_sub_att', 'total_fights']
+# Everything _reset builds: what a reload swaps in from the snapshot
+STATE = ['_size', '_names', '_index', '_name_index', '_numeric', '_text', '_sums', '_counts']
+
+# Other workers' writes only reach this process through a reload
+RELOAD_AFTER = float(os.environ.get('FIGHTER_STORE_TTL', 300))
+
+
+class FighterStore:
+    """
+    Column-oriented, in-process copy of the fighters table.
+
+    Numeric stats live in float64 numpy arrays (NaN for NULL) and text columns
+    in object arrays, all indexed by a name -> row dict. Population averages are
+    kept as running sums so an upsert updates them in O(1), and a NameIndex over
+    names and nicknames answers search and fuzzy name resolution.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded_at = None
+        # Bumped by every load and upsert: anything derived from defaults() is stale once it moves
+        self.generation = 0
+        # While a reload builds its snapshot: the upserts to replay onto it
+        self._replay = None
+        self._reset(0)
+
+    def _reset(self, capacity):
+        self._size = 0
+        self._names = []
+        self._index = {}
+        self._name_index = NameIndex()
+        self._numeric = {c: np.full(capacity, np.nan) for c in NUMERIC_COLUMNS}
+        self._text = {c: np.empty(capacity, dtype=object) for c in TEXT_COLUMNS}
+        self._sums = dict.fromkeys(AVERAGED_COLUMNS, 0.0)
+        self._counts = dict.fromkeys(AVERAGED_COLUMNS, 0)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    # ── loading ───────────────────────────────────────────────────────────────
+
+    def load(self):
+        """
+        Replace the store with a fresh snapshot of the fighters table. The
+        snapshot is built off to the side while reads and upserts carry on
+        against the current data, then swapped in; upserts made meanwhile are
+        replayed onto it, in case the snapshot was read before they committed.
+        """
+        with self._lock:
+            self._replay = []
+        try:
+            with connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM fighters")
+                rows = cursor.fetchall()
+                cursor.close()
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+
+        snapshot = FighterStore()
+        snapshot._reset(max(len(rows), 16))
+        for row in rows:
+            snapshot._write(dict(zip(COLUMNS, row)))
+
+        with self._lock:
+            for attr in STATE:
+                setattr(self, attr, getattr(snapshot, attr))
+            replay, self._replay = self._replay, None
+            for fighter in replay:
+                self._write(fighter)
+            self.loaded_at = time.monotonic()
+            self.generation += 1
+        print(f"[FighterStore] Loaded {len(rows)} fighters")
+
+    @property
+    def stale(self):
+        return not self.loaded or time.monotonic() - self.loaded_at > RELOAD_AFTER
+
+    # ── writes ────────────────────────────────────────────────────────────────
+
+    def upsert(self, fighter):
+        """Apply one fighters row (dict keyed by column) written by upsert_fighter."""
+        with self._lock:
+            self._write(fighter)
+            if self._replay is not None:
+                self._replay.append(fighter)
+            self.generation += 1
+
+    def _write(self, fighter):
+        name = fighter['name']
+        idx = self._index.get(name)
+        if idx is None:
+            idx = self._size
+            if idx >= self._numeric['height'].shape[0]:
+                self._grow()
+            self._index[name] = idx
+            self._names.append(name)
+            self._size += 1
+        else:
+            for col in AVERAGED_COLUMNS:
+                old = self._numeric[col][idx]
+                if not np.isnan(old):
+                    self._sums[col] -= old
+                    self._counts[col] -= 1
+
+        for col in NUMERIC_COLUMNS:
+            value = fighter.get(col)
+            self._numeric[col][idx] = np.nan if value is None else float(value)
+        for col in TEXT_COLUMNS:
+            self._text[col][idx] = fighter.get(col)
+        self._name_index.add(name, fighter.get('nickname'))
+
+        for col in AVERAGED_COLUMNS:
+            new = self._numeric[col][idx]
+            if not np.isnan(new):
+                self._sums[col] += new
+                self._counts[col] += 1
+
+    def _grow(self):
+        capacity = max(16, self._numeric['height'].shape[0] * 2)
+        for col, arr in self._numeric.items():
+            grown = np.full(capacity, np.nan)
+            grown[:arr.shape[0]] = arr
+            self._numeric[col] = grown
+        for col, arr in self._text.items():
+            grown = np.empty(capacity, dtype=object)
+            grown[:arr.shape[0]] = arr
+            self._text[col] = grown
+
+    # ── reads ─────────────────────────────────────────────────────────────────
+
+    def _row(self, idx):
+        stats = {'name': self._names[idx]}
+        for col in COLUMNS[1:]:
+            if col in self._text:
+                stats[col] = self._text[col][idx]
+                continue
+            value = self._numeric[col][idx]
+            if np.isnan(value):
+                stats[col] = None
+            else:
+                stats[col] = int(value) if col in INTEGER_COLUMNS else float(value)
+        return stats
+
+    def get(self, name):
+        """Exact-name lookup; returns a fresh dict shaped like a fighters row, or None."""
+        with self._lock:
+            idx = self._index.get(name)
+            return self._row(idx) if idx is not None else None
+
+    def resolve(self, name):
+        """Canonical fighter name for user input: exact, then accent/case-insensitive, nickname, prefix, fuzzy."""
+        with self._lock:
+            if name in self._index:
+                return name
+            return self._name_index.resolve(name)
+
+    def find(self, name):
+        """Fighter row for user input, resolved as in resolve(); None if nothing is close."""
+        with self._lock:
+            resolved = self.resolve(name)
+            return self._row(self._index[resolved]) if resolved is not None else None
+
+    def search(self, term, limit=10):
+        """Ranked (name, last_scraped) pairs for a search box term."""
+        with self._lock:
+            return [(n, self._text['last_scraped'][self._index[n]])
+                    for n, _, _ in self._name_index.search(term, limit)]
+
+    def defaults(self):
+        """Population fallbacks for fill_missing_stats, without touching the DB."""
+        with self._lock:
+            values = dict(DEFAULTS)
+            for col in AVERAGED_COLUMNS:
+                if self._counts[col]:
+                    values[col] = float(self._sums[col] / self._counts[col])
+            return values
+
+
+_store = FighterStore()
+_store_lock = threading.Lock()
+
+
+def get_fighter_store():
+    """
+    The per-process store, loaded on first use and reloaded every
+    FIGHTER_STORE_TTL seconds. Only the first load makes callers wait: once
+    the store is stale, the first caller to get the lock reloads it and every
+    other thread keeps reading the current data in the meantime.
+    """
+    if not _store.stale:
+        return _store
+    if not _store.loaded:
+        with _store_lock:
+            if not _store.loaded:
+                _store.load()
+    elif _store_lock.acquire(blocking=False):
+        try:
+            if _store.stale:
+                _store.load()
+        finally:
+            _store_lock.release()
+    return _store
+
+
+def record_fighter_write(fighter):
+    """Called by upsert_fighter with the row it wrote; no-op until the store has been loaded."""
+    if _store.loaded:
+        _store.upsert(fighter)
@@ -0,0 +1,174 @@
+import os
+from psycopg2.extras import Json
+from app.db import connection
+
+# A running job whose worker hasn't sent a heartbeat for this long is presumed
+# dead and handed to the next worker that polls, which resumes its checkpoint
+STALE_AFTER = float(os.environ.get('JOB_STALE_AFTER', 60))
+
+JOB_COLUMNS = ['id', 'kind', 'status', 'params', 'cancel_requested', 'checkpoint', 'progress', 'result',
+               'error', 'worker', 'attempts', 'created_at', 'started_at', 'heartbeat_at', 'finished_at']
+
+CLAIM_SQL = f"""
+    UPDATE jobs
+    SET status       = 'running',
+        worker       = %(worker)s,
+        attempts     = attempts + 1,
+        started_at   = COALESCE(started_at, now()),
+        heartbeat_at = now()
+    WHERE id = (SELECT id FROM jobs
+                WHERE status = 'queued'
+                   OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => %(stale)s))
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED)
+    RETURNING {', '.join(JOB_COLUMNS)}
+"""
+
+
+class JobLost(Exception):
+    """The job is no longer this worker's: its heartbeat went stale and another worker reclaimed it."""
+
+
+def _row(cursor):
+    row = cursor.fetchone()
+    return dict(zip(JOB_COLUMNS, row)) if row else None
+
+
+def submit(kind, params):
+    """Queue a job; returns its id."""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO jobs (kind, params) VALUES (%s, %s) RETURNING id", (kind, Json(params)))
+        job_id = cursor.fetchone()[0]
+        conn.commit()
+        cursor.close()
+    print(f"[Jobs] Queued {kind} job {job_id}")
+    return job_id
+
+
+def get(job_id):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = %s", (job_id,))
+        job = _row(cursor)
+        cursor.close()
+    return job
+
+
+def cancel(job_id):
+    """
+    Ask for a job to stop. A queued job is cancelled on the spot; a running one
+    is flagged, and its worker stops at the next heartbeat, keeping its
+    checkpoint for a resume. Returns the job, or None if there is no such job.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            UPDATE jobs
+            SET cancel_requested = status IN ('queued', 'running'),
+                status      = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                finished_at = CASE WHEN status = 'queued' THEN now() ELSE finished_at END
+            WHERE id = %s
+            RETURNING {', '.join(JOB_COLUMNS)}
+        """, (job_id,))
+        job = _row(cursor)
+        conn.commit()
+        cursor.close()
+    return job
+
+
+def resume(job_id):
+    """Queue a cancelled or failed job again; the worker picks it up from its checkpoint. Returns the job."""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            UPDATE jobs
+            SET status = 'queued', cancel_requested = false, error = NULL, finished_at = NULL
+            WHERE id = %s AND status IN ('cancelled', 'failed')
+            RETURNING {', '.join(JOB_COLUMNS)}
+        """, (job_id,))
+        job = _row(cursor)
+        conn.commit()
+        cursor.close()
+    return job
+
+
+# ── worker side ───────────────────────────────────────────────────────────────
+
+def claim(worker):
+    """Take the oldest queued job (or one whose worker died) and mark it running under `worker`."""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CLAIM_SQL, {'worker': worker, 'stale': STALE_AFTER})
+        job = _row(cursor)
+        conn.commit()
+        cursor.close()
+    return job
+
+
+def heartbeat(job_id, worker, progress):
+    """Record liveness and progress; returns True if a cancel has been requested. Raises JobLost."""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""UPDATE jobs SET heartbeat_at = now(), progress = %s
+                          WHERE id = %s AND worker = %s AND status = 'running'
+                          RETURNING cancel_requested""", (Json(progress), job_id, worker))
+        row = cursor.fetchone()
+        conn.commit()
+        cursor.close()
+    if row is None:
+        raise JobLost(job_id)
+    return row[0]
+
+
+def save_checkpoint(job_id, worker, checkpoint, progress):
+    """Raises JobLost, writing nothing, if the job has passed to another worker."""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""UPDATE jobs SET checkpoint = %s, progress = %s, heartbeat_at = now()
+                          WHERE id = %s AND worker = %s AND status = 'running'""",
+                       (Json(checkpoint), Json(progress), job_id, worker))
+        updated = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    if not updated:
+        raise JobLost(job_id)
+
+
+def finish(job_id, worker, status, result=None, error=None, progress=None):
+    """
+    End a job as 'done', 'failed' or 'cancelled', or hand it back as 'queued'
+    (worker shutdown). Raises JobLost, changing nothing, if the job has passed
+    to another worker.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE jobs
+            SET status      = %(status)s,
+                result      = COALESCE(%(result)s, result),
+                progress    = COALESCE(%(progress)s, progress),
+                error       = %(error)s,
+                worker      = CASE WHEN %(status)s = 'queued' THEN NULL ELSE worker END,
+                finished_at = CASE WHEN %(status)s = 'queued' THEN NULL ELSE now() END
+            WHERE id = %(id)s AND worker = %(worker)s AND status = 'running'
+        """, {'status': status, 'error': error, 'id': job_id, 'worker': worker,
+              'result': Json(result) if result is not None else None,
+              'progress': Json(progress) if progress is not None else None})
+        updated = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    if not updated:
+        raise JobLost(job_id)
+    print(f"[Jobs] Job {job_id} {status}" + (f": {error}" if error else ""))
+
+
+def to_json(job):
+    """The job as the API returns it."""
+    view = {k: job[k] for k in ('id', 'kind', 'status', 'params', 'cancel_requested', 'progress',
+                                'result', 'error', 'attempts')}
+    view['letters_done'] = job['checkpoint'].get('letters_done', [])
+    for key in ('created_at', 'started_at', 'heartbeat_at', 'finished_at'):
+        view[key] = job[key].isoformat() if job[key] else None
+    return view
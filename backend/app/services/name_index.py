@@ -0,0 +1,242 @@
+import re
+import heapq
+import bisect
+import threading
+import unicodedata
+from collections import defaultdict
+import numpy as np
+
+# Minimum similarity (share of the term's trigrams found in a name or nickname)
+# for a typo-tolerant match, and for resolve() to accept one
+SEARCH_SIMILARITY = 0.4
+RESOLVE_SIMILARITY = 0.5
+
+# Match tiers, best first
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(5)
+
+_JOINERS = re.compile(r"[.'`’]")   # "Da'Mon", "B.J." read as one word
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+# Letters NFKD doesn't split into base letter + accent
+_FOLD = str.maketrans({'ł': 'l', 'ø': 'o', 'đ': 'd', 'ð': 'd', 'ħ': 'h', 'ı': 'i',
+                       'æ': 'ae', 'œ': 'oe', 'þ': 'th'})
+
+
+def normalize(text):
+    """Case-, accent- and punctuation-insensitive form: 'José  Aldo Jr.' -> 'jose aldo jr'."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    folded = _JOINERS.sub('', stripped.casefold().translate(_FOLD))
+    return _NON_ALNUM.sub(' ', folded).strip()
+
+
+def trigrams(key):
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing."""
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _substrings(key):
+    """Trigrams every string containing `key` must also contain (for keys of 3+ characters)."""
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class NameIndex:
+    """
+    In-memory fighter-name index for search and name resolution.
+
+    Each fighter is indexed under its normalized name and, if it has one, its
+    nickname. Sorted key and word lists answer prefix matches with a bisect;
+    raw trigram postings, intersected, give the names containing a term; and
+    pg_trgm-style padded word trigrams, counted with numpy, give typo-tolerant
+    matches scored against the closer of name and nickname. Results are ranked
+    exact > name prefix > word prefix > substring > fuzzy, and each tier is only
+    searched while the ones above it leave the page short. add() / remove() are
+    incremental, so the store keeps the index current on every upsert.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = {}                      # name -> (normalized name, normalized nickname or '')
+        self._exact = defaultdict(set)       # normalized key -> names
+        self._sorted_keys = []               # sorted (normalized key, name)
+        self._sorted_words = []              # sorted (word of a key, name)
+        self._unsorted = True                # bulk loading appends; sorted once on first read
+        self._raw = defaultdict(set)         # raw trigram -> names
+        self._ids = {}                       # name -> integer id used by the padded postings
+        self._names = []                     # id -> name (None once removed)
+        self._grams = []                     # id -> padded trigrams of each key
+        self._padded = defaultdict(set)      # padded word trigram -> ids
+        self._arrays = {}                    # padded trigram -> its ids as an array, dropped on change
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, name, nickname=None):
+        with self._lock:
+            keys = (normalize(name), normalize(nickname))
+            if self._keys.get(name) == keys:
+                return
+            self.remove(name)
+            self._keys[name] = keys
+            per_key = []
+            for key in filter(None, keys):
+                self._exact[key].add(name)
+                self._insert(self._sorted_keys, (key, name))
+                for gram in _substrings(key):
+                    self._raw[gram].add(name)
+                per_key.append(trigrams(key))
+            for word in _words(keys):
+                self._insert(self._sorted_words, (word, name))
+
+            ident = len(self._names)
+            self._ids[name] = ident
+            self._names.append(name)
+            self._grams.append(per_key)
+            for gram in set().union(*per_key):
+                self._padded[gram].add(ident)
+                self._arrays.pop(gram, None)
+
+    def remove(self, name):
+        with self._lock:
+            keys = self._keys.pop(name, None)
+            if keys is None:
+                return
+            self._sort()
+            for key in filter(None, keys):
+                _discard(self._exact, key, name)
+                _remove_sorted(self._sorted_keys, (key, name))
+                for gram in _substrings(key):
+                    _discard(self._raw, gram, name)
+            for word in _words(keys):
+                _remove_sorted(self._sorted_words, (word, name))
+            ident = self._ids.pop(name)
+            for gram in set().union(*self._grams[ident]):
+                _discard(self._padded, gram, ident)
+                self._arrays.pop(gram, None)
+            self._names[ident] = None
+            self._grams[ident] = []
+
+    def search(self, term, limit=10, min_similarity=SEARCH_SIMILARITY):
+        """Best `limit` names for a search box term, as (name, tier, similarity) tuples."""
+        key = normalize(term)
+        if not key:
+            return []
+        with self._lock:
+            self._sort()
+            term_grams = trigrams(key)
+            literal = {name: EXACT for name in self._exact.get(key, ())}
+            for tier, sorted_list in ((PREFIX, self._sorted_keys), (WORD_PREFIX, self._sorted_words)):
+                for name in _prefixed(sorted_list, key):
+                    literal.setdefault(name, tier)
+            if len(literal) < limit:
+                for name in self._containing(key):
+                    literal.setdefault(name, SUBSTRING)
+            # Within a literal tier the shortest name is the closest match
+            best = heapq.nsmallest(limit, literal.items(), key=lambda item: (item[1], len(item[0]), item[0]))
+            results = [(name, tier, self._similarity(self._ids[name], term_grams)) for name, tier in best]
+
+            # Typo tolerance only when the literal matches don't fill the page
+            if len(results) < limit:
+                fuzzy = self._fuzzy(term_grams, limit - len(results), min_similarity, literal)
+                results += [(name, FUZZY, similarity) for name, similarity in fuzzy]
+        return results
+
+    def resolve(self, term):
+        """The single fighter `term` most plausibly means, or None."""
+        hits = self.search(term, limit=1, min_similarity=RESOLVE_SIMILARITY)
+        return hits[0][0] if hits else None
+
+    def _insert(self, sorted_list, entry):
+        if self._unsorted:
+            sorted_list.append(entry)
+        else:
+            bisect.insort(sorted_list, entry)
+
+    def _sort(self):
+        if self._unsorted:
+            self._sorted_keys.sort()
+            self._sorted_words.sort()
+            self._unsorted = False
+
+    def _containing(self, key):
+        """Names whose name or nickname contains `key` (3+ characters; shorter terms only prefix-match)."""
+        if len(key) < 3:
+            return []
+        postings = sorted((self._raw.get(g, ()) for g in _substrings(key)), key=len)
+        if not postings or not postings[0]:
+            return []
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return [n for n in candidates if any(key in k for k in self._keys[n] if k)]
+
+    def _fuzzy(self, term_grams, limit, min_similarity, exclude):
+        """Best `limit` (name, similarity) pairs not in `exclude` scoring at least min_similarity."""
+        arrays = [a for a in (self._posting(g) for g in term_grams) if a.size]
+        if not arrays:
+            return []
+        # Trigrams each name shares with the term: exact for names without a
+        # nickname, an upper bound for the rest
+        shared = np.bincount(np.concatenate(arrays), minlength=len(self._names))
+        candidates = np.flatnonzero(shared >= min_similarity * len(term_grams))
+        candidates = candidates[np.argsort(-shared[candidates], kind='stable')]
+
+        scored, top = [], []   # top: min-heap of the best `limit` similarities so far
+        for ident in candidates.tolist():
+            bound = int(shared[ident]) / len(term_grams)
+            # Visited by falling bound: stop once nothing left can enter the top `limit`
+            if len(top) == limit and bound < top[0]:
+                break
+            name = self._names[ident]
+            if name in exclude:
+                continue
+            similarity = self._similarity(ident, term_grams) if len(self._grams[ident]) > 1 else bound
+            if similarity < min_similarity:
+                continue
+            scored.append((similarity, name))
+            if len(top) < limit:
+                heapq.heappush(top, similarity)
+            elif similarity > top[0]:
+                heapq.heapreplace(top, similarity)
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], len(item[1]), item[1]))
+        return [(name, similarity) for similarity, name in best]
+
+    def _posting(self, gram):
+        array = self._arrays.get(gram)
+        if array is None:
+            ids = self._padded.get(gram, ())
+            array = self._arrays[gram] = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        return array
+
+    def _similarity(self, ident, term_grams):
+        """Share of the term's trigrams found in the closer of name and nickname."""
+        if not term_grams:
+            return 0.0
+        return max((len(grams & term_grams) for grams in self._grams[ident]), default=0) / len(term_grams)
+
+
+def _discard(index, key, item):
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.discard(item)
+        if not bucket:
+            del index[key]
+
+
+def _words(keys):
+    return {word for key in keys for word in key.split()}
+
+
+def _prefixed(sorted_list, prefix):
+    """Names of the (key, name) entries whose key starts with `prefix`."""
+    i = bisect.bisect_left(sorted_list, (prefix,))
+    while i < len(sorted_list) and sorted_list[i][0].startswith(prefix):
+        yield sorted_list[i][1]
+        i += 1
+
+
+def _remove_sorted(sorted_list, entry):
+    i = bisect.bisect_left(sorted_list, entry)
+    if i < len(sorted_list) and sorted_list[i] == entry:
+        del sorted_list[i]
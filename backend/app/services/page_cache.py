@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+# Unset or empty disables the cache
+CACHE_DIR = os.environ.get('SCRAPE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ufcstats-cache'))
+CACHE_MB = float(os.environ.get('SCRAPE_CACHE_MB', 256))
+
+# Seconds a cached page is served without asking the server; after that it is revalidated
+TTLS = {
+    'listing': int(os.environ.get('SCRAPE_TTL_LISTING', 6 * 3600)),
+    'search':  int(os.environ.get('SCRAPE_TTL_SEARCH', 3600)),
+    'detail':  int(os.environ.get('SCRAPE_TTL_DETAIL', 6 * 3600)),
+    'other':   int(os.environ.get('SCRAPE_TTL_OTHER', 3600)),
+}
+
+
+def url_class(url):
+    if '/fighters/search' in url:
+        return 'search'
+    if '/statistics/fighters' in url:
+        return 'listing'
+    if '/fighter-details/' in url:
+        return 'detail'
+    return 'other'
+
+
+class PageCache:
+    """
+    On-disk cache of fetched pages, shared by every process using the same directory.
+
+    Bodies are stored once per content hash under bodies/, so a page that comes
+    back unchanged, or is identical under two URLs, takes no new space. Each URL
+    has a small JSON entry under entries/ with its body hash, validators (ETag,
+    Last-Modified) and fetch time. Reading an entry touches its mtime, so when
+    the bodies pass `max_bytes` the least recently used entries are evicted,
+    along with any bodies no remaining entry refers to.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_mb=CACHE_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._size = None      # bytes under bodies/, counted on first store
+        self.evictions = 0
+        if root:
+            os.makedirs(os.path.join(root, 'bodies'), exist_ok=True)
+            os.makedirs(os.path.join(root, 'entries'), exist_ok=True)
+
+    def _entry_path(self, url):
+        return os.path.join(self.root, 'entries', hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    def _body_path(self, digest):
+        return os.path.join(self.root, 'bodies', digest)
+
+    def get(self, url):
+        """The cached entry for `url` with its body, or None. Entry keys: body, etag, last_modified, encoding, fetched_at."""
+        if not self.root:
+            return None
+        path = self._entry_path(url)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            with open(self._body_path(entry['digest']), 'rb') as f:
+                entry['body'] = f.read()
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry
+
+    def is_fresh(self, url, entry):
+        return time.time() - entry['fetched_at'] < TTLS[url_class(url)]
+
+    def put(self, url, body, etag=None, last_modified=None, encoding=None):
+        if not self.root:
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        added = 0
+        if not os.path.exists(body_path):
+            _write_atomic(body_path, body)
+            added = len(body)
+        self._write_entry(url, {'url': url, 'digest': digest, 'etag': etag, 'last_modified': last_modified,
+                                'encoding': encoding, 'fetched_at': time.time()})
+        if added:
+            self._grow(added)
+
+    def touch(self, url, entry):
+        """A 304 confirmed the cached body: restart its TTL."""
+        if not self.root:
+            return
+        entry = {k: v for k, v in entry.items() if k != 'body'}
+        entry['fetched_at'] = time.time()
+        self._write_entry(url, entry)
+
+    def _write_entry(self, url, entry):
+        _write_atomic(self._entry_path(url), json.dumps(entry).encode())
+
+    def _grow(self, added):
+        with self._lock:
+            if self._size is None:
+                self._size = _dir_size(os.path.join(self.root, 'bodies'))
+            else:
+                self._size += added
+            if self._size <= self.max_bytes:
+                return
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the bodies fit in 90% of max_bytes (caller holds the lock)."""
+        entries_dir = os.path.join(self.root, 'entries')
+        entries = []
+        for name in os.listdir(entries_dir):
+            path = os.path.join(entries_dir, name)
+            try:
+                with open(path) as f:
+                    digest = json.load(f)['digest']
+                entries.append((os.path.getmtime(path), path, digest))
+            except (OSError, ValueError, KeyError):
+                continue
+        entries.sort()
+        sizes = {}
+        for _, _, digest in entries:
+            if digest not in sizes:
+                try:
+                    sizes[digest] = os.path.getsize(self._body_path(digest))
+                except OSError:
+                    sizes[digest] = 0
+        live = {}
+        for _, _, digest in entries:
+            live[digest] = live.get(digest, 0) + 1
+        total = sum(sizes.values())
+        target = self.max_bytes * 0.9
+        for _, path, digest in entries:
+            if total <= target:
+                break
+            _remove(path)
+            self.evictions += 1
+            live[digest] -= 1
+            if not live[digest]:
+                _remove(self._body_path(digest))
+                total -= sizes[digest]
+        # Bodies left behind by entries that were since rewritten with new content.
+        # A body stored by a concurrent put() a moment before its entry may go
+        # too; that entry then reads as a miss and is fetched again
+        for name in os.listdir(os.path.join(self.root, 'bodies')):
+            if not live.get(name) and not name.endswith('.tmp'):
+                _remove(self._body_path(name))
+        self._size = _dir_size(os.path.join(self.root, 'bodies'))
+
+    def stats(self):
+        with self._lock:
+            return {'dir': self.root, 'bytes': self._size, 'max_bytes': self.max_bytes, 'evictions': self.evictions}
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _dir_size(path):
+    total = 0
+    for name in os.listdir(path):
+        try:
+            total += os.path.getsize(os.path.join(path, name))
+        except OSError:
+            pass
+    return total
+
+
+page_cache = PageCache()
@@ -0,0 +1,101 @@
+import os
+import re
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # BeautifulSoup's pure-Python parser still works
+    lxml = None
+
+# 'lxml' (the default, when installed) or 'bs4'
+PARSER = os.environ.get('SCRAPE_PARSER', 'lxml')
+
+BACKENDS = ['lxml', 'bs4'] if lxml is not None else ['bs4']
+
+
+def parse_html(text, backend=None):
+    """
+    Parse a page for the scraper's extraction code. Both backends return a root
+    supporting select / select_one / get_text / get / [attr] with
+    BeautifulSoup's semantics, so extraction gives identical results on either.
+    """
+    backend = backend or PARSER
+    if backend == 'lxml' and lxml is not None:
+        # lxml rejects documents with no elements; BeautifulSoup parses them as empty
+        root = lxml.html.document_fromstring(text) if text.strip() else lxml.html.document_fromstring('<html></html>')
+        return LxmlNode(root)
+    return BeautifulSoup(text, 'html.parser')
+
+
+# ── lxml backend ──────────────────────────────────────────────────────────────
+
+_COMPOUND = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?((?:\.[\w-]+)*)$')
+_xpaths = {}
+# BeautifulSoup's get_text leaves out script and stylesheet contents
+_SKIP_TEXT = {'script', 'style'}
+
+
+def _xpath(selector):
+    """Compile the CSS subset the scraper uses (descendant chains of tag.class.class) to XPath."""
+    compiled = _xpaths.get(selector)
+    if compiled is None:
+        steps = []
+        for part in selector.split():
+            match = _COMPOUND.match(part)
+            if not match:
+                raise ValueError(f"Unsupported selector for the lxml backend: {selector!r}")
+            tag = match.group(1) or '*'
+            tests = ''.join(f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+                            for cls in match.group(2).split('.') if cls)
+            steps.append(f"descendant::{tag}{tests}")
+        compiled = _xpaths[selector] = etree.XPath('/'.join(steps))
+    return compiled
+
+
+class LxmlNode:
+    """An lxml element behind the slice of the BeautifulSoup Tag API the scraper uses."""
+
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    def select(self, selector):
+        return [LxmlNode(e) for e in _xpath(selector)(self.element)]
+
+    def select_one(self, selector):
+        found = _xpath(selector)(self.element)
+        return LxmlNode(found[0]) if found else None
+
+    def get_text(self, separator='', strip=False):
+        strings = _strings(self.element)
+        if strip:
+            strings = (s.strip() for s in strings)
+            strings = (s for s in strings if s)
+        return separator.join(strings)
+
+    def get(self, key, default=None):
+        value = self.element.get(key)
+        if value is None:
+            return default
+        # class is multi-valued in BeautifulSoup
+        return value.split() if key == 'class' else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+def _strings(element):
+    """Text under `element` in document order, without comments, scripts or the element's own tail."""
+    if not isinstance(element.tag, str) or element.tag in _SKIP_TEXT:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        yield from _strings(child)
+        if child.tail:
+            yield child.tail
@@ -0,0 +1,152 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from psycopg2 import errors
+from psycopg2.extras import execute_values
+from app.db import connection
+from app.services.cache import analytics_cache
+from database.prediction_partitions import ensure_partitions
+
+QUEUE_SIZE = int(os.environ.get('PREDICTION_LOG_QUEUE', 10000))
+BATCH_SIZE = int(os.environ.get('PREDICTION_LOG_BATCH', 500))
+# Seconds a logged row may wait for the rest of its batch
+FLUSH_INTERVAL = float(os.environ.get('PREDICTION_LOG_INTERVAL', 1.0))
+# 'drop': a full queue discards the row; 'block': the request waits up to BLOCK_TIMEOUT for room
+FULL_POLICY = os.environ.get('PREDICTION_LOG_POLICY', 'drop')
+BLOCK_TIMEOUT = float(os.environ.get('PREDICTION_LOG_BLOCK_TIMEOUT', 0.5))
+
+INSERT_SQL = "INSERT INTO predictions (red_fighter, blue_fighter, predicted_winner, confidence) VALUES %s"
+
+
+class _Flush:
+    """Queue marker: the writer commits what it holds, then sets `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class PredictionLogger:
+    """
+    Write-behind log of served predictions.
+
+    Requests only enqueue (red_fighter, blue_fighter, predicted_winner, confidence)
+    tuples; a daemon thread drains the queue and writes them with multi-row
+    INSERTs, committing whenever BATCH_SIZE rows are waiting or FLUSH_INTERVAL
+    has passed since the first of them. The thread is started on first use in
+    each process, so a gunicorn master that preloads the app never owns it.
+    """
+
+    def __init__(self, maxsize=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 interval=FLUSH_INTERVAL, policy=FULL_POLICY):
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown PREDICTION_LOG_POLICY {policy!r}")
+        self.maxsize = maxsize
+        self.batch_size = max(int(batch_size), 1)
+        self.interval = interval
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def log(self, rows):
+        """Queue prediction rows for writing; never raises into the request."""
+        q = self._writer_queue()
+        for red, blue, winner, confidence in rows:
+            row = (red, blue, winner, round(confidence, 4))
+            try:
+                if self.policy == 'block':
+                    q.put(row, timeout=BLOCK_TIMEOUT)
+                else:
+                    q.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed (or timeout). Returns True if flushed."""
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            return True
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize() if self._pid == os.getpid() else 0,
+            'maxsize': self.maxsize,
+            'policy': self.policy,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+        }
+
+    def _writer_queue(self):
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                # First use in this process (or first since fork): the parent's
+                # thread didn't survive the fork, so start from a fresh queue
+                self._queue = queue.Queue(self.maxsize)
+                self._thread = threading.Thread(target=self._run, name='prediction-logger', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+        return self._queue
+
+    def _run(self):
+        q = self._queue
+        while True:
+            batch, markers = [], []
+            item = q.get()
+            deadline = time.monotonic() + self.interval
+            while True:
+                if isinstance(item, _Flush):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.done.set()
+
+    def _write(self, batch):
+        try:
+            with connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    execute_values(cursor, INSERT_SQL, batch, page_size=self.batch_size)
+                except errors.CheckViolation:
+                    # No partition for this month yet (maintenance hasn't run): create it and retry once
+                    conn.rollback()
+                    ensure_partitions(cursor)
+                    execute_values(cursor, INSERT_SQL, batch, page_size=self.batch_size)
+                conn.commit()
+                cursor.close()
+            self.written += len(batch)
+            self.batches += 1
+            analytics_cache.invalidate('predictions')
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"[PredictionLog] Failed to write {len(batch)} predictions: {e}")
+
+
+prediction_logger = PredictionLogger()
+# Worker shutdown: commit whatever is still queued
+atexit.register(prediction_logger.flush)
@@ -0,0 +1,333 @@
+import os
+import time
+import queue
+import random
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from app.db import connection
+from app.services.page_cache import page_cache
+
+# Fetches in flight at once, across every host
+CONCURRENCY = int(os.environ.get('SCRAPE_CONCURRENCY', 8))
+# Sustained requests per second to any one host, and how many may go out back to back
+HOST_RATE = float(os.environ.get('SCRAPE_HOST_RATE', 4))
+HOST_BURST = int(os.environ.get('SCRAPE_HOST_BURST', 4))
+# Attempts after the first for timeouts, connection errors, 429 and 5xx
+RETRIES = int(os.environ.get('SCRAPE_RETRIES', 3))
+# Backoff before retry n is uniform in [0, BACKOFF * 2**n), capped at BACKOFF_MAX seconds
+BACKOFF = float(os.environ.get('SCRAPE_BACKOFF', 0.5))
+BACKOFF_MAX = float(os.environ.get('SCRAPE_BACKOFF_MAX', 30))
+# Fighters per write transaction; the writer commits sooner if the fetchers fall behind
+WRITE_BATCH = int(os.environ.get('SCRAPE_WRITE_BATCH', 100))
+WRITE_INTERVAL = float(os.environ.get('SCRAPE_WRITE_INTERVAL', 2.0))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(int(burst), 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Claim the token now, even if it is still owed; later callers queue behind it
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class StageCounters:
+    """Per-stage item, error and busy-time counters, safe to update from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self.started = time.monotonic()
+
+    def add(self, stage, items=1, errors=0, seconds=0.0):
+        with self._lock:
+            counts = self._stages.setdefault(stage, {'items': 0, 'errors': 0, 'busy_seconds': 0.0})
+            counts['items'] += items
+            counts['errors'] += errors
+            counts['busy_seconds'] += seconds
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            return {stage: {'items': c['items'],
+                            'errors': c['errors'],
+                            'busy_seconds': round(c['busy_seconds'], 2),
+                            'per_sec': round(c['items'] / elapsed, 2) if elapsed else 0.0}
+                    for stage, c in self._stages.items()}
+
+    def summary(self):
+        return ', '.join(f"{stage} {c['items']} ({c['per_sec']}/s, {c['errors']} errors, {c['busy_seconds']}s busy)"
+                         for stage, c in self.stats().items())
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+# Process-wide fetch counters: requests, retries, failures, throttled seconds, cache hits, 304s
+http_counters = StageCounters()
+_session = None
+_session_pid = None
+
+
+def session():
+    """This process's pooled keep-alive session (a forked worker builds its own)."""
+    global _session, _session_pid
+    if _session_pid != os.getpid():
+        with _buckets_lock:
+            if _session_pid != os.getpid():
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(CONCURRENCY, 10))
+                s.mount('http://', adapter)
+                s.mount('https://', adapter)
+                _session, _session_pid = s, os.getpid()
+    return _session
+
+
+def _bucket(url):
+    host = urlsplit(url).netloc
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(HOST_RATE, HOST_BURST)
+    return bucket
+
+
+def _backoff(attempt, resp=None):
+    retry_after = resp.headers.get('Retry-After') if resp is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF * 2 ** attempt, BACKOFF_MAX))
+
+
+def fetch(url, timeout=15, headers=None, cache=True):
+    """
+    GET `url` through the page cache and the pooled session.
+
+    A cached page younger than its URL class's TTL is returned without a
+    request; an older one is revalidated with If-None-Match / If-Modified-Since,
+    and a 304 returns the cached body. Requests wait for their host's token
+    bucket, and timeouts, connection errors, 429 and 5xx are retried with
+    jittered exponential backoff. Returns the response, or raises the last
+    error once RETRIES are used up.
+    """
+    entry = page_cache.get(url) if cache else None
+    if entry and page_cache.is_fresh(url, entry):
+        http_counters.add('cache hits')
+        return _cached_response(url, entry)
+    headers = dict(headers or {})
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+
+    bucket = _bucket(url)
+    for attempt in range(RETRIES + 1):
+        waited = bucket.acquire()
+        if waited:
+            http_counters.add('throttled', items=0, seconds=waited)
+        resp = None
+        try:
+            resp = session().get(url, headers=headers, timeout=timeout)
+            if resp.status_code not in RETRY_STATUS:
+                break
+            error = requests.HTTPError(f"{resp.status_code} for {url}", response=resp)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt == RETRIES:
+            http_counters.add('requests', errors=1)
+            raise error
+        http_counters.add('retries')
+        time.sleep(_backoff(attempt, resp))
+
+    http_counters.add('requests')
+    if resp.status_code == 304 and entry:
+        http_counters.add('not modified')
+        page_cache.touch(url, entry)
+        return _cached_response(url, entry)
+    if resp.status_code == 200 and cache:
+        page_cache.put(url, resp.content, etag=resp.headers.get('ETag'),
+                       last_modified=resp.headers.get('Last-Modified'), encoding=resp.encoding)
+    return resp
+
+
+def _cached_response(url, entry):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.url = url
+    resp._content = entry['body']
+    resp.encoding = entry.get('encoding')
+    return resp
+
+
+class _Writer:
+    """
+    The engine's only database client. Items are queued by the fetch workers and
+    written `batch` at a time, each batch in its own short transaction on a
+    pooled connection, so no transaction is held open across a fetch. A batch
+    that fails is retried one item per transaction, so a single bad row costs
+    only itself. If write() returns a callable, it runs once that transaction
+    has committed.
+    """
+
+    def __init__(self, write, counters, batch=WRITE_BATCH, interval=WRITE_INTERVAL, on_written=None):
+        self.write = write
+        self.counters = counters
+        self.on_written = on_written
+        self.batch = max(int(batch), 1)
+        self.interval = interval
+        self.written = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='scrape-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def close(self):
+        """Write whatever is still queued and stop. Returns the number of items written."""
+        self._queue.put(None)
+        self._thread.join()
+        return self.written
+
+    def _run(self):
+        done = False
+        while not done:
+            items = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.interval
+            while True:
+                if item is None:
+                    done = True
+                    break
+                items.append(item)
+                remaining = deadline - time.monotonic()
+                if len(items) >= self.batch or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if items:
+                self._flush(items)
+
+    def _flush(self, items):
+        start = time.monotonic()
+        try:
+            self._commit(items)
+        except Exception as e:
+            if len(items) == 1:
+                self.counters.add('write', items=0, errors=1, seconds=time.monotonic() - start)
+                print(f"[ScrapeEngine] Failed to write {_label(items[0])}: {e}")
+                return
+            # One bad row aborts the whole transaction; write the rest one at a time
+            print(f"[ScrapeEngine] Batch of {len(items)} failed ({e}); retrying row by row")
+            written, failed = [], []
+            for item in items:
+                try:
+                    self._commit([item])
+                    written.append(item)
+                except Exception as row_error:
+                    failed.append(item)
+                    print(f"[ScrapeEngine] Failed to write {_label(item)}: {row_error}")
+            self.counters.add('write', items=len(written), errors=len(failed), seconds=time.monotonic() - start)
+            items = written
+        else:
+            self.counters.add('write', items=len(items), seconds=time.monotonic() - start)
+        self.written += len(items)
+        if self.on_written and items:
+            self.on_written(len(items))
+
+    def _commit(self, items):
+        with connection() as conn:
+            cursor = conn.cursor()
+            after_commit = self.write(cursor, items)
+            conn.commit()
+            cursor.close()
+        if callable(after_commit):
+            # Committed: a failure here must not make _flush write the batch again
+            try:
+                after_commit()
+            except Exception as e:
+                print(f"[ScrapeEngine] After-commit hook failed: {e}")
+
+
+def _label(item):
+    """How a failed item is named in the log: a fighter by name, anything else by repr."""
+    if isinstance(item, dict) and item.get('name'):
+        return item['name']
+    return repr(item)[:80]
+
+
+class ScrapeEngine:
+    """
+    Pipelines listing fetches, detail fetches and database writes.
+
+    Listing and detail tasks share one pool of `concurrency` threads (every
+    fetch also waits on its host's token bucket), so detail pages for the first
+    letters are already downloading while later listings are in flight.
+    Finished items go to a single writer thread, which batches them into short
+    transactions. `counters` tracks items, errors and busy time per stage, and
+    on_written(n), if given, is called after each batch of n items commits.
+    """
+
+    def __init__(self, write, concurrency=CONCURRENCY, batch=WRITE_BATCH, on_written=None):
+        self.counters = StageCounters()
+        self.concurrency = max(int(concurrency), 1)
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='scrape')
+        self._writer = _Writer(write, self.counters, batch=batch, on_written=on_written)
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def submit(self, stage, fn, *args):
+        """Run fn(*args) on the pool, counted under `stage`. fn may submit further tasks."""
+        with self._idle:
+            self._pending += 1
+        self._pool.submit(self._task, stage, fn, *args)
+
+    def write(self, item):
+        self._writer.put(item)
+
+    def _task(self, stage, fn, *args):
+        start = time.monotonic()
+        try:
+            fn(*args)
+            self.counters.add(stage, seconds=time.monotonic() - start)
+        except Exception as e:
+            self.counters.add(stage, items=0, errors=1, seconds=time.monotonic() - start)
+            print(f"[ScrapeEngine] {stage} task failed: {e}")
+        finally:
+            with self._idle:
+                self._pending -= 1
+                if not self._pending:
+                    self._idle.notify_all()
+
+    def join(self):
+        """Wait for every task (including ones they submitted) and the writes. Returns items written."""
+        with self._idle:
+            while self._pending:
+                self._idle.wait()
+        self._pool.shutdown()
+        return self._writer.close()
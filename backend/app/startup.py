@@ -0,0 +1,35 @@
+import os
+import time
+from contextlib import contextmanager
+
+_phases = []        # [label, seconds excluding nested phases], in the order they started
+_stack = []         # phases currently running: [entry, seconds spent in nested phases]
+_reported_pid = None
+
+
+@contextmanager
+def phase(label):
+    """Time a startup phase; a phase nested in another is subtracted from the outer one."""
+    entry = [label, 0.0]
+    _phases.append(entry)
+    _stack.append([entry, 0.0])
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _, nested = _stack.pop()
+        entry[1] = elapsed - nested
+        if _stack:
+            _stack[-1][1] += elapsed
+
+
+def report(note=''):
+    """Log the phase breakdown once per process."""
+    global _reported_pid
+    if _reported_pid == os.getpid() or not _phases:
+        return
+    _reported_pid = os.getpid()
+    parts = ', '.join(f"{label} {seconds:.2f}s" for label, seconds in _phases)
+    total = sum(seconds for _, seconds in _phases)
+    print(f"[Startup] pid {os.getpid()}{note}: {parts} (total {total:.2f}s)", flush=True)
@@ -0,0 +1,137 @@
+"""
+Fights table size and query times before and after the one-row-per-bout migration.
+
+    python benchmarks/bench_bout_dedup.py [--bouts 500000] [--fighters 5000]
+
+Runs in a scratch schema (dropped afterwards) on DATABASE_URL: migrates to
+version 5, loads every bout twice, once from each fighter's page (corners
+swapped, Winner flipped), and times the fights aggregates the app runs. Then it
+applies migration 6, VACUUM FULLs fights and times them again. Exits 1 if the
+deduplicated table doesn't hold exactly one row per bout or fighter_career
+disagrees with it.
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.db import get_conn  # noqa: E402
+from database.migrations import migrate  # noqa: E402
+from database.fighter_career import check  # noqa: E402
+
+WEIGHT_CLASSES = ['Flyweight', 'Bantamweight', 'Featherweight', 'Lightweight', 'Welterweight',
+                  'Middleweight', 'Light Heavyweight', 'Heavyweight']
+
+QUERIES = {
+    # /prediction_history's outcome distribution
+    'outcomes': ("""SELECT SUM(CASE WHEN Finish LIKE '%%KO%%' OR Finish LIKE '%%TKO%%' THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN Finish LIKE '%%SUB%%' THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN Finish LIKE '%%DEC%%' OR Finish IS NULL THEN 1 ELSE 0 END)
+                    FROM fights""", ()),
+    # /fighter_analytics_details' fight history
+    'history': ("SELECT Date, Winner FROM fights WHERE RedFighter = %s OR BlueFighter = %s ORDER BY Date",
+                ('Fighter 42', 'Fighter 42')),
+    'by class': ("SELECT WeightClass, COUNT(*) FROM fights GROUP BY WeightClass", ()),
+}
+
+
+def load(cursor, bouts, fighters, rng):
+    names = [f"Fighter {i}" for i in range(fighters)]
+    cursor.execute("INSERT INTO fighters (name) SELECT unnest(%s::text[])", (names,))
+    lines, seen = [], set()
+    while len(seen) < bouts:
+        a, b = rng.sample(names, 2)
+        day = (date(1994, 1, 1) + timedelta(days=rng.randrange(11000))).isoformat()
+        if (min(a, b), max(a, b), day) in seen:
+            continue
+        seen.add((min(a, b), max(a, b), day))
+        winner = rng.choice(['Red', 'Blue', 'Draw'])
+        flipped = {'Red': 'Blue', 'Blue': 'Red'}.get(winner, winner)
+        wc, finish = rng.choice(WEIGHT_CLASSES), rng.choice(['KO/TKO', 'SUB', 'U-DEC'])
+        lines.append(f"{a}\t{b}\t{day}\t{winner}\t{wc}\t{finish}\n")
+        lines.append(f"{b}\t{a}\t{day}\t{flipped}\t{wc}\t{finish}\n")
+    cursor.copy_expert("COPY fights (RedFighter, BlueFighter, Date, Winner, WeightClass, Finish) FROM STDIN",
+                       io.StringIO(''.join(lines)))
+
+
+def time_queries(cursor, repeat=10):
+    timings = {}
+    for label, (sql, params) in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[label] = sorted(samples)[len(samples) // 2]
+    return timings
+
+
+def sizes(cursor):
+    cursor.execute("SELECT COUNT(*), pg_size_pretty(pg_relation_size('fights')), "
+                   "pg_size_pretty(pg_total_relation_size('fights')) FROM fights")
+    return cursor.fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bouts', type=int, default=500000)
+    parser.add_argument('--fighters', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    schema = f"bench_bout_dedup_{os.getpid()}"
+    conn = get_conn()
+    cursor = conn.cursor()
+    ok = True
+    try:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        conn.commit()
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate(conn, target=5)
+            load(cursor, args.bouts, args.fighters, random.Random(args.seed))
+            cursor.execute("SELECT refresh_fighter_career(ARRAY(SELECT name FROM fighters))")
+            conn.commit()
+        cursor.execute("ANALYZE fights")
+        conn.commit()
+        before, before_sizes = time_queries(cursor), sizes(cursor)
+
+        start = time.perf_counter()
+        migrate(conn, target=6)
+        migration = time.perf_counter() - start
+        conn.autocommit = True
+        cursor.execute("VACUUM FULL ANALYZE fights")
+        conn.autocommit = False
+        after, after_sizes = time_queries(cursor), sizes(cursor)
+
+        print(f"\nmigration 6: {migration:.2f}s")
+        print(f"{'':<10} {'rows':>9} {'heap':>9} {'total':>9}")
+        print(f"{'before':<10} {before_sizes[0]:>9} {before_sizes[1]:>9} {before_sizes[2]:>9}")
+        print(f"{'after':<10} {after_sizes[0]:>9} {after_sizes[1]:>9} {after_sizes[2]:>9}")
+        print(f"\n{'query':<10} {'before':>9} {'after':>9}")
+        for label in QUERIES:
+            print(f"{label:<10} {before[label]:>7.2f}ms {after[label]:>7.2f}ms")
+
+        if after_sizes[0] != args.bouts:
+            print(f"Expected {args.bouts} fights after dedup, found {after_sizes[0]}")
+            ok = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = check(cursor) and ok
+    finally:
+        conn.rollback()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        cursor.close()
+        conn.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Rows/sec for a full fight-history re-ingest: per-row INSERTs versus COPY + merge.
+
+    python benchmarks/bench_fight_ingest.py [--fighters 2000] [--bouts 15000] [--batch 500]
+
+Runs in a scratch schema (dropped afterwards) on DATABASE_URL, migrated to the
+latest version so the fighter_career triggers fire as they do in production.
+Every bout is listed on both fighters' pages, and each method replaces every
+fighter's history once, in roster order:
+
+  per-row    DELETE then one INSERT per fight row, one transaction per fighter
+             (upsert_fighter_fights before it was batched)
+  merge x1   replace_fight_histories, one fighter per transaction
+  merge xN   replace_fight_histories, --batch fighters per transaction
+
+The final fights table is compared across methods, which must agree.
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.db import get_conn  # noqa: E402
+from app.services.fighter_scraper import replace_fight_histories, FIGHT_COLUMNS  # noqa: E402
+from database.migrations import migrate  # noqa: E402
+
+WEIGHT_CLASSES = ['Flyweight', 'Bantamweight', 'Featherweight', 'Lightweight', 'Welterweight',
+                  'Middleweight', 'Light Heavyweight', 'Heavyweight']
+METHODS = ['KO/TKO', 'SUB', 'U-DEC', 'S-DEC']
+
+
+def histories(fighters, bouts, rng):
+    """{name: fight rows as listed on that fighter's page}, the fighter always in the first column."""
+    names = [f"Fighter {i}" for i in range(fighters)]
+    pages = {name: [] for name in names}
+    for _ in range(bouts):
+        a, b = rng.sample(names, 2)
+        day = date(1994, 1, 1) + timedelta(days=rng.randrange(11000))
+        outcome = rng.choice(['Red', 'Blue', 'Draw'])
+        flipped = {'Red': 'Blue', 'Blue': 'Red'}.get(outcome, outcome)
+        wc, rounds, method = rng.choice(WEIGHT_CLASSES), rng.choice([3, 5]), rng.choice(METHODS)
+        pages[a].append((a, b, day, outcome, wc, rounds, method))
+        pages[b].append((b, a, day, flipped, wc, rounds, method))
+    return pages
+
+
+def per_row(conn, pages, batch):
+    cursor = conn.cursor()
+    for name, fights in pages.items():
+        cursor.execute("DELETE FROM fights WHERE RedFighter=%s OR BlueFighter=%s", (name, name))
+        for fight in fights:
+            cursor.execute(f"INSERT INTO fights ({', '.join(FIGHT_COLUMNS)}) VALUES (%s,%s,%s,%s,%s,%s,%s)",
+                           fight)
+        conn.commit()
+    cursor.close()
+
+
+def merged(conn, pages, batch):
+    cursor = conn.cursor()
+    names = list(pages)
+    for i in range(0, len(names), batch):
+        replace_fight_histories(cursor, {name: pages[name] for name in names[i:i + batch]})
+        conn.commit()
+    cursor.close()
+
+
+def snapshot(cursor):
+    cursor.execute(f"SELECT {', '.join(FIGHT_COLUMNS)} FROM fights ORDER BY {', '.join(FIGHT_COLUMNS)}")
+    return cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fighters', type=int, default=2000)
+    parser.add_argument('--bouts', type=int, default=15000)
+    parser.add_argument('--batch', type=int, default=500, help="fighters per transaction for merge xN")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    pages = histories(args.fighters, args.bouts, random.Random(args.seed))
+    rows = sum(len(fights) for fights in pages.values())
+    schema = f"bench_fight_ingest_{os.getpid()}"
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        conn.commit()
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate(conn)
+        cursor.execute("INSERT INTO fighters (name) SELECT unnest(%s::text[])", (list(pages),))
+        conn.commit()
+
+        print(f"{args.fighters} fighters, {rows} page rows ({args.bouts} bouts listed on both pages)")
+        print(f"{'method':<10} {'seconds':>8} {'rows/sec':>10} {'fights':>8}")
+        results = {}
+        for label, method, batch in (('per-row', per_row, 1), ('merge x1', merged, 1),
+                                     (f"merge x{args.batch}", merged, args.batch)):
+            cursor.execute("TRUNCATE fights, fighter_career")
+            conn.commit()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                method(conn, pages, batch)
+                elapsed = time.perf_counter() - start
+            results[label] = snapshot(cursor)
+            print(f"{label:<10} {elapsed:>8.2f} {rows / elapsed:>10.0f} {len(results[label]):>8}")
+
+        reference = next(iter(results.values()))
+        if any(result != reference for result in results.values()):
+            print("Methods left different fights tables")
+            sys.exit(1)
+    finally:
+        conn.rollback()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
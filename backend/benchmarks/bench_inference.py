@@ -0,0 +1,134 @@
+"""
+Single-bout inference: DataFrame + sklearn pipeline vs the FastPredictor numpy path.
+
+    python benchmarks/bench_inference.py [--model models/ufc_predictor_v4.pkl] [--calls 2000]
+
+Checks that both paths return the same probabilities on random bouts (exit code 1
+if not), then reports per-call latency for each, and per-batch latency at the
+bout counts /predict and /predict_batch serve (1, 10, 50) with the XGBoost
+classifier and with the tree engine behind FastPredictor.
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import joblib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml.inference import FEATURES, WEIGHT_CLASSES, FastPredictor, compute_model_features, build_feature_matrix
+from ml.tree_engine import TreeEngine
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'ufc_predictor_v4.pkl')
+SERVED_BATCHES = (1, 10, 50)
+
+
+def random_fighter(rng):
+    return {
+        'height': float(rng.normal(180, 8)),
+        'reach': float(rng.normal(183, 9)),
+        'age': int(rng.integers(21, 41)),
+        'stance': str(rng.choice(['Orthodox', 'Southpaw', 'Switch'])),
+        'weight_class': str(rng.choice(list(WEIGHT_CLASSES))),
+        'win_streak': int(rng.integers(0, 8)),
+        'ko_wins': int(rng.integers(0, 12)),
+        'avg_sig_str': float(rng.uniform(1, 7)),
+        'avg_td_pct': float(rng.uniform(0, 4)),
+        'avg_sub_att': float(rng.uniform(0, 2)),
+        'total_fights': int(rng.integers(1, 35)),
+    }
+
+
+def random_bout(rng):
+    data = {
+        'red_odds': str(int(rng.integers(-400, 300))),
+        'blue_odds': str(int(rng.integers(-300, 400))),
+        'number_of_rounds': str(rng.choice([3, 5])),
+        'title_bout': str(rng.choice(['true', 'false'])),
+    }
+    return random_fighter(rng), random_fighter(rng), data
+
+
+def check_parity(pipe, fast, bouts, atol):
+    worst = 0.0
+    for red, blue, data in bouts:
+        expected = pipe.predict_proba(pd.DataFrame([compute_model_features(red, blue, data)])[FEATURES])[0]
+        got = fast.predict_proba_one(red, blue, data)
+        worst = max(worst, float(np.max(np.abs(expected - got))))
+
+    # Matrix path, with NaNs sprinkled in so the imputer branch is exercised too
+    X = build_feature_matrix(bouts)
+    X[::3, ::5] = np.nan
+    expected = pipe.predict_proba(pd.DataFrame(X, columns=FEATURES))
+    got = fast.predict_proba(X)
+    worst = max(worst, float(np.max(np.abs(expected - got))))
+
+    print(f"Parity: max |p_fast - p_pipeline| = {worst:.3g} over {len(bouts)} bouts (+ batch with NaNs)")
+    return worst <= atol
+
+
+def per_call_us(fn, bouts, calls):
+    for red, blue, data in bouts[:20]:
+        fn(red, blue, data)
+    start = time.perf_counter()
+    for i in range(calls):
+        red, blue, data = bouts[i % len(bouts)]
+        fn(red, blue, data)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def per_batch_us(predict, X, batch, calls):
+    batches = [X[i:i + batch] for i in range(0, X.shape[0] - batch + 1, batch)]
+    predict(batches[0])
+    start = time.perf_counter()
+    for i in range(calls):
+        predict(batches[i % len(batches)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--bouts', type=int, default=200)
+    parser.add_argument('--atol', type=float, default=1e-9)
+    args = parser.parse_args()
+
+    pipe = joblib.load(args.model)
+    fast = FastPredictor(pipe)
+    rng = np.random.default_rng(42)
+    bouts = [random_bout(rng) for _ in range(args.bouts)]
+
+    if not check_parity(pipe, fast, bouts, args.atol):
+        print("FAIL: fast path diverges from the pipeline")
+        sys.exit(1)
+
+    def dataframe_path(red, blue, data):
+        return pipe.predict_proba(pd.DataFrame([compute_model_features(red, blue, data)])[FEATURES])[0]
+
+    # Same classifier on both sides, so the difference is feature assembly + preprocessing
+    slow = per_call_us(dataframe_path, bouts, args.calls)
+    quick = per_call_us(fast.predict_proba_one, bouts, args.calls)
+
+    clf = pipe.named_steps['classifier']
+    row = fast.transform(build_feature_matrix(bouts[:1]))
+    classifier_only = per_call_us(lambda *_: clf.predict_proba(row), bouts, args.calls)
+
+    print(f"DataFrame + pipeline : {slow:9.1f} us/call")
+    print(f"FastPredictor        : {quick:9.1f} us/call")
+    print(f"  classifier alone   : {classifier_only:9.1f} us/call")
+    print(f"Overhead removed     : {slow - quick:9.1f} us/call ({slow / quick:.2f}x)")
+
+    engine = FastPredictor(pipe, classifier=TreeEngine.from_pipeline(pipe))
+    X = build_feature_matrix(bouts)
+    print(f"\n{'bouts':>6} {'XGBoost us/batch':>17} {'engine us/batch':>16} {'speedup':>8}")
+    for batch in SERVED_BATCHES:
+        calls = max(args.calls // batch, 20)
+        base = per_batch_us(fast.predict_proba, X, batch, calls)
+        flat = per_batch_us(engine.predict_proba, X, batch, calls)
+        print(f"{batch:>6} {base:>17.1f} {flat:>16.1f} {base / flat:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Time each schema migration on a synthetic fights table, and the fight queries before / after.
+
+    python benchmarks/bench_migrations.py [--fights 1000000] [--fighters 5000]
+
+Runs in a scratch schema (dropped afterwards) on DATABASE_URL: migrates to
+version 2 (the TEXT-dated schema), loads fights with ISO dates plus a share
+of empty and malformed ones, times the date-range, weight-class and
+per-fighter queries, then applies the remaining migrations one at a time,
+reporting each step's duration and the table size, and re-times the queries.
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.db import get_conn  # noqa: E402
+from database.migrations import migrate, MIGRATIONS  # noqa: E402
+
+WEIGHT_CLASSES = ['Flyweight', 'Bantamweight', 'Featherweight', 'Lightweight', 'Welterweight',
+                  'Middleweight', 'Light Heavyweight', 'Heavyweight']
+
+QUERIES = {
+    'date range': ("SELECT COUNT(*) FROM fights WHERE Date >= %s AND Date < %s",
+                   ('2019-01-01', '2019-02-01')),
+    'weight class': ("SELECT Date, RedFighter, BlueFighter FROM fights WHERE WeightClass = %s "
+                     "ORDER BY Date DESC LIMIT 50", ('Heavyweight',)),
+    'fighter': ("SELECT Date, Winner FROM fights WHERE RedFighter = %s OR BlueFighter = %s "
+                "ORDER BY Date DESC", ('Fighter 42', 'Fighter 42')),
+}
+
+
+def load(cursor, fights, fighters, rng):
+    names = [f"Fighter {i}" for i in range(fighters)]
+    cursor.execute("INSERT INTO fighters (name, last_scraped) SELECT unnest(%s::text[]), %s",
+                   (names, '2024-05-01T12:00:00'))
+    rows = []
+    for _ in range(fights):
+        red, blue = rng.sample(names, 2)
+        roll = rng.random()
+        if roll < 0.002:
+            date = ''
+        elif roll < 0.003:
+            date = 'TBD'
+        else:
+            date = f"{rng.randint(1994, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        rows.append(f"{red}\t{blue}\t{date}\t{rng.choice(['Red', 'Blue', 'Draw'])}\t"
+                    f"{rng.choice(WEIGHT_CLASSES)}\t{rng.choice(['KO/TKO', 'SUB', 'U-DEC'])}\n")
+    cursor.copy_expert("COPY fights (RedFighter, BlueFighter, Date, Winner, WeightClass, Finish) FROM STDIN",
+                       io.StringIO(''.join(rows)))
+    cursor.execute("ANALYZE fights")
+    cursor.execute("ANALYZE fighters")
+
+
+def time_queries(cursor, repeat=20):
+    timings = {}
+    for label, (sql, params) in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[label] = sorted(samples)[len(samples) // 2]
+    return timings
+
+
+def table_size(cursor):
+    cursor.execute("SELECT pg_size_pretty(pg_total_relation_size('fights'))")
+    return cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fights', type=int, default=1000000)
+    parser.add_argument('--fighters', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    schema = f"bench_migrations_{os.getpid()}"
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        conn.commit()
+        migrate(conn, target=2)
+
+        start = time.perf_counter()
+        load(cursor, args.fights, args.fighters, random.Random(args.seed))
+        conn.commit()
+        print(f"\nLoaded {args.fights} fights in {time.perf_counter() - start:.1f}s, fights is {table_size(cursor)}")
+        before = time_queries(cursor)
+
+        print(f"\n{'migration':<45} {'time':>8} {'fights size':>12}")
+        for version, description, _ in MIGRATIONS[2:]:
+            start = time.perf_counter()
+            migrate(conn, target=version)
+            print(f"{version}: {description:<42} {time.perf_counter() - start:>7.2f}s {table_size(cursor):>12}")
+        cursor.execute("ANALYZE fights")
+        conn.commit()
+        after = time_queries(cursor)
+
+        print(f"\n{'query':<14} {'TEXT dates':>11} {'migrated':>10}")
+        for label in QUERIES:
+            print(f"{label:<14} {before[label]:>9.2f}ms {after[label]:>8.2f}ms")
+    finally:
+        conn.rollback()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
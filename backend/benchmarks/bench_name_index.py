@@ -0,0 +1,130 @@
+"""
+p50 / p99 latency of NameIndex.search at 5k and 50k fighters.
+
+    python benchmarks/bench_name_index.py [--sizes 5000 50000] [--queries 2000]
+
+Builds an index over synthetic fighter names (some accented, some with
+nicknames) and times search() for search-box terms of each kind: exact names,
+3-5 character prefixes, surname substrings, nicknames and one-typo names. The
+`scan` column is the same terms matched the way `name ILIKE '%term%'` did, by a
+linear pass over the lower-cased names, for scale.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.services.name_index import NameIndex  # noqa: E402
+
+FIRST = ['Jon', 'Alex', 'Israel', 'José', 'Conor', 'Khabib', 'Dustin', 'Max', 'Charles', 'Islam',
+         'Kamaru', 'Leon', 'Jan', 'Jiří', 'Sean', 'Merab', 'Ilia', 'Tom', 'Dricus', 'Robert',
+         'Paulo', 'Stipe', 'Francis', 'Ciryl', 'Sergei', 'Magomed', 'Belal', 'Gilbert', 'Beneil', 'Arman',
+         'Brandon', 'Alexandre', 'Deiveson', 'Kai', 'Zhang', 'Valentina', 'Amanda', 'Rose', 'Weili', 'Erin']
+LAST = ['Jones', 'Pereira', 'Adesanya', 'Aldo', 'McGregor', 'Nurmagomedov', 'Poirier', 'Holloway',
+        'Oliveira', 'Makhachev', 'Usman', 'Edwards', 'Błachowicz', 'Procházka', "O'Malley", 'Dvalishvili',
+        'Topuria', 'Aspinall', 'du Plessis', 'Whittaker', 'Costa', 'Miocic', 'Ngannou', 'Gane', 'Pavlovich',
+        'Ankalaev', 'Muhammad', 'Burns', 'Dariush', 'Tsarukyan', 'Moreno', 'Pantoja', 'Figueiredo',
+        'Kara-France', 'Shevchenko', 'Nunes', 'Namajunas', 'Blanchfield', 'Grasso', 'Saint-Pierre']
+NICKNAMES = ['Bones', 'Poatan', 'The Last Stylebender', 'Junior', 'The Notorious', 'The Eagle',
+             'The Diamond', 'Blessed', 'Do Bronx', 'Rocky', 'Suga', 'El Matador', 'Stillknocks',
+             'The Predator', 'Bullet', 'The Machine', 'Bug', 'Thug Rose', 'Magnum', 'Lazy Boy']
+SYLLABLES = ['ka', 'ro', 'mi', 'sha', 'vel', 'dor', 'ni', 'tes', 'gu', 'lan', 'be', 'ya', 'zo', 'rik',
+             'ov', 'ma', 'li', 'ché', 'an', 'sen', 'to', 'ra', 'ki', 'da', 'mo', 'ser', 'vić', 'el', 'ho', 'nu']
+
+
+def fighter_names(n, rng):
+    """n distinct (name, nickname) pairs: the real-name pairs first, then invented surnames."""
+    fighters, seen = [], set()
+    while len(fighters) < n:
+        if len(seen) < len(FIRST) * len(LAST) // 2:
+            last = rng.choice(LAST)
+        else:
+            last = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        name = f"{rng.choice(FIRST)} {last}"
+        if name in seen:
+            continue
+        seen.add(name)
+        fighters.append((name, rng.choice(NICKNAMES) if rng.random() < 0.3 else None))
+    return fighters
+
+
+def typo(word, rng):
+    i = rng.randrange(len(word))
+    kind = rng.choice(['drop', 'swap', 'replace'])
+    if kind == 'drop':
+        return word[:i] + word[i + 1:]
+    if kind == 'swap' and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice('aeiourstn') + word[i + 1:]
+
+
+def queries(fighters, count, rng):
+    kinds = {'exact': [], 'prefix': [], 'substring': [], 'nickname': [], 'typo': []}
+    nicknamed = [f for f in fighters if f[1]]
+    for _ in range(count):
+        name, _ = rng.choice(fighters)
+        kinds['exact'].append(name)
+        kinds['prefix'].append(name[:rng.randint(3, 5)])
+        kinds['substring'].append(name.split()[-1][:rng.randint(3, 6)].lower())
+        kinds['nickname'].append(rng.choice(nicknamed)[1])
+        kinds['typo'].append(typo(name, rng))
+    return kinds
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def scan(lowered, term):
+    term = term.lower()
+    return [n for n in lowered if term in n][:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 50000])
+    parser.add_argument('--queries', type=int, default=2000, help="terms per kind")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        fighters = fighter_names(size, rng)
+        index = NameIndex()
+        start = time.perf_counter()
+        for name, nickname in fighters:
+            index.add(name, nickname)
+        build = time.perf_counter() - start
+        lowered = [name.lower() for name, _ in fighters]
+        print(f"\n{size} fighters, index built in {build * 1000:.0f} ms")
+        print(f"{'terms':>10} {'p50':>9} {'p99':>9} {'scan p50':>9} {'scan p99':>9} {'hits':>6}")
+
+        everything, everything_scan = [], []
+        for kind, terms in queries(fighters, args.queries, rng).items():
+            timings, scan_timings, hits = [], [], 0
+            for term in terms:
+                t0 = time.perf_counter()
+                results = index.search(term)
+                t1 = time.perf_counter()
+                scan(lowered, term)
+                t2 = time.perf_counter()
+                timings.append((t1 - t0) * 1000)
+                scan_timings.append((t2 - t1) * 1000)
+                hits += bool(results)
+            everything += timings
+            everything_scan += scan_timings
+            p50, p99 = percentiles(timings)
+            s50, s99 = percentiles(scan_timings)
+            print(f"{kind:>10} {p50:>7.3f}ms {p99:>7.3f}ms {s50:>7.3f}ms {s99:>7.3f}ms "
+                  f"{hits / len(terms):>6.0%}")
+        p50, p99 = percentiles(everything)
+        s50, s99 = percentiles(everything_scan)
+        print(f"{'all':>10} {p50:>7.3f}ms {p99:>7.3f}ms {s50:>7.3f}ms {s99:>7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Pages/sec and peak memory for each scraper HTML parser backend on a corpus of stored pages.
+
+    python benchmarks/bench_page_parser.py [--corpus DIR] [--fighters 1500] [--repeat 3]
+
+--corpus is a directory of saved ufcstats pages: listing_*.html letter
+listings and detail_*.html fighter pages, e.g. from ufcstats_fixtures.py. If
+it's omitted, a synthetic corpus of --fighters fighters is generated in a
+temporary directory. Each backend runs in its own process, so its peak RSS
+includes the parser's C allocations. The benchmark parses every page with the
+scraper's own extraction functions and exits 1 if any backend's results differ
+from BeautifulSoup's.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import pickle
+import argparse
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def load_corpus(directory):
+    pages = []
+    for kind in ('listing', 'detail'):
+        for path in sorted(glob.glob(os.path.join(directory, f'{kind}_*.html'))):
+            with open(path, encoding='utf-8') as f:
+                pages.append((kind, os.path.basename(path), f.read()))
+    return pages
+
+
+def extract(kind, soup):
+    from app.services.fighter_scraper import parse_fighter_listing, parse_fighter_stats, parse_fight_history
+    if kind == 'listing':
+        return parse_fighter_listing(soup)
+    stats = parse_fighter_stats(soup)
+    return {'stats': stats, 'fights': parse_fight_history(soup, stats.get('weight_class'))}
+
+
+def run_backend(backend, corpus, repeat, results_path):
+    """Child process: time one backend and record its peak RSS growth and extraction results."""
+    from app.services.page_parser import parse_html
+
+    pages = load_corpus(corpus)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results = {}
+    seconds = {'listing': 0.0, 'detail': 0.0}
+    counts = {'listing': 0, 'detail': 0}
+    for _ in range(repeat):
+        for kind, name, text in pages:
+            start = time.perf_counter()
+            results[name] = extract(kind, parse_html(text, backend))
+            seconds[kind] += time.perf_counter() - start
+            counts[kind] += 1
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    with open(results_path, 'wb') as f:
+        pickle.dump(results, f)
+    print(json.dumps({'seconds': seconds, 'counts': counts, 'peak_kb': peak,
+                      'bytes': sum(len(text.encode()) for _, _, text in pages) * repeat}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus')
+    parser.add_argument('--fighters', type=int, default=1500)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    parser.add_argument('--results', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        run_backend(args.backend, args.corpus, args.repeat, args.results)
+        return
+
+    from app.services.page_parser import BACKENDS
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if not corpus:
+            from ufcstats_fixtures import Roster, write_corpus
+            corpus = os.path.join(tmp, 'corpus')
+            write_corpus(corpus, Roster(args.fighters))
+        pages = load_corpus(corpus)
+        listings = sum(1 for kind, _, _ in pages if kind == 'listing')
+        size = sum(len(text.encode()) for _, _, text in pages) / 1024 / 1024
+        print(f"Corpus: {listings} listings, {len(pages) - listings} detail pages, {size:.1f} MB (x{args.repeat})")
+
+        print(f"\n{'backend':<8} {'listing/s':>10} {'detail/s':>10} {'pages/s':>9} {'MB/s':>7} {'peak RSS':>10}")
+        outputs = {}
+        for backend in reversed(BACKENDS):   # bs4 first: it is the reference
+            path = os.path.join(tmp, f'{backend}.pickle')
+            out = subprocess.run([sys.executable, __file__, '--backend', backend, '--corpus', corpus,
+                                  '--repeat', str(args.repeat), '--results', path],
+                                 check=True, capture_output=True, text=True)
+            report = json.loads(out.stdout.strip().splitlines()[-1])
+            with open(path, 'rb') as f:
+                outputs[backend] = pickle.load(f)
+            secs, counts = report['seconds'], report['counts']
+            total = sum(secs.values())
+            rate = {kind: counts[kind] / secs[kind] if secs[kind] else 0.0 for kind in secs}
+            print(f"{backend:<8} {rate['listing']:>10.1f} {rate['detail']:>10.1f} "
+                  f"{sum(counts.values()) / total:>9.1f} {report['bytes'] / total / 1024 / 1024:>7.1f} "
+                  f"{report['peak_kb'] / 1024:>8.1f}MB")
+
+    reference = outputs['bs4']
+    ok = True
+    for backend, results in outputs.items():
+        differing = [name for name in reference if results.get(name) != reference[name]]
+        if differing:
+            ok = False
+            print(f"{backend}: {len(differing)} pages extract differently from bs4, e.g. {differing[0]}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
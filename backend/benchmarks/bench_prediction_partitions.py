@@ -0,0 +1,141 @@
+"""
+Recent-window prediction queries on the plain vs the monthly-partitioned predictions table.
+
+    python benchmarks/bench_prediction_partitions.py [--predictions 2000000] [--months 36] [--retention 12]
+
+Runs in a scratch schema (dropped afterwards) on DATABASE_URL: migrates to
+version 6, logs predictions spread evenly over the last --months months (half
+of them resolved) and times the queries /prediction_history still runs
+against predictions, plus a last-30-days count. It then applies migration 7,
+times them again and counts the partitions each one actually scanned, then
+rolls up and drops the months past --retention and times them once more. Exits 1 if
+prediction_stats no longer matches a scan of predictions + prediction_daily.
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.db import get_conn  # noqa: E402
+from database.migrations import migrate  # noqa: E402
+from database.prediction_partitions import apply_retention  # noqa: E402
+from database.prediction_stats import check  # noqa: E402
+
+QUERIES = {
+    'recent 30': """SELECT AVG(CASE WHEN correct = 1 THEN 1.0 ELSE 0.0 END)
+                    FROM (SELECT correct FROM predictions WHERE actual_winner IS NOT NULL
+                          ORDER BY timestamp DESC LIMIT 30) recent""",
+    'recent 10': """SELECT red_fighter, blue_fighter, predicted_winner, actual_winner, correct, confidence
+                    FROM predictions WHERE actual_winner IS NOT NULL
+                    ORDER BY timestamp DESC LIMIT 10""",
+    'last 30 days': """SELECT COUNT(*), AVG(confidence) FROM predictions
+                       WHERE timestamp >= LOCALTIMESTAMP - interval '30 days'""",
+}
+
+LOAD_SQL = """
+    INSERT INTO predictions (red_fighter, blue_fighter, predicted_winner, actual_winner,
+                             correct, confidence, timestamp, weight_class)
+    SELECT 'Fighter ' || (g %% 5000), 'Fighter ' || ((g * 7) %% 5000), 'Fighter ' || (g %% 5000),
+           CASE WHEN g %% 2 = 0 THEN 'Fighter ' || (g %% 5000) END,
+           CASE WHEN g %% 2 = 0 THEN (g %% 3 > 0)::int END,
+           0.5 + (g %% 50) / 100.0,
+           LOCALTIMESTAMP - make_interval(months => %(months)s) * (1 - g::float8 / %(n)s),
+           CASE WHEN g %% 2 = 0 THEN (ARRAY['Lightweight', 'Welterweight', 'Heavyweight'])[g %% 3 + 1] END
+    FROM generate_series(1, %(n)s) g
+"""
+
+
+def time_queries(cursor, repeat=20):
+    timings, scanned = {}, {}
+    for label, sql in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql)
+            cursor.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[label] = sorted(samples)[len(samples) // 2]
+        cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql)
+        scanned[label] = len(_executed_relations(cursor.fetchone()[0][0]['Plan']))
+    return timings, scanned
+
+
+def _executed_relations(plan):
+    """Tables the plan actually read (nodes that ran at least once)."""
+    found = set()
+    if plan.get('Relation Name') and plan.get('Actual Loops', 0) > 0:
+        found.add(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found |= _executed_relations(child)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--predictions', type=int, default=2000000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--retention', type=int, default=12)
+    args = parser.parse_args()
+
+    schema = f"bench_prediction_partitions_{os.getpid()}"
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        conn.commit()
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate(conn, target=6)
+        start = time.perf_counter()
+        cursor.execute(LOAD_SQL, {'n': args.predictions, 'months': args.months})
+        cursor.execute("ANALYZE predictions")
+        conn.commit()
+        print(f"Logged {args.predictions} predictions over {args.months} months "
+              f"in {time.perf_counter() - start:.1f}s")
+        before, _ = time_queries(cursor)
+
+        start = time.perf_counter()
+        migrate(conn, target=7)
+        print(f"migration 7: {time.perf_counter() - start:.2f}s")
+        cursor.execute("ANALYZE predictions")
+        conn.commit()
+        after, after_scanned = time_queries(cursor)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            retired = apply_retention(conn, months=args.retention, mode='drop')
+        cursor.execute("SELECT COUNT(*) FROM predictions")
+        raw = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(total), 0) FROM prediction_daily")
+        daily_rows, rolled_up = cursor.fetchone()
+        print(f"\nretention ({args.retention} months): {len(retired)} partitions rolled up and dropped "
+              f"in {time.perf_counter() - start:.2f}s")
+        print(f"raw predictions left {raw}, rolled up {rolled_up} into {daily_rows} daily rows")
+        cursor.execute("ANALYZE predictions")
+        conn.commit()
+        retained, retained_scanned = time_queries(cursor)
+        partitions = args.months + 4
+        kept = partitions - len(retired)
+
+        # Partitioned timings include planning, which grows with the number of partitions
+        print(f"\n{'query':<13} {'plain':>9} {f'{partitions} partitions':>16} {f'{kept} partitions':>16}")
+        for label in QUERIES:
+            print(f"{label:<13} {before[label]:>7.2f}ms "
+                  f"{after[label]:>6.2f}ms ({after_scanned[label]:>2} read) "
+                  f"{retained[label]:>6.2f}ms ({retained_scanned[label]:>2} read)")
+        ok = check(cursor)
+    finally:
+        conn.rollback()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        cursor.close()
+        conn.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Resolving logged predictions: one UPDATE per prediction versus the set-based resolver.
+
+    python benchmarks/bench_prediction_resolver.py [--predictions 2000000] [--bouts 500000] [--sample 20000]
+
+Runs in a scratch schema (dropped afterwards) on DATABASE_URL, migrated to the
+latest version. Loads --bouts fights over the last three years, except those of
+the last --held-back days, and logs --predictions predictions in timestamp
+order: most of them a few days before one of the bouts (corners in either
+order), the rest for pairs that never fought. Then times
+
+  per-row      a lookup and an UPDATE per prediction, for the first --sample ids
+  full run     resolve() over every prediction
+  rerun        resolve() again with nothing new
+  incremental  resolve() after the held-back fights are loaded
+
+and exits 1 if any prediction's actual_winner differs from the one computed
+here, or prediction_stats no longer matches a scan of predictions.
+"""
+import io
+import os
+import sys
+import time
+import bisect
+import random
+import argparse
+import contextlib
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.db import get_conn  # noqa: E402
+from database.migrations import migrate  # noqa: E402
+from database.prediction_partitions import ensure_partitions  # noqa: E402
+from database.prediction_resolver import resolve, RESOLVE_WINDOW_DAYS  # noqa: E402
+from database.prediction_stats import check  # noqa: E402
+
+WEIGHT_CLASSES = ['Flyweight', 'Bantamweight', 'Featherweight', 'Lightweight', 'Welterweight',
+                  'Middleweight', 'Light Heavyweight', 'Heavyweight']
+
+# What a resolver without the set-based UPDATE does for each prediction
+PER_ROW_LOOKUP = """
+    SELECT CASE Winner WHEN 'Red' THEN RedFighter WHEN 'Blue' THEN BlueFighter ELSE 'Draw' END
+    FROM fights
+    WHERE ((RedFighter = %(red)s AND BlueFighter = %(blue)s) OR (RedFighter = %(blue)s AND BlueFighter = %(red)s))
+      AND Date >= %(day)s AND Date <= %(day)s + %(window)s AND Winner IS NOT NULL
+    ORDER BY Date LIMIT 1
+"""
+
+
+def generate(args, rng):
+    """(fight lines loaded now, fight lines held back, prediction lines, {prediction id: expected winner})."""
+    today = date.today()
+    names = [f"Fighter {i}" for i in range(args.fighters)]
+    bouts, seen = [], set()
+    while len(bouts) < args.bouts:
+        a, b = rng.sample(names, 2)
+        day = today - timedelta(days=rng.randrange(1, 1095))
+        if (min(a, b), max(a, b), day) in seen:
+            continue
+        seen.add((min(a, b), max(a, b), day))
+        bouts.append((a, b, day, rng.choice(['Red', 'Red', 'Blue', 'Blue', 'Draw']), rng.choice(WEIGHT_CLASSES)))
+
+    loaded, held = [], []
+    dates = {}
+    for a, b, day, winner, wc in bouts:
+        (held if (today - day).days <= args.held_back else loaded).append(f"{a}\t{b}\t{day}\t{winner}\t{wc}\n")
+        dates.setdefault((min(a, b), max(a, b)), []).append((day, {'Red': a, 'Blue': b}.get(winner, 'Draw')))
+    for fights in dates.values():
+        fights.sort()
+
+    predictions = []
+    for _ in range(args.predictions):
+        if rng.random() < 0.85:
+            a, b, day = rng.choice(bouts)[:3]
+            if rng.random() < 0.5:
+                a, b = b, a
+            stamp = datetime.combine(day, datetime.min.time()) - timedelta(minutes=rng.randrange(60, 14 * 1440))
+        else:
+            a, b = rng.sample(names, 2)
+            stamp = datetime.combine(today, datetime.min.time()) - timedelta(minutes=rng.randrange(60, 1095 * 1440))
+        predictions.append((stamp, a, b, rng.choice([a, b]), round(rng.uniform(0.5, 1.0), 3)))
+    predictions.sort()
+
+    lines, expected = [], {}
+    for id_, (stamp, a, b, picked, confidence) in enumerate(predictions, start=1):
+        lines.append(f"{id_}\t{a}\t{b}\t{picked}\t{confidence}\t{stamp}\n")
+        fights = dates.get((min(a, b), max(a, b)), [])
+        i = bisect.bisect_left(fights, (stamp.date(),))
+        if i < len(fights) and fights[i][0] <= stamp.date() + timedelta(days=RESOLVE_WINDOW_DAYS):
+            expected[id_] = fights[i][1]
+    return loaded, held, lines, expected
+
+
+def per_row(conn, sample):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, timestamp, red_fighter, blue_fighter, predicted_winner FROM predictions "
+                   "WHERE id <= %s AND actual_winner IS NULL", (sample,))
+    for id_, stamp, red, blue, picked in cursor.fetchall():
+        cursor.execute(PER_ROW_LOOKUP, {'red': red, 'blue': blue, 'day': stamp.date(), 'window': RESOLVE_WINDOW_DAYS})
+        row = cursor.fetchone()
+        if row:
+            cursor.execute("UPDATE predictions SET actual_winner = %s, correct = %s WHERE id = %s AND timestamp = %s",
+                           (row[0], int(picked == row[0]), id_, stamp))
+    conn.rollback()
+    cursor.close()
+
+
+def copy_fights(cursor, lines):
+    cursor.copy_expert("COPY fights (RedFighter, BlueFighter, Date, Winner, WeightClass) FROM STDIN",
+                       io.StringIO(''.join(lines)))
+
+
+def timed(label, rows, fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        resolved = fn()
+        elapsed = time.perf_counter() - start
+    print(f"{label:<12} {rows:>9} {elapsed:>8.2f} {rows / elapsed:>10.0f} {resolved if resolved is not None else '':>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--predictions', type=int, default=2000000)
+    parser.add_argument('--bouts', type=int, default=500000)
+    parser.add_argument('--fighters', type=int, default=5000)
+    parser.add_argument('--held-back', type=int, default=20, help="days of most recent fights loaded last")
+    parser.add_argument('--sample', type=int, default=20000, help="predictions resolved one at a time")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    loaded, held, lines, expected = generate(args, random.Random(args.seed))
+    schema = f"bench_prediction_resolver_{os.getpid()}"
+    conn = get_conn()
+    cursor = conn.cursor()
+    ok = True
+    try:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        conn.commit()
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate(conn)
+            ensure_partitions(cursor, since=date.today() - timedelta(days=1096))
+        cursor.execute("INSERT INTO fighters (name) SELECT 'Fighter ' || g FROM generate_series(0, %s) g",
+                       (args.fighters - 1,))
+        copy_fights(cursor, loaded)
+        cursor.copy_expert("COPY predictions (id, red_fighter, blue_fighter, predicted_winner, confidence, timestamp) "
+                           "FROM STDIN", io.StringIO(''.join(lines)))
+        cursor.execute("SELECT setval(pg_get_serial_sequence('predictions', 'id'), %s)", (len(lines),))
+        cursor.execute("ANALYZE fights")
+        cursor.execute("ANALYZE predictions")
+        conn.commit()
+        print(f"{len(loaded)} fights loaded ({len(held)} held back), {len(lines)} predictions, "
+              f"{len(expected)} resolvable once every fight is in")
+
+        print(f"\n{'run':<12} {'scanned':>9} {'seconds':>8} {'rows/sec':>10} {'resolved':>9}")
+        timed('per-row', min(args.sample, len(lines)), lambda: per_row(conn, args.sample))
+        timed('full run', len(lines), lambda: resolve(conn))
+        cursor.execute("SELECT high_water FROM job_state")
+        mark = cursor.fetchone()[0]
+        conn.commit()
+        timed('rerun', len(lines) - mark, lambda: resolve(conn))
+        copy_fights(cursor, held)
+        conn.commit()
+        timed('incremental', len(lines) - mark, lambda: resolve(conn))
+
+        cursor.execute("SELECT id, actual_winner FROM predictions WHERE actual_winner IS NOT NULL")
+        resolved = dict(cursor.fetchall())
+        conn.commit()
+        if resolved != expected:
+            wrong = sum(1 for k in expected.keys() | resolved.keys() if resolved.get(k) != expected.get(k))
+            print(f"{wrong} predictions resolved differently from the expected results")
+            ok = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = check(cursor) and ok
+    finally:
+        conn.rollback()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        cursor.close()
+        conn.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
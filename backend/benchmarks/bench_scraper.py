@@ -0,0 +1,235 @@
+"""
+End-to-end scraper throughput against a local ufcstats stand-in: fighters/sec, DB rows/sec and per-page latency.
+
+    python benchmarks/bench_scraper.py [--fighters 1500] [--concurrency 8] [--rate 0]
+                                       [--latency 0.02] [--jitter 0.02] [--error-rate 0] [--pad-kb 0]
+
+Starts ufcstats_server.py on a fixture Roster in its own process (so serving
+doesn't compete with the scraper for the GIL), points UFCSTATS_BASE_URL at it
+and runs the real scraper code in a scratch schema (dropped afterwards) on
+DATABASE_URL, migrated to the latest version:
+
+  full        run_fighter_scraper: every listing and detail page, fighters and
+              fight histories inserted into empty tables
+  re-ingest   the same again, so every fight history goes through the merge
+              with nothing to change
+  incremental run_fighter_scraper(incremental=True): listings only, every
+              fighter skipped as unchanged
+  by name     scrape_fighter_by_name for --lookups fighters, one at a time,
+              each upserted with its history as /get_fighter_stats does
+
+DB rows are the fighter rows plus the fight-history rows handed to the
+database. Page latency is measured around each fetch() the scraper makes, so
+it includes retries of injected errors and any wait on the host rate limit
+(--rate is SCRAPE_HOST_RATE; 0 turns the limit off, production uses 4).
+The page cache is off unless --cache is given. Exits 1 if the stored fighters
+don't match the roster.
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+class Probe:
+    """Times every page fetch and counts the rows each write hands to the database."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = {}
+            self.failed = 0
+            self.fighter_rows = 0
+            self.fight_rows = 0
+
+    def wrap_fetch(self, fetch, url_class):
+        def timed(url, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fetch(url, *args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.latencies.setdefault(url_class(url), []).append(elapsed)
+        return timed
+
+    def wrap_write(self, write):
+        def counted(cursor, fighters):
+            after_commit = write(cursor, fighters)
+            with self._lock:
+                self.fighter_rows += len(fighters)
+                self.fight_rows += sum(len(f['fights']) for f in fighters if f.get('fights'))
+            return after_commit
+        return counted
+
+
+def report(name, seconds, fighters, probe):
+    rows = probe.fighter_rows + probe.fight_rows
+    pages = sum(len(v) for v in probe.latencies.values())
+    print(f"{name:<12} {seconds:>7.2f}s {fighters / seconds:>10.1f} {rows / seconds:>9.0f} {pages / seconds:>8.1f}"
+          f"   ({probe.fighter_rows} fighters + {probe.fight_rows} fight rows)")
+    for kind, values in sorted(probe.latencies.items()):
+        print(f"{'':<12}   {kind:<8} {len(values):>6} pages  p50 {percentile(values, 50) * 1000:>7.1f}ms  "
+              f"p99 {percentile(values, 99) * 1000:>7.1f}ms  max {max(values) * 1000:>7.1f}ms")
+    if probe.failed:
+        print(f"{'':<12}   {probe.failed} pages failed after retries")
+
+
+def check(conn, roster):
+    """Mismatches between the stored fighters and the roster's listing records."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, wins, losses, draws FROM fighters")
+    stored = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+    cursor.execute("SELECT count(*) FROM fights")
+    fights = cursor.fetchone()[0]
+    cursor.close()
+    problems = []
+    for f in roster.fighters:
+        name = roster.name(f)
+        if name not in stored:
+            problems.append(f"{name} missing")
+        elif stored[name] != tuple(f['record']):
+            problems.append(f"{name} stored as {stored[name]}, listed as {tuple(f['record'])}")
+    if not fights:
+        problems.append("no fight history stored")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fighters', type=int, default=1500)
+    parser.add_argument('--fights', type=int, default=12, help='fights per fighter')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--concurrency', type=int, default=8, help='SCRAPE_CONCURRENCY')
+    parser.add_argument('--rate', type=float, default=0, help='SCRAPE_HOST_RATE (0 = unlimited)')
+    parser.add_argument('--parser', choices=['lxml', 'bs4'], help='SCRAPE_PARSER')
+    parser.add_argument('--latency', type=float, default=0.02, help='server seconds per response')
+    parser.add_argument('--jitter', type=float, default=0.02, help='up to this many more seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 503 responses')
+    parser.add_argument('--pad-kb', type=int, default=0, help='pad every page to at least this many KB')
+    parser.add_argument('--lookups', type=int, default=200, help='scrape_fighter_by_name calls')
+    parser.add_argument('--cache', action='store_true', help='use a fresh page cache instead of none')
+    args = parser.parse_args()
+
+    from ufcstats_fixtures import Roster
+
+    # The same seed gives the server the same roster; this copy is for checking the results
+    roster = Roster(args.fighters, fights_per_fighter=args.fights, seed=args.seed)
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'ufcstats_server.py'),
+                               '--port', '0', '--fighters', str(args.fighters), '--fights', str(args.fights),
+                               '--seed', str(args.seed), '--latency', str(args.latency),
+                               '--jitter', str(args.jitter), '--error-rate', str(args.error_rate),
+                               '--pad-kb', str(args.pad_kb)],
+                              stdout=subprocess.PIPE, text=True)
+    server_url = server.stdout.readline().split()[-1]
+    schema = f"bench_scraper_{os.getpid()}"
+    cache_dir = tempfile.TemporaryDirectory() if args.cache else None
+
+    # The scraper modules read these at import; PGOPTIONS puts every pooled connection in the scratch schema
+    os.environ.update(UFCSTATS_BASE_URL=server_url, SCRAPE_CONCURRENCY=str(args.concurrency),
+                      SCRAPE_HOST_RATE=str(args.rate), SCRAPE_CACHE_DIR=cache_dir.name if cache_dir else '',
+                      PGOPTIONS=f'-c search_path={schema}')
+    if args.parser:
+        os.environ['SCRAPE_PARSER'] = args.parser
+
+    from app.db import get_conn, connection
+    from app.services import fighter_scraper
+    from app.services.page_cache import url_class
+    from database.migrations import migrate
+
+    conn = get_conn()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    ok = False
+    try:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        conn.autocommit = False
+        migrate(conn)
+
+        probe = Probe()
+        fighter_scraper.fetch = probe.wrap_fetch(fighter_scraper.fetch, url_class)
+        fighter_scraper.upsert_scraped_fighters = probe.wrap_write(fighter_scraper.upsert_scraped_fighters)
+
+        print(f"Server: {server_url}, {args.fighters} fighters, ~{args.fights} fights each, "
+              f"latency {args.latency}+{args.jitter}s, {args.error_rate:.1%} errors; "
+              f"concurrency {args.concurrency}, host rate {args.rate or 'unlimited'}, "
+              f"parser {os.environ.get('SCRAPE_PARSER', 'lxml')}, cache {'on' if cache_dir else 'off'}")
+        print(f"\n{'phase':<12} {'seconds':>8} {'fighters/s':>10} {'DB rows/s':>9} {'pages/s':>8}")
+
+        problems = []
+        for name, incremental in (('full', False), ('re-ingest', False), ('incremental', True)):
+            probe.reset()
+            start = time.perf_counter()
+            summary = fighter_scraper.run_fighter_scraper(incremental=incremental)
+            report(name, time.perf_counter() - start, summary['listed'], probe)
+            if name == 'full':
+                problems = check(conn, roster)
+
+        probe.reset()
+        names = [roster.name(f) for f in random.Random(args.seed).sample(roster.fighters,
+                                                                         min(args.lookups, len(roster.fighters)))]
+        found = 0
+        start = time.perf_counter()
+        for name in names:
+            fresh = fighter_scraper.scrape_fighter_by_name(name)
+            if fresh is None:
+                problems.append(f"scrape_fighter_by_name({name!r}) found nothing")
+                continue
+            found += 1
+            with connection() as pooled:
+                cur = pooled.cursor()
+                publish = fighter_scraper.upsert_scraped_fighters(cur, [fresh])
+                pooled.commit()
+                cur.close()
+            publish()
+        report('by name', time.perf_counter() - start, found, probe)
+
+        server.send_signal(signal.SIGINT)
+        served = json.loads(server.communicate(timeout=30)[0].strip().splitlines()[-1])
+        print("\nServed: " + ', '.join(f"{kind} {c['requests']} ({c['errors']} errors, {c['not_modified']} 304s, "
+                                        f"{c['bytes'] / 1024 / 1024:.1f} MB)" for kind, c in sorted(served.items())))
+        for problem in problems[:10]:
+            print(f"MISMATCH: {problem}")
+        if len(problems) > 10:
+            print(f"... and {len(problems) - 10} more")
+        ok = not problems
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.close()
+        if server.poll() is None:
+            server.kill()
+        if cache_dir:
+            cache_dir.cleanup()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
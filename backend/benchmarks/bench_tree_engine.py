@@ -0,0 +1,83 @@
+"""
+Flattened TreeEngine vs the calibrated XGBoost classifier it was exported from.
+
+    python benchmarks/bench_tree_engine.py [--model models/ufc_predictor_v4.pkl] [--rows 20000]
+
+First checks the engine against pipe.predict_proba on random rows (with NaNs) and
+exits with code 1 if any probability differs by more than --atol (default 0, i.e.
+bit-for-bit). Then reports rows/sec from batch 1 up to 1024: /predict and
+/predict_batch (at most MAX_BATCH_BOUTS = 50 bouts) sit at the small end, well
+below the crossover where XGBoost's own predictor catches up.
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import joblib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml.inference import FEATURES, FastPredictor
+from ml.tree_engine import TreeEngine
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'ufc_predictor_v4.pkl')
+BATCH_SIZES = (1, 10, 50, 128, 256, 512, 1024)
+
+
+def raw_rows(n, rng):
+    X = rng.normal(0, 2, size=(n, len(FEATURES)))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def rows_per_sec(fn, X, batch, min_seconds=1.0):
+    batches = [X[i:i + batch] for i in range(0, X.shape[0] - batch + 1, batch)]
+    fn(batches[0])
+    done, start = 0, time.perf_counter()
+    while True:
+        for b in batches:
+            fn(b)
+            done += b.shape[0]
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--atol', type=float, default=0.0)
+    args = parser.parse_args()
+
+    pipe = joblib.load(args.model)
+    rng = np.random.default_rng(7)
+
+    start = time.perf_counter()
+    engine = TreeEngine.from_pipeline(pipe)
+    print(f"Export: {engine.meta['n_models']} folds, {engine.meta['n_trees']} trees, "
+          f"{engine.meta['n_nodes']} nodes, depth {engine.meta['max_depth']} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    X = raw_rows(args.rows, rng)
+    expected = pipe.predict_proba(pd.DataFrame(X, columns=FEATURES))
+    got = FastPredictor(pipe, classifier=engine).predict_proba(X)
+    diff = np.abs(expected - got)
+    print(f"Parity: max |dp| = {diff.max():.3g}, identical rows = {np.mean(diff.max(axis=1) == 0):.2%}")
+    if diff.max() > args.atol:
+        print("FAIL: engine diverges from pipe.predict_proba")
+        sys.exit(1)
+
+    # Both sides get preprocessed input, so this isolates the tree ensemble + calibration
+    Xs = FastPredictor(pipe).transform(raw_rows(max(BATCH_SIZES) * 4, rng))
+    calibrated = pipe.named_steps['classifier']
+    print(f"{'batch':>6} {'sklearn rows/s':>16} {'engine rows/s':>15} {'speedup':>8}")
+    for batch in BATCH_SIZES:
+        base = rows_per_sec(calibrated.predict_proba, Xs, batch)
+        fast = rows_per_sec(engine.predict_proba, Xs, batch)
+        print(f"{batch:>6} {base:>16,.0f} {fast:>15,.0f} {fast / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
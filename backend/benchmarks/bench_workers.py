@@ -0,0 +1,129 @@
+"""
+Per-worker memory and time-to-first-request for gunicorn with and without preload_app.
+
+    python benchmarks/bench_workers.py [--workers 2] [--model models/ufc_predictor_v4.pkl]
+
+Starts `gunicorn -c gunicorn.conf.py run:app` once with GUNICORN_PRELOAD=0 and
+once with GUNICORN_PRELOAD=1, times how long it takes until /stats first answers
+and until every worker has answered it, serves some predictions, then reads
+/proc/<pid>/smaps_rollup for the master and each worker. PSS splits shared pages between the processes
+mapping them, so the PSS total is the real footprint of the whole server.
+Needs the same DATABASE_URL / JWT_SECRET_KEY environment as the app.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+import urllib.parse
+import urllib.request
+import urllib.error
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MODEL_PATH = os.path.join(BACKEND_DIR, 'models', 'ufc_predictor_v4.pkl')
+BOUT = {'red_fighter': 'Jon Jones', 'blue_fighter': 'Alex Pereira',
+        'red_odds': '-150', 'blue_odds': '130', 'number_of_rounds': '5', 'title_bout': 'true'}
+
+
+def http(url, form=None, timeout=5):
+    data = urllib.parse.urlencode(form).encode() if form is not None else None
+    req = urllib.request.Request(url, data=data)
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.status, resp.read()
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def memory_kb(pid):
+    """Rss/Pss/Uss in kB from smaps_rollup (Uss = private clean + private dirty)."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def run_server(preload, args):
+    env = dict(os.environ,
+               GUNICORN_PRELOAD='1' if preload else '0',
+               GUNICORN_WORKERS=str(args.workers),
+               GUNICORN_BIND=f'127.0.0.1:{args.port}',
+               MODEL_PATH=os.path.abspath(args.model))
+    base = f'http://127.0.0.1:{args.port}'
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                            cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first = None
+        while first is None:
+            if proc.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {proc.returncode}")
+            if time.perf_counter() - start > args.startup_timeout:
+                raise RuntimeError("gunicorn did not answer in time")
+            try:
+                http(base + '/stats', timeout=1)
+                first = time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.05)
+
+        # Poll until every worker has answered. Without preload a worker that is
+        # still importing the app doesn't accept, so the others take the requests.
+        served = set()
+        while True:
+            workers = set(worker_pids(proc.pid))
+            if len(workers) == args.workers and workers <= served:
+                break
+            if time.perf_counter() - start > args.startup_timeout:
+                raise RuntimeError(f"only workers {sorted(served)} of {sorted(workers)} answered")
+            served.add(json.loads(http(base + '/stats')[1])['pid'])
+        all_ready = time.perf_counter() - start
+
+        for _ in range(args.requests):
+            http(base + '/predict', BOUT)
+
+        return {
+            'first_request_s': first,
+            'all_workers_s': all_ready,
+            'master': memory_kb(proc.pid),
+            'workers': [memory_kb(pid) for pid in sorted(workers)],
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--startup-timeout', type=float, default=180)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'first req':>10} {'all ready':>10} {'worker RSS':>11} "
+          f"{'worker PSS':>11} {'worker USS':>11} {'total PSS':>10}")
+    for preload in (False, True):
+        r = run_server(preload, args)
+        n = len(r['workers'])
+        avg = {k: sum(w[k] for w in r['workers']) / n / 1024 for k in ('rss', 'pss', 'uss')}
+        total_pss = (r['master']['pss'] + sum(w['pss'] for w in r['workers'])) / 1024
+        print(f"{'preload' if preload else 'per-worker':>10} {r['first_request_s']:>9.2f}s "
+              f"{r['all_workers_s']:>9.2f}s {avg['rss']:>9.1f}MB {avg['pss']:>9.1f}MB "
+              f"{avg['uss']:>9.1f}MB {total_pss:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
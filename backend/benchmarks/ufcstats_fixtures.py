@@ -0,0 +1,259 @@
+"""
+Synthetic ufcstats.com pages for the scraper benchmarks.
+
+A Roster is a seeded set of fighters and the bouts between them. It renders
+letter listings, search results and fighter detail pages with the markup the
+scraper reads (tables, classes, &nbsp; padding, comments, scripts, empty
+rows), so every bout appears on both fighters' pages.
+
+    python benchmarks/ufcstats_fixtures.py --out DIR [--fighters 4000] [--seed 7]
+
+writes listing_<letter>.html for every letter and detail_<id>.html for every
+fighter to DIR, a corpus for bench_page_parser.py.
+"""
+import os
+import sys
+import random
+import string
+import argparse
+from datetime import date, timedelta
+from html import escape
+
+FIRST = ['Jon', 'Jose', 'Israel', 'Alex', 'Islam', 'Charles', 'Max', 'Dustin', 'Amanda', 'Valentina',
+         'Khabib', 'Conor', 'Stipe', 'Francis', 'Tom', 'Sean', 'Leon', 'Belal', 'Kamaru', 'Robert',
+         'Petr', 'Merab', 'Aljamain', 'Henry', 'Deiveson', 'Brandon', 'Zhang', 'Rose', 'Ciryl', 'Derrick']
+LAST = ['Jones', 'Aldo', 'Adesanya', 'Pereira', 'Makhachev', 'Oliveira', 'Holloway', 'Poirier', 'Nunes',
+        'Shevchenko', 'Nurmagomedov', 'McGregor', 'Miocic', 'Ngannou', 'Aspinall', "O'Malley", 'Edwards',
+        'Muhammad', 'Usman', 'Whittaker', 'Yan', 'Dvalishvili', 'Sterling', 'Cejudo', 'Figueiredo',
+        'Moreno', 'Weili', 'Namajunas', 'Gane', 'Lewis', 'Silva', 'Santos', 'Smith', 'Johnson', 'Brown']
+NICKNAMES = ['', '', 'Bones', 'The Last Emperor', 'Stylebender', 'Poatan', 'Do Bronx', 'Blessed',
+             'The Diamond', 'Bullet', 'The Eagle', 'Notorious', 'Rocky', 'Sugar', 'Chaos & Order']
+STANCES = ['Orthodox', 'Orthodox', 'Orthodox', 'Southpaw', 'Switch', '']
+WEIGHTS = [(125, 'Flyweight'), (135, 'Bantamweight'), (145, 'Featherweight'), (155, 'Lightweight'),
+           (170, 'Welterweight'), (185, 'Middleweight'), (205, 'Light Heavyweight'), (265, 'Heavyweight')]
+METHODS = [('KO/TKO', 'Punches'), ('KO/TKO', 'Kick'), ('SUB', 'Rear Naked Choke'), ('SUB', 'Guillotine Choke'),
+           ('U-DEC', ''), ('S-DEC', ''), ('M-DEC', '')]
+
+LISTING_COLUMNS = ['First', 'Last', 'Nickname', 'Ht.', 'Wt.', 'Reach', 'Stance', 'W', 'L', 'D', 'Belt']
+
+_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>{title}</title>
+  <link rel="stylesheet" href="/css/main.css">
+  <script type="text/javascript">window.__stats = {{ "page": "{title}" }};</script>
+</head>
+<body class="b-page">
+  <!-- header -->
+  <header class="b-header"><div class="l-page__container"><a class="b-logo" href="/">UFC STATS</a></div></header>
+  <section class="b-statistics__sub-entry">
+"""
+_FOOT = """  </section>
+  <footer class="b-footer"><p>&copy; ufcstats.com</p></footer>
+  <script src="/js/main.js"></script>
+</body>
+</html>
+"""
+
+
+class Roster:
+    def __init__(self, fighters=4000, fights_per_fighter=12, seed=7, base_url='http://www.ufcstats.com'):
+        rng = random.Random(seed)
+        self.base_url = base_url.rstrip('/')
+        self.fighters = []
+        uses = {}
+        while len(self.fighters) < fighters:
+            first, last = rng.choice(FIRST), rng.choice(LAST)
+            # Full names stay unique (the scraper keys fighters by name): repeats get a numbered surname
+            n = uses[first, last] = uses.get((first, last), 0) + 1
+            last_name = last if n == 1 else f"{last}{n}"
+            lbs, _ = rng.choice(WEIGHTS)
+            self.fighters.append({
+                'id': '%016x' % rng.getrandbits(64),
+                'first': first,
+                'last': last_name,
+                'nickname': rng.choice(NICKNAMES),
+                'height': rng.randrange(62, 80),
+                'lbs': lbs,
+                'reach': rng.choice([None] + list(range(62, 84))),
+                'stance': rng.choice(STANCES),
+                'dob': date(1975, 1, 1) + timedelta(days=rng.randrange(9000)),
+                'slpm': round(rng.uniform(0.5, 7.5), 2),
+                'acc': rng.randrange(25, 65),
+                'td': round(rng.uniform(0, 5), 2),
+                'sub': round(rng.uniform(0, 2), 1),
+                'bouts': [],
+            })
+        self.by_id = {f['id']: f for f in self.fighters}
+
+        # Each bout is listed on both fighters' pages
+        self.bouts = []
+        pairs = set()
+        for _ in range(fighters * fights_per_fighter // 2):
+            a, b = rng.sample(self.fighters, 2)
+            day = date(2000, 1, 1) + timedelta(days=rng.randrange(9000))
+            if (a['id'], b['id'], day) in pairs:
+                continue
+            pairs.add((a['id'], b['id'], day))
+            method, detail = rng.choice(METHODS)
+            outcome = rng.choices(['win', 'loss', 'draw', 'nc'], [46, 46, 4, 4])[0]
+            lbs, wc = rng.choice(WEIGHTS)
+            bout = {'a': a, 'b': b, 'date': day, 'outcome': outcome, 'method': method, 'detail': detail,
+                    'round': rng.randrange(1, 6), 'time': f"{rng.randrange(0, 5)}:{rng.randrange(60):02d}",
+                    'event': f"UFC {rng.randrange(1, 320)}: {a['last']} vs. {b['last']}", 'weight_class': wc}
+            self.bouts.append(bout)
+            a['bouts'].append(bout)
+            b['bouts'].append(bout)
+        for f in self.fighters:
+            f['bouts'].sort(key=lambda bout: bout['date'], reverse=True)
+            f['record'] = [0, 0, 0]
+            for bout in f['bouts']:
+                result = _result(bout, f)
+                if result in ('win', 'loss', 'draw'):
+                    f['record'][['win', 'loss', 'draw'].index(result)] += 1
+
+    def name(self, fighter):
+        return f"{fighter['first']} {fighter['last']}"
+
+    def detail_url(self, fighter):
+        return f"{self.base_url}/fighter-details/{fighter['id']}"
+
+    def letter(self, letter):
+        """Fighters whose last name starts with `letter`, as the char= listing orders them."""
+        return sorted((f for f in self.fighters if f['last'].lower().startswith(letter.lower())),
+                      key=lambda f: (f['last'], f['first']))
+
+    def search(self, query):
+        query = query.lower()
+        return [f for f in self.fighters if query in f['first'].lower() or query in f['last'].lower()]
+
+    # ── pages ────────────────────────────────────────────────────────────────
+
+    def listing_page(self, fighters, title='Fighters'):
+        """A letter listing or search results page (they share the table markup)."""
+        out = [_HEAD.format(title=title),
+               '    <table class="b-statistics__table">\n      <thead class="b-statistics__table-caption">\n'
+               '        <tr class="b-statistics__table-row">']
+        out += [f'<th class="b-statistics__table-col">{c}</th>' for c in LISTING_COLUMNS]
+        out.append('</tr>\n      </thead>\n      <tbody>\n'
+                   '        <tr class="b-statistics__table-row">'
+                   '<td class="b-statistics__table-col b-statistics__table-col_type_empty"></td></tr>\n')
+        for f in fighters:
+            link = self.detail_url(f)
+            reach = f'{f["reach"]}.0"' if f['reach'] else '--'
+            out.append(
+                '        <tr class="b-statistics__table-row">\n'
+                f'          <td class="b-statistics__table-col">\n            <a href="{link}" class="b-link b-link_style_black">{escape(f["first"])}</a>\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            <a href="{link}" class="b-link b-link_style_black">{escape(f["last"])}</a>\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            <a href="{link}" class="b-link b-link_style_black">{escape(f["nickname"])}</a>\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            {f["height"] // 12}\' {f["height"] % 12}"\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            {f["lbs"]} lbs.\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            {reach}\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            {f["stance"]}\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            {f["record"][0]}\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            {f["record"][1]}\n          </td>\n'
+                f'          <td class="b-statistics__table-col">\n            {f["record"][2]}\n          </td>\n'
+                '          <td class="b-statistics__table-col">\n            <!-- belt -->\n          </td>\n'
+                '        </tr>\n')
+        out.append('      </tbody>\n    </table>\n')
+        out.append(_FOOT)
+        return ''.join(out)
+
+    def detail_page(self, fighter):
+        name = self.name(fighter)
+        out = [_HEAD.format(title=escape(name)),
+               f'    <h2 class="b-content__title"><span class="b-content__title-highlight">{escape(name)}</span>'
+               f'<span class="b-content__title-record">Record: {"-".join(map(str, fighter["record"]))}</span></h2>\n'
+               f'    <p class="b-content__Nickname">{escape(fighter["nickname"])}</p>\n'
+               '    <div class="b-list__info-box b-list__info-box_style_small-width">\n      <ul class="b-list__box-list">\n']
+        reach = f'{fighter["reach"]}"' if fighter['reach'] else '--'
+        boxes = [('Height:', f'{fighter["height"] // 12}\' {fighter["height"] % 12}"'),
+                 ('Weight:', f'{fighter["lbs"]} lbs.'), ('Reach:', reach), ('STANCE:', fighter['stance']),
+                 ('DOB:', fighter['dob'].strftime('%b %d, %Y'))]
+        career = [('SLpM:', fighter['slpm']), ('Str. Acc.:', f'{fighter["acc"]}%'), ('SApM:', '3.10'),
+                  ('Str. Def:', '55%'), ('', '&nbsp;'), ('TD Avg.:', fighter['td']), ('TD Acc.:', '40%'),
+                  ('TD Def.:', '60%'), ('Sub. Avg.:', fighter['sub'])]
+        for label, value in boxes:
+            out.append('        <li class="b-list__box-list-item b-list__box-list-item_type_block">\n'
+                       f'          <i class="b-list__box-item-title b-list__box-item-title_type_width">{label}</i>\n'
+                       f'          {value}\n        </li>\n')
+        out.append('      </ul>\n    </div>\n    <div class="b-list__info-box b-list__info-box_style_middle-width">\n'
+                   '      <ul class="b-list__box-list b-list__box-list_margin-top">\n')
+        for label, value in career:
+            out.append('        <li class="b-list__box-list-item b-list__box-list-item_type_block">\n'
+                       '          <i class="b-list__box-item-title b-list__box-item-title_font_lowercase '
+                       f'b-list__box-item-title_type_width">{label}</i>\n          {value}\n        </li>\n')
+        out.append('      </ul>\n    </div>\n')
+        out.append('    <table class="b-fight-details__table b-fight-details__table_style_margin-top '
+                   'b-fight-details__table_type_event-details js-fight-table">\n'
+                   '      <thead class="b-fight-details__table-head">\n        <tr class="b-fight-details__table-row">')
+        out += [f'<th class="b-fight-details__table-col">{c}</th>'
+                for c in ['W/L', 'Fighter', 'Kd', 'Str', 'Td', 'Sub', 'Event', 'Method', 'Round', 'Time']]
+        out.append('</tr>\n      </thead>\n      <tbody class="b-fight-details__table-body">\n'
+                   '        <tr class="b-fight-details__table-row">'
+                   '<td class="b-fight-details__table-col b-fight-details__table-col_style_empty" colspan="10"></td></tr>\n')
+        for bout in fighter['bouts']:
+            opponent = bout['b'] if bout['a'] is fighter else bout['a']
+            result = _result(bout, fighter)
+            out.append(
+                '        <tr class="b-fight-details__table-row b-fight-details__table-row__hover js-fight-details-click" '
+                f'data-link="{self.base_url}/fight-details/{fighter["id"][:8]}{opponent["id"][:8]}">\n'
+                '          <td class="b-fight-details__table-col">\n            <p class="b-fight-details__table-text">\n'
+                f'              <a href="#" class="b-flag b-flag_style_{_FLAG[result]}"><i class="b-flag__inner">'
+                f'<i class="b-flag__text">{result}</i></i></a>\n            </p>\n          </td>\n'
+                '          <td class="b-fight-details__table-col l-page_align_left">\n'
+                f'            <p class="b-fight-details__table-text"><a href="{self.detail_url(fighter)}" class="b-link b-link_style_black">{escape(name)}</a></p>\n'
+                f'            <p class="b-fight-details__table-text"><a href="{self.detail_url(opponent)}" class="b-link b-link_style_black">{escape(self.name(opponent))}</a></p>\n'
+                '          </td>\n')
+            for _ in range(4):
+                out.append('          <td class="b-fight-details__table-col"><p class="b-fight-details__table-text">0</p>'
+                           '<p class="b-fight-details__table-text">0</p></td>\n')
+            out.append(
+                '          <td class="b-fight-details__table-col l-page_align_left">\n'
+                f'            <p class="b-fight-details__table-text"><a href="#" class="b-link b-link_style_black">{escape(bout["event"])}</a></p>\n'
+                f'            <p class="b-fight-details__table-text">{bout["date"].strftime("%b. %d, %Y")}</p>\n          </td>\n'
+                '          <td class="b-fight-details__table-col l-page_align_left">\n'
+                f'            <p class="b-fight-details__table-text">{bout["method"]}</p>\n'
+                f'            <p class="b-fight-details__table-text">{bout["detail"]}</p>\n          </td>\n'
+                f'          <td class="b-fight-details__table-col"><p class="b-fight-details__table-text">{bout["round"]}</p></td>\n'
+                f'          <td class="b-fight-details__table-col"><p class="b-fight-details__table-text">{bout["time"]}</p></td>\n'
+                '        </tr>\n')
+        out.append('      </tbody>\n    </table>\n')
+        out.append(_FOOT)
+        return ''.join(out)
+
+
+_FLAG = {'win': 'green', 'loss': 'red', 'draw': 'gray', 'nc': 'gray'}
+
+
+def _result(bout, fighter):
+    """The bout's result from `fighter`'s side."""
+    if bout['outcome'] in ('draw', 'nc') or bout['a'] is fighter:
+        return bout['outcome']
+    return {'win': 'loss', 'loss': 'win'}[bout['outcome']]
+
+
+def write_corpus(out, roster):
+    os.makedirs(out, exist_ok=True)
+    for letter in string.ascii_lowercase:
+        with open(os.path.join(out, f'listing_{letter}.html'), 'w') as f:
+            f.write(roster.listing_page(roster.letter(letter), title=f'Fighters: {letter.upper()}'))
+    for fighter in roster.fighters:
+        with open(os.path.join(out, f"detail_{fighter['id']}.html"), 'w') as f:
+            f.write(roster.detail_page(fighter))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--fighters', type=int, default=4000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    write_corpus(args.out, Roster(args.fighters, seed=args.seed))
+    print(f"Wrote {len(string.ascii_lowercase)} listings and {args.fighters} detail pages to {args.out}")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+A local stand-in for ufcstats.com that serves a fixture Roster over HTTP.
+
+    python benchmarks/ufcstats_server.py [--port 8765] [--fighters 4000] [--latency 0.05] [--error-rate 0.01]
+
+Serves the three page types the scraper reads, with the same paths as the
+real site: /statistics/fighters?char=<letter>&page=all,
+/statistics/fighters/search?query=<q> and /fighter-details/<id>. Listings and
+detail pages are rendered up front and every page is served from memory, with
+an ETag so revalidating clients get 304s. Every response is delayed by --latency seconds plus up to
+--jitter more, --error-rate of them are 503s (which the scraper retries), and
+--pad-kb pads every page with a comment to at least that many KB. Point the
+app at it with UFCSTATS_BASE_URL=http://127.0.0.1:<port> (--port 0 picks a
+free one and prints it). On ^C it prints what it served as JSON.
+"""
+import os
+import sys
+import json
+import time
+import string
+import random
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ufcstats_fixtures import Roster  # noqa: E402
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for a whole scrape pool connecting at once
+    request_queue_size = 128
+
+
+class FixtureServer:
+    """Serves `roster` on host:port (0 picks a free port) from a background thread."""
+
+    def __init__(self, roster, latency=0.0, jitter=0.0, error_rate=0.0, pad_kb=0,
+                 host='127.0.0.1', port=0, seed=1):
+        self.roster = roster
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.pad_kb = pad_kb
+        self._rng = random.Random(seed)
+        self._pages = {}
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._httpd = _HTTPServer((host, port), _handler(self))
+        self.url = f"http://{host}:{self._httpd.server_address[1]}"
+        # Listing links must point back here rather than at the real site
+        roster.base_url = self.url
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='ufcstats-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self):
+        """{page class: {'requests', 'errors', 'not_modified', 'bytes'}} served so far."""
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in self._counts.items()}
+
+    def count(self, kind, key, n=1):
+        with self._lock:
+            counts = self._counts.setdefault(kind, {'requests': 0, 'errors': 0, 'not_modified': 0, 'bytes': 0})
+            counts[key] += n
+
+    def prerender(self):
+        """Render every listing and detail page now, so serving them costs no rendering."""
+        for letter in string.ascii_lowercase:
+            self.page(f'/statistics/fighters?char={letter}&page=all')
+        for fighter in self.roster.fighters:
+            self.page(f"/fighter-details/{fighter['id']}")
+        return self
+
+    def page(self, path):
+        """(page class, body bytes, etag) for a request path, or (class, None, None) if there is no such page."""
+        body = self._pages.get(path)
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        if parts.path == '/statistics/fighters/search':
+            kind = 'search'
+            if body is None:
+                q = query.get('query', [''])[0]
+                body = self.roster.listing_page(self.roster.search(q) if q else [], title='Search results')
+        elif parts.path == '/statistics/fighters':
+            kind = 'listing'
+            if body is None:
+                letter = query.get('char', [''])[0][:1]
+                body = self.roster.listing_page(self.roster.letter(letter) if letter else [],
+                                                title=f'Fighters: {letter.upper()}')
+        elif parts.path.startswith('/fighter-details/'):
+            kind = 'detail'
+            if body is None:
+                fighter = self.roster.by_id.get(parts.path.rsplit('/', 1)[1])
+                if fighter is None:
+                    return kind, None, None
+                body = self.roster.detail_page(fighter)
+        else:
+            return 'other', None, None
+
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+            shortfall = self.pad_kb * 1024 - len(body)
+            if shortfall > 0:
+                body += b'\n<!-- ' + b'x' * shortfall + b' -->\n'
+            self._pages[path] = body
+        return kind, body, '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+
+    def delay(self):
+        with self._lock:
+            wait = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if wait > 0:
+            time.sleep(wait)
+        return fail
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so the scraper's pooled session reuses connections as it would with the real site
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40ms to every page
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            kind, body, etag = server.page(self.path)
+            failed = server.delay()
+            server.count(kind, 'requests')
+            if failed:
+                server.count(kind, 'errors')
+                return self._reply(503, b'Service Unavailable')
+            if body is None:
+                return self._reply(404, b'Not Found')
+            if etag and self.headers.get('If-None-Match') == etag:
+                server.count(kind, 'not_modified')
+                return self._reply(304, b'', etag)
+            server.count(kind, 'bytes', len(body))
+            self._reply(200, body, etag)
+
+        def _reply(self, status, body, etag=None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fighters', type=int, default=4000)
+    parser.add_argument('--fights', type=int, default=12, help='fights per fighter')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many more seconds, uniformly')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of responses that are 503s')
+    parser.add_argument('--pad-kb', type=int, default=0, help='pad every page to at least this many KB')
+    args = parser.parse_args()
+
+    roster = Roster(args.fighters, fights_per_fighter=args.fights, seed=args.seed)
+    server = FixtureServer(roster, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           pad_kb=args.pad_kb, host=args.host, port=args.port).prerender().start()
+    print(f"Serving {args.fighters} fighters on {server.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+        print(json.dumps(server.stats()), flush=True)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
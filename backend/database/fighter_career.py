@@ -0,0 +1,245 @@
+"""
+Per-fighter career record that /fighter_analytics_details reads with one primary-key lookup.
+
+fighter_career keeps one row per fighter with total fights, wins, losses,
+draws, KO / submission / decision wins and the date of the last fight.
+Statement-level triggers on fights collect the fighters touched by every
+INSERT / UPDATE / DELETE from its transition tables and recount just those
+fighters, through the (RedFighter, Date) / (BlueFighter, Date) indexes. A
+recount rather than a delta keeps last_fight_date right when fights are
+deleted, which every fight-history replace (replace_fight_histories) does.
+
+    python -m database.fighter_career backfill   # rebuild from the fights table
+    python -m database.fighter_career check      # compare with the per-fighter scan (exit 1 on mismatch)
+"""
+import sys
+import argparse
+
+TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS fighter_career
+(
+    name            TEXT PRIMARY KEY,
+    total_fights    INTEGER NOT NULL DEFAULT 0,
+    wins            INTEGER NOT NULL DEFAULT 0,
+    losses          INTEGER NOT NULL DEFAULT 0,
+    draws           INTEGER NOT NULL DEFAULT 0,
+    ko_wins         INTEGER NOT NULL DEFAULT 0,
+    sub_wins        INTEGER NOT NULL DEFAULT 0,
+    decision_wins   INTEGER NOT NULL DEFAULT 0,  -- wins that were neither KO/TKO nor submission
+    last_fight_date DATE                          -- MAX(fights.Date), NULL without fights
+)
+"""
+
+# Recount the given fighters; one bout per side, so each fight counts once per fighter
+REFRESH_SQL = """
+CREATE OR REPLACE FUNCTION refresh_fighter_career(names TEXT[]) RETURNS void
+    LANGUAGE sql AS $$
+    INSERT INTO fighter_career AS c (name, total_fights, wins, losses, draws,
+                                     ko_wins, sub_wins, decision_wins, last_fight_date)
+    SELECT name, total, wins, losses, draws, ko_wins, sub_wins,
+           GREATEST(wins - ko_wins - sub_wins, 0), last_fight_date
+    FROM (SELECT n.name,
+                 COUNT(b.name)                                                   AS total,
+                 COUNT(*) FILTER (WHERE b.result = 'Win')                        AS wins,
+                 COUNT(*) FILTER (WHERE b.result = 'Loss')                       AS losses,
+                 COUNT(*) FILTER (WHERE b.result = 'Draw')                       AS draws,
+                 COUNT(*) FILTER (WHERE b.result = 'Win'
+                                    AND (b.finish LIKE '%KO%' OR b.finish LIKE '%TKO%')) AS ko_wins,
+                 COUNT(*) FILTER (WHERE b.result = 'Win' AND b.finish LIKE '%SUB%')   AS sub_wins,
+                 MAX(b.date)                                                     AS last_fight_date
+          FROM (SELECT DISTINCT unnest(names) AS name) n
+          LEFT JOIN (SELECT RedFighter AS name,
+                            CASE Winner WHEN 'Red' THEN 'Win' WHEN 'Blue' THEN 'Loss'
+                                        WHEN 'Draw' THEN 'Draw' END AS result,
+                            Finish AS finish, Date AS date
+                     FROM fights
+                     WHERE RedFighter = ANY (names)
+                     UNION ALL
+                     SELECT BlueFighter,
+                            CASE Winner WHEN 'Blue' THEN 'Win' WHEN 'Red' THEN 'Loss'
+                                        WHEN 'Draw' THEN 'Draw' END,
+                            Finish, Date
+                     FROM fights
+                     WHERE BlueFighter = ANY (names)) b ON b.name = n.name
+          WHERE n.name IS NOT NULL
+          GROUP BY n.name) counted
+    ON CONFLICT (name) DO UPDATE
+        SET total_fights    = excluded.total_fights,
+            wins            = excluded.wins,
+            losses          = excluded.losses,
+            draws           = excluded.draws,
+            ko_wins         = excluded.ko_wins,
+            sub_wins        = excluded.sub_wins,
+            decision_wins   = excluded.decision_wins,
+            last_fight_date = excluded.last_fight_date;
+$$
+"""
+
+_CHANGED = """
+        SELECT array_agg(DISTINCT name) INTO names
+        FROM (SELECT RedFighter FROM {rows} UNION ALL SELECT BlueFighter FROM {rows}) changed (name);
+"""
+
+APPLY_SQL = """
+CREATE OR REPLACE FUNCTION fighter_career_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+DECLARE
+    names TEXT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {inserted}
+    ELSIF TG_OP = 'DELETE' THEN
+        {deleted}
+    ELSE
+        SELECT array_agg(DISTINCT name) INTO names
+        FROM (SELECT RedFighter FROM old_rows UNION ALL SELECT BlueFighter FROM old_rows
+              UNION ALL
+              SELECT RedFighter FROM new_rows UNION ALL SELECT BlueFighter FROM new_rows) changed (name);
+    END IF;
+    IF names IS NOT NULL THEN
+        -- Fight writers are scrapes; serialising them until commit means the
+        -- recount (a new statement, so a new snapshot) sees every committed fight
+        PERFORM pg_advisory_xact_lock(hashtext('fighter_career'));
+        PERFORM refresh_fighter_career(names);
+    END IF;
+    RETURN NULL;
+END
+$$
+""".format(inserted=_CHANGED.format(rows='new_rows'), deleted=_CHANGED.format(rows='old_rows'))
+
+TRIGGERS_SQL = [
+    """CREATE OR REPLACE TRIGGER fighter_career_insert
+           AFTER INSERT ON fights REFERENCING NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION fighter_career_apply()""",
+    """CREATE OR REPLACE TRIGGER fighter_career_update
+           AFTER UPDATE ON fights REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION fighter_career_apply()""",
+    """CREATE OR REPLACE TRIGGER fighter_career_delete
+           AFTER DELETE ON fights REFERENCING OLD TABLE AS old_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION fighter_career_apply()""",
+]
+
+# What /fighter_analytics_details computed per request before fighter_career existed
+SCAN_SQL = """
+    SELECT COUNT(*),
+           SUM(CASE WHEN (Winner = 'Red' AND RedFighter = %(name)s)
+                      OR (Winner = 'Blue' AND BlueFighter = %(name)s) THEN 1 ELSE 0 END),
+           SUM(CASE WHEN (Winner = 'Red' AND BlueFighter = %(name)s)
+                      OR (Winner = 'Blue' AND RedFighter = %(name)s) THEN 1 ELSE 0 END),
+           SUM(CASE WHEN Winner = 'Draw' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN ((Winner = 'Red' AND RedFighter = %(name)s)
+                       OR (Winner = 'Blue' AND BlueFighter = %(name)s))
+                     AND (Finish LIKE '%%KO%%' OR Finish LIKE '%%TKO%%') THEN 1 ELSE 0 END),
+           SUM(CASE WHEN ((Winner = 'Red' AND RedFighter = %(name)s)
+                       OR (Winner = 'Blue' AND BlueFighter = %(name)s))
+                     AND Finish LIKE '%%SUB%%' THEN 1 ELSE 0 END),
+           MAX(Date)
+    FROM fights
+    WHERE RedFighter = %(name)s
+       OR BlueFighter = %(name)s
+"""
+
+CAREER_COLUMNS = ['total_fights', 'wins', 'losses', 'draws', 'ko_wins', 'sub_wins',
+                  'decision_wins', 'last_fight_date']
+
+
+def create_fighter_career(cursor):
+    """Create the career table, indexes, functions and triggers; backfill (and return True) if the table is new."""
+    cursor.execute("SELECT to_regclass('fighter_career') IS NULL")
+    is_new = cursor.fetchone()[0]
+    # Per-fighter fight lookups: the recount above and the profile's fight history
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fights_red  ON fights (RedFighter, Date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fights_blue ON fights (BlueFighter, Date)")
+    cursor.execute(TABLE_SQL)
+    cursor.execute(REFRESH_SQL)
+    cursor.execute(APPLY_SQL)
+    for sql in TRIGGERS_SQL:
+        cursor.execute(sql)
+    if is_new:
+        backfill(cursor)
+    return is_new
+
+
+def backfill(cursor):
+    """Recompute fighter_career from scratch; blocks fight writes until the transaction ends."""
+    cursor.execute("LOCK TABLE fights IN SHARE ROW EXCLUSIVE MODE")
+    cursor.execute("DELETE FROM fighter_career")
+    cursor.execute("""
+        SELECT refresh_fighter_career(ARRAY(SELECT RedFighter FROM fights
+                                            UNION
+                                            SELECT BlueFighter FROM fights))
+    """)
+    cursor.execute("SELECT COUNT(*) FROM fighter_career")
+    print(f"[FighterCareer] Backfilled {cursor.fetchone()[0]} fighters")
+
+
+# ── reads ─────────────────────────────────────────────────────────────────────
+
+def read_career(cursor, name):
+    """The fighter's career row as a dict (zeros if they have no fights)."""
+    cursor.execute(f"SELECT {', '.join(CAREER_COLUMNS)} FROM fighter_career WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    if row is None:
+        return dict(dict.fromkeys(CAREER_COLUMNS, 0), last_fight_date=None)
+    return dict(zip(CAREER_COLUMNS, row))
+
+
+def scan_career(cursor, name):
+    """Same record computed by scanning fights, for `check`."""
+    cursor.execute(SCAN_SQL, {'name': name})
+    total, wins, losses, draws, ko_wins, sub_wins, last = cursor.fetchone()
+    wins, ko_wins, sub_wins = wins or 0, ko_wins or 0, sub_wins or 0
+    return {
+        'total_fights': total or 0,
+        'wins': wins,
+        'losses': losses or 0,
+        'draws': draws or 0,
+        'ko_wins': ko_wins,
+        'sub_wins': sub_wins,
+        'decision_wins': max(0, wins - ko_wins - sub_wins),
+        'last_fight_date': last,
+    }
+
+
+def check(cursor):
+    """Print every fighter whose career row differs from a scan of fights; True if none do."""
+    cursor.execute("""
+        SELECT RedFighter FROM fights UNION SELECT BlueFighter FROM fights
+        UNION SELECT name FROM fighter_career
+    """)
+    names = [row[0] for row in cursor.fetchall() if row[0] is not None]
+    mismatches = 0
+    for name in names:
+        stored, scanned = read_career(cursor, name), scan_career(cursor, name)
+        if stored != scanned:
+            mismatches += 1
+            print(f"[FighterCareer] {name}: table={stored} scan={scanned}")
+    print(f"[FighterCareer] {len(names) - mismatches}/{len(names)} fighters match")
+    return not mismatches
+
+
+def main():
+    from app.db import get_conn
+
+    parser = argparse.ArgumentParser(description="Maintain the fighter_career summary table")
+    parser.add_argument('command', choices=['backfill', 'check'])
+    args = parser.parse_args()
+
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        if args.command == 'backfill':
+            if not create_fighter_career(cursor):
+                backfill(cursor)
+            conn.commit()
+            ok = True
+        else:
+            ok = check(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
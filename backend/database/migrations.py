@@ -0,0 +1,391 @@
+"""
+Versioned schema migrations.
+
+schema_version records every migration applied to the database. migrate()
+applies the pending ones in order, each in its own transaction together with
+its schema_version row, so a failing step leaves the database at the version
+before it. Steps are also idempotent: databases created before schema_version
+existed start at version 0 and replay all of them. When the schema is current
+migrate() is a single SELECT, which is what every app startup pays.
+
+    python -m database.migrations           # apply pending migrations
+    python -m database.migrations status    # list applied and pending migrations
+"""
+import sys
+import time
+import argparse
+from psycopg2 import errors
+from database.prediction_stats import create_prediction_stats, WEIGHT_CLASS_SQL
+from database.fighter_career import create_fighter_career
+from database.prediction_partitions import partition_predictions
+from database.prediction_resolver import create_job_state
+
+# Oldest server the migrations run on: NULLS NOT DISTINCT (6) needs 15, CREATE OR REPLACE TRIGGER 14
+MIN_SERVER_VERSION = 150000
+
+VERSION_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version
+(
+    version     INTEGER PRIMARY KEY,
+    description TEXT        NOT NULL,
+    applied_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+# ── 1: baseline ───────────────────────────────────────────────────────────────
+
+def _baseline(cursor):
+    """The tables init_database created before migrations existed."""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS fighters
+                    (
+                        name         TEXT PRIMARY KEY,
+                        height       REAL,
+                        reach        REAL,
+                        stance       TEXT,
+                        age          INTEGER,
+                        weight_class TEXT,
+                        win_streak   INTEGER,
+                        ko_wins      INTEGER,
+                        avg_sig_str  REAL,
+                        avg_td_pct   REAL,
+                        avg_sub_att  REAL,
+                        total_fights INTEGER,
+                        last_scraped TEXT,
+                        nickname     TEXT
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS fights
+                    (
+                        id             SERIAL PRIMARY KEY,
+                        RedFighter     TEXT,
+                        BlueFighter    TEXT,
+                        Date           TEXT,
+                        Location       TEXT,
+                        Country        TEXT,
+                        Winner         TEXT,
+                        TitleBout      INTEGER,
+                        WeightClass    TEXT,
+                        NumberOfRounds INTEGER,
+                        Finish         TEXT,
+                        FOREIGN KEY (RedFighter)  REFERENCES fighters(name),
+                        FOREIGN KEY (BlueFighter) REFERENCES fighters(name)
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS predictions
+                    (
+                        id               SERIAL PRIMARY KEY,
+                        red_fighter      TEXT NOT NULL,
+                        blue_fighter     TEXT NOT NULL,
+                        predicted_winner TEXT NOT NULL,
+                        actual_winner    TEXT,
+                        correct          INTEGER,
+                        confidence       REAL,
+                        timestamp        TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS users
+                    (
+                        id         SERIAL PRIMARY KEY,
+                        username   TEXT UNIQUE NOT NULL,
+                        password   TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+
+    cursor.execute('''CREATE TABLE IF NOT EXISTS upcoming_events
+                    (
+                        id           SERIAL PRIMARY KEY,
+                        event_name   TEXT,
+                        event_date   TEXT,
+                        location     TEXT,
+                        red_fighter  TEXT,
+                        blue_fighter TEXT,
+                        weight_class TEXT,
+                        scraped_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )''')
+
+    # Tables created before predictions carried a confidence score
+    cursor.execute("ALTER TABLE predictions ADD COLUMN IF NOT EXISTS confidence REAL")
+    # Tables created before the scraper kept nicknames (searched by the name index)
+    cursor.execute("ALTER TABLE fighters ADD COLUMN IF NOT EXISTS nickname TEXT")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fighters_name  ON fighters (name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fights_date    ON fights (Date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_upcoming_date  ON upcoming_events (event_date)")
+
+
+# ── 3: typed date columns ─────────────────────────────────────────────────────
+
+# Anything Postgres can't read as a date / timestamp becomes NULL instead of
+# failing the whole ALTER. last_scraped was written as a naive
+# datetime.now().isoformat(), so it is read in the session's TimeZone.
+SAFE_CASTS_SQL = [
+    """CREATE OR REPLACE FUNCTION safe_date(value TEXT) RETURNS DATE
+           LANGUAGE plpgsql STABLE AS $$
+       BEGIN
+           RETURN value::date;
+       EXCEPTION WHEN others THEN
+           RETURN NULL;
+       END
+       $$""",
+    """CREATE OR REPLACE FUNCTION safe_timestamptz(value TEXT) RETURNS TIMESTAMPTZ
+           LANGUAGE plpgsql STABLE AS $$
+       BEGIN
+           RETURN value::timestamptz;
+       EXCEPTION WHEN others THEN
+           RETURN NULL;
+       END
+       $$""",
+]
+
+# (table, column, new type, cast function)
+TYPED_COLUMNS = [
+    ('fights', 'date', 'DATE', 'safe_date'),
+    ('upcoming_events', 'event_date', 'DATE', 'safe_date'),
+    ('fighters', 'last_scraped', 'TIMESTAMPTZ', 'safe_timestamptz'),
+    ('fighter_career', 'last_fight_date', 'DATE', 'safe_date'),
+]
+
+
+def _column_type(cursor, table, column):
+    """data_type of a column in the current schema, or None if it doesn't exist."""
+    cursor.execute("""
+        SELECT data_type
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = %s
+          AND column_name = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _typed_dates(cursor):
+    """Convert the TEXT date columns; values that don't parse become NULL and are counted."""
+    for sql in SAFE_CASTS_SQL:
+        cursor.execute(sql)
+    for table, column, sql_type, cast in TYPED_COLUMNS:
+        if _column_type(cursor, table, column) != 'text':
+            continue
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} <> '' AND {cast}({column}) IS NULL")
+        unparseable = cursor.fetchone()[0]
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {sql_type} USING {cast}({column})")
+        note = f", {unparseable} unparseable values set to NULL" if unparseable else ""
+        print(f"[Migrate] {table}.{column} -> {sql_type}{note}")
+
+
+# ── 5: lookup indexes ─────────────────────────────────────────────────────────
+
+def _lookup_indexes(cursor):
+    # RedFighter / BlueFighter lookups use idx_fights_red / idx_fights_blue
+    # (fighter, Date) from fighter_career; these cover the remaining filters
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fights_weight_date ON fights (WeightClass, Date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_pair   ON predictions (red_fighter, blue_fighter)")
+
+
+# ── 6: one row per bout ───────────────────────────────────────────────────────
+
+# A bout is its fighter pair, unordered, and its date: each fighter's page
+# lists it with that fighter in the red corner, so it used to be stored twice
+BOUT_KEY = "LEAST(RedFighter, BlueFighter), GREATEST(RedFighter, BlueFighter), Date"
+
+
+def _unique_bouts(cursor):
+    """Keep the most recently scraped row of every bout, then enforce one row per bout."""
+    cursor.execute(f"""
+        DELETE FROM fights
+        WHERE id IN (SELECT id
+                     FROM (SELECT id, row_number() OVER (PARTITION BY {BOUT_KEY} ORDER BY id DESC) AS copy
+                           FROM fights) numbered
+                     WHERE copy > 1)
+    """)
+    removed = cursor.rowcount
+    # Undated rows share a key too, so a bout whose date didn't parse is also stored once
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_fights_bout ON fights ({BOUT_KEY}) NULLS NOT DISTINCT")
+    # The weight-class lookup now matches the pair in either corner order
+    cursor.execute(WEIGHT_CLASS_SQL)
+    if removed:
+        print(f"[Migrate] Removed {removed} duplicate fight rows (VACUUM fights to reclaim the space)")
+
+
+# ── 9: listing record ─────────────────────────────────────────────────────────
+
+def _listing_record(cursor):
+    """W/L/D as the letter listing shows them; incremental refreshes compare against these."""
+    for column in ('wins', 'losses', 'draws'):
+        cursor.execute(f"ALTER TABLE fighters ADD COLUMN IF NOT EXISTS {column} INTEGER")
+
+
+# ── 10: background jobs ───────────────────────────────────────────────────────
+
+def _jobs(cursor):
+    """The queue worker.py runs long jobs from; checkpoint lets a cancelled or crashed job resume."""
+    cursor.execute('''CREATE TABLE IF NOT EXISTS jobs
+                    (
+                        id               BIGSERIAL PRIMARY KEY,
+                        kind             TEXT        NOT NULL,
+                        params           JSONB       NOT NULL DEFAULT '{}',
+                        status           TEXT        NOT NULL DEFAULT 'queued'
+                            CHECK (status IN ('queued', 'running', 'done', 'failed', 'cancelled')),
+                        cancel_requested BOOLEAN     NOT NULL DEFAULT false,
+                        checkpoint       JSONB       NOT NULL DEFAULT '{}',
+                        progress         JSONB       NOT NULL DEFAULT '{}',
+                        result           JSONB,
+                        error            TEXT,
+                        worker           TEXT,
+                        attempts         INTEGER     NOT NULL DEFAULT 0,
+                        created_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+                        started_at       TIMESTAMPTZ,
+                        heartbeat_at     TIMESTAMPTZ,
+                        finished_at      TIMESTAMPTZ
+                    )''')
+    # Workers only ever look for queued or running jobs
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_active ON jobs (id) WHERE status IN ('queued', 'running')")
+
+
+# ── 11: cache invalidation notifications ──────────────────────────────────────
+
+CACHE_CHANNEL = 'cache_invalidate'
+
+
+def _cache_notify(cursor):
+    """
+    NOTIFY the table name after every write to a table the analytics cache reads,
+    so each API process drops its cached aggregates when any process (the job
+    worker, another gunicorn worker, the resolver) commits a change.
+    """
+    cursor.execute(f'''
+        CREATE OR REPLACE FUNCTION notify_cache_invalidate() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('{CACHE_CHANNEL}', TG_TABLE_NAME);
+            RETURN NULL;
+        END $$''')
+    for table in ('fighters', 'fights', 'predictions'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_cache_invalidate ON {table}")
+        # Statement-level: a batch of rows sends one notification, and repeats within a transaction are folded
+        cursor.execute(f'''CREATE TRIGGER {table}_cache_invalidate
+                           AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                           FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate()''')
+
+
+MIGRATIONS = [
+    (1, "Baseline tables", _baseline),
+    (2, "prediction_stats summary and triggers", create_prediction_stats),
+    (3, "DATE / TIMESTAMPTZ date columns", _typed_dates),
+    (4, "fighter_career summary and triggers", create_fighter_career),
+    (5, "Fight and prediction lookup indexes", _lookup_indexes),
+    (6, "One fights row per bout", _unique_bouts),
+    (7, "Monthly predictions partitions", partition_predictions),
+    (8, "job_state high-water marks", create_job_state),
+    (9, "fighters wins / losses / draws", _listing_record),
+    (10, "jobs queue", _jobs),
+    (11, "cache invalidation notifications", _cache_notify),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(cursor):
+    """Highest applied version, 0 before schema_version exists (rolling back the failed read)."""
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    except errors.UndefinedTable:
+        cursor.connection.rollback()
+        return 0
+    return cursor.fetchone()[0]
+
+
+def check_server_version(cursor):
+    """Fail before any DDL runs if the server is older than MIN_SERVER_VERSION."""
+    cursor.execute("SHOW server_version_num")
+    server = int(cursor.fetchone()[0])
+    if server < MIN_SERVER_VERSION:
+        raise RuntimeError(f"PostgreSQL {server // 10000}.{server % 10000} is too old: the schema migrations "
+                           f"need PostgreSQL {MIN_SERVER_VERSION // 10000} or newer")
+
+
+def migrate(conn, target=None):
+    """
+    Apply pending migrations up to `target` (default: all) on `conn`. Returns the versions applied.
+
+    A schema that is already current costs one SELECT: no DDL runs, so worker
+    boots and restarts take no locks that could queue behind live queries.
+    Otherwise the steps run under a session advisory lock, and the version is
+    read again once it is held, so concurrent processes apply each step once.
+    """
+    wanted = LATEST_VERSION if target is None else min(target, LATEST_VERSION)
+    cursor = conn.cursor()
+    applied = []
+    try:
+        version = current_version(cursor)
+        conn.commit()
+        if version >= wanted:
+            return applied
+
+        check_server_version(cursor)
+        cursor.execute("SELECT pg_advisory_lock(hashtext('schema_migrations'))")
+        try:
+            cursor.execute(VERSION_TABLE_SQL)
+            conn.commit()
+            version = current_version(cursor)
+            for step_version, description, step in MIGRATIONS:
+                if step_version <= version:
+                    continue
+                if step_version > wanted:
+                    break
+                start = time.perf_counter()
+                step(cursor)
+                cursor.execute("""INSERT INTO schema_version (version, description) VALUES (%s, %s)
+                                  ON CONFLICT (version) DO NOTHING""", (step_version, description))
+                conn.commit()
+                applied.append(step_version)
+                print(f"[Migrate] {step_version}: {description} ({time.perf_counter() - start:.2f}s)")
+        finally:
+            # Session-level lock: a rollback doesn't release it
+            conn.rollback()
+            cursor.execute("SELECT pg_advisory_unlock(hashtext('schema_migrations'))")
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return applied
+
+
+def status(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    applied = {}
+    if cursor.fetchone()[0]:
+        cursor.execute("SELECT version, applied_at FROM schema_version")
+        applied = dict(cursor.fetchall())
+    cursor.close()
+    for version, description, _ in MIGRATIONS:
+        state = applied[version].isoformat(timespec='seconds') if version in applied else 'pending'
+        print(f"{version:>3}  {description:<45} {state}")
+
+
+def main():
+    from app.db import get_conn
+
+    parser = argparse.ArgumentParser(description="Apply or list schema migrations")
+    parser.add_argument('command', nargs='?', choices=['migrate', 'status'], default='migrate')
+    args = parser.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.command == 'status':
+            status(conn)
+        else:
+            applied = migrate(conn)
+            print(f"[Migrate] Schema at version {LATEST_VERSION}"
+                  + (f" (applied {', '.join(map(str, applied))})" if applied else " (already current)"))
+    finally:
+        conn.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
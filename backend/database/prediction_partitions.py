@@ -0,0 +1,272 @@
+"""
+Monthly range partitions for the predictions log, with rollup and retention.
+
+predictions is partitioned by month on timestamp (predictions_YYYY_MM). There
+is no default partition: with one, Postgres can't scan the partitions in
+order, and "latest N resolved predictions" would probe every month instead of
+stopping in the newest. So partitions are created PARTITIONS_AHEAD months in
+advance: at startup, by `maintain`, and by the prediction logger if an insert
+finds its month missing.
+
+Raw partitions older than RETENTION_MONTHS are first rolled up into
+prediction_daily (one row per day, confidence bucket and weight class, the
+same counts prediction_stats keeps per month) and then detached, or dropped
+with PREDICTION_RETENTION_MODE=drop. Detaching or dropping a partition
+doesn't fire the prediction_stats triggers, so the summary keeps counting
+those predictions, and its backfill / check read them from prediction_daily.
+
+    python -m database.prediction_partitions maintain   # create upcoming partitions, roll up and retire old ones
+    python -m database.prediction_partitions status     # list partitions and their row counts
+
+The job worker (worker.py) runs `maintain` every MAINTAIN_INTERVAL seconds
+(default daily) between jobs, with the last start recorded in job_state so
+that of several workers only one runs it. PREDICTION_MAINTAIN_INTERVAL=0
+turns that off, for deployments that schedule `maintain` themselves.
+"""
+import os
+import re
+import sys
+import argparse
+from datetime import date, datetime
+from database.prediction_stats import create_prediction_stats, backfill, DAILY_TABLE_SQL
+
+# Months of empty partitions kept ready beyond the current one
+PARTITIONS_AHEAD = int(os.environ.get('PREDICTION_PARTITIONS_AHEAD', 3))
+# Whole months of raw predictions kept before the current month; older months are rolled up
+RETENTION_MONTHS = int(os.environ.get('PREDICTION_RETENTION_MONTHS', 12))
+# 'detach': retired partitions stay behind as standalone tables; 'drop': they are deleted
+RETENTION_MODE = os.environ.get('PREDICTION_RETENTION_MODE', 'detach')
+# Seconds between the job worker's maintain runs; 0 leaves maintain to an external schedule
+MAINTAIN_INTERVAL = float(os.environ.get('PREDICTION_MAINTAIN_INTERVAL', 86400))
+# The job_state row whose updated_at records the last maintain start
+JOB = 'prediction_partitions'
+
+COLUMNS = ['id', 'red_fighter', 'blue_fighter', 'predicted_winner', 'actual_winner', 'correct',
+           'confidence', 'timestamp', 'weight_class']
+
+PARENT_SQL = """
+CREATE TABLE predictions
+(
+    id               INTEGER   NOT NULL DEFAULT nextval('{sequence}'),
+    red_fighter      TEXT      NOT NULL,
+    blue_fighter     TEXT      NOT NULL,
+    predicted_winner TEXT      NOT NULL,
+    actual_winner    TEXT,
+    correct          INTEGER,
+    confidence       REAL,
+    timestamp        TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    weight_class     TEXT
+) PARTITION BY RANGE (timestamp)
+"""
+
+_NAME = re.compile(r'^predictions_(\d{4})_(\d{2})$')
+
+
+def _month(value):
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"predictions_{month:%Y_%m}"
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('predictions')")
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def attached_partitions(cursor):
+    """(month, partition name) of every partition currently attached, oldest first."""
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('predictions')
+    """)
+    months = []
+    for (name,) in cursor.fetchall():
+        match = _NAME.match(name)
+        if match:
+            months.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(months)
+
+
+def partitions_ready(cursor):
+    """True if the furthest partition ensure_partitions would create already exists."""
+    last = _add_months(_month(date.today()), PARTITIONS_AHEAD)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (partition_name(last),))
+    return cursor.fetchone()[0]
+
+
+def ensure_partitions(cursor, since=None):
+    """Create the monthly partitions from `since` (default: this month) to PARTITIONS_AHEAD months ahead."""
+    # Workers and the maintain job may get here at the same time
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('prediction_partitions'))")
+    month = _month(since or date.today())
+    last = _add_months(_month(date.today()), PARTITIONS_AHEAD)
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        cursor.execute("SELECT to_regclass(%s) IS NULL", (name,))
+        if cursor.fetchone()[0]:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF predictions "
+                           f"FOR VALUES FROM (%s) TO (%s)", (month, _add_months(month, 1)))
+            created.append(name)
+        month = _add_months(month, 1)
+    if created:
+        print(f"[Partitions] Created {', '.join(created)}")
+    return created
+
+
+def partition_predictions(cursor):
+    """Migration: replace the plain predictions table with a partitioned one holding the same rows."""
+    cursor.execute(DAILY_TABLE_SQL)
+    if is_partitioned(cursor):
+        ensure_partitions(cursor)
+        return
+    cursor.execute("LOCK TABLE predictions IN ACCESS EXCLUSIVE MODE")
+    cursor.execute("SELECT pg_get_serial_sequence('predictions', 'id'), MIN(timestamp), "
+                   "COUNT(*) FILTER (WHERE timestamp IS NULL) FROM predictions")
+    sequence, oldest, undated = cursor.fetchone()
+
+    cursor.execute("ALTER TABLE predictions RENAME TO predictions_unpartitioned")
+    cursor.execute(PARENT_SQL.format(sequence=sequence))
+    cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY predictions.id")
+    ensure_partitions(cursor, since=oldest)
+
+    # Rows without a timestamp can't be placed in a month; they are dated to the oldest one
+    source = ['COALESCE(timestamp, %(oldest)s)' if c == 'timestamp' else c for c in COLUMNS]
+    cursor.execute(f"INSERT INTO predictions ({', '.join(COLUMNS)}) "
+                   f"SELECT {', '.join(source)} FROM predictions_unpartitioned",
+                   {'oldest': oldest or datetime.now()})
+    copied = cursor.rowcount
+    cursor.execute("DROP TABLE predictions_unpartitioned")
+
+    # Built after the copy, and under the names the old table's indexes had
+    cursor.execute("ALTER TABLE predictions ADD CONSTRAINT predictions_pkey PRIMARY KEY (id, timestamp)")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_ts   ON predictions (timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_predictions_pair ON predictions (red_fighter, blue_fighter)")
+    # Triggers and the resolved-rows index, on the new table; the summary is
+    # rebuilt because any undated rows moved month
+    create_prediction_stats(cursor)
+    if undated:
+        backfill(cursor)
+    print(f"[Partitions] Moved {copied} predictions into monthly partitions"
+          + (f" ({undated} undated rows dated {oldest or 'today'})" if undated else ""))
+
+
+# ── rollup and retention ──────────────────────────────────────────────────────
+
+def rollup(cursor, name, month):
+    """(Re)compute prediction_daily for one month from its raw partition."""
+    cursor.execute("DELETE FROM prediction_daily WHERE day >= %s AND day < %s", (month, _add_months(month, 1)))
+    cursor.execute(f"""
+        INSERT INTO prediction_daily (day, bucket, weight_class, total, resolved, correct)
+        SELECT timestamp::date,
+               prediction_bucket(confidence),
+               COALESCE(weight_class, ''),
+               COUNT(*),
+               COUNT(actual_winner),
+               COUNT(*) FILTER (WHERE actual_winner IS NOT NULL AND correct = 1)
+        FROM {name}
+        GROUP BY 1, 2, 3
+    """)
+    return cursor.rowcount
+
+
+def apply_retention(conn, months=RETENTION_MONTHS, mode=RETENTION_MODE):
+    """Roll up and retire every partition older than `months` whole months, one transaction each."""
+    cutoff = _add_months(_month(date.today()), -months)
+    cursor = conn.cursor()
+    retired = []
+    try:
+        for month, name in attached_partitions(cursor):
+            if month >= cutoff:
+                break
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('prediction_partitions'))")
+            days = rollup(cursor, name, month)
+            if mode == 'drop':
+                cursor.execute(f"DROP TABLE {name}")
+            else:
+                cursor.execute(f"ALTER TABLE predictions DETACH PARTITION {name}")
+            conn.commit()
+            retired.append(name)
+            print(f"[Partitions] Rolled {name} up into {days} daily rows and "
+                  f"{'dropped' if mode == 'drop' else 'detached'} it")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return retired
+
+
+def maintain(conn):
+    cursor = conn.cursor()
+    ensure_partitions(cursor)
+    conn.commit()
+    cursor.close()
+    return apply_retention(conn)
+
+
+def maintain_if_due(conn, interval=MAINTAIN_INTERVAL):
+    """
+    Run maintain if none has started in the last `interval` seconds. The start
+    is claimed in job_state before running, in one statement, so concurrent
+    callers can't both claim it; a failed run is retried after the next interval.
+    Returns True if it ran.
+    """
+    if interval <= 0:
+        return False
+    cursor = conn.cursor()
+    cursor.execute("""INSERT INTO job_state (job) VALUES (%s)
+                      ON CONFLICT (job) DO UPDATE SET updated_at = now()
+                      WHERE job_state.updated_at < now() - make_interval(secs => %s)
+                      RETURNING job""", (JOB, interval))
+    due = cursor.fetchone() is not None
+    conn.commit()
+    cursor.close()
+    if due:
+        maintain(conn)
+    return due
+
+
+def status(conn):
+    cursor = conn.cursor()
+    for month, name in attached_partitions(cursor):
+        cursor.execute(f"SELECT COUNT(*) FROM {name}")
+        print(f"{name:<22} {cursor.fetchone()[0]:>10}")
+    cursor.execute("SELECT MIN(day), MAX(day), SUM(total) FROM prediction_daily")
+    first, last, total = cursor.fetchone()
+    if total:
+        print(f"{'rolled up':<22} {total:>10}  ({first} to {last})")
+    cursor.close()
+
+
+def main():
+    from app.db import get_conn
+
+    parser = argparse.ArgumentParser(description="Maintain the monthly predictions partitions")
+    parser.add_argument('command', choices=['maintain', 'status'])
+    args = parser.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.command == 'maintain':
+            maintain(conn)
+        else:
+            status(conn)
+    finally:
+        conn.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
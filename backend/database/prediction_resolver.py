@@ -0,0 +1,169 @@
+"""
+Resolves logged predictions against scraped fight results.
+
+A prediction is resolved by the first bout between its two fighters dated
+from the prediction's day to RESOLVE_WINDOW_DAYS after it, matched in either
+corner order (the leading columns of uq_fights_bout). One UPDATE ... FROM per
+batch of prediction ids sets actual_winner (the winner's name, or 'Draw'),
+correct and the bout's weight class. That last field spares the
+prediction_weight_class trigger a lookup per row, and the prediction_stats
+triggers fold the whole batch into the summary at once.
+
+job_state keeps a high-water mark: every prediction at or below it is
+resolved, or old enough (RESOLVE_WINDOW_DAYS + RESOLVE_LAG_DAYS, the time a
+result may take to be scraped) that it never will be. Each run therefore only
+reads predictions above the mark.
+
+    python -m database.prediction_resolver run      # resolve what the scraped fights allow
+    python -m database.prediction_resolver status   # high-water mark and unresolved counts
+
+Run `run` after fight-history scrapes or daily from cron.
+"""
+import os
+import sys
+import time
+import argparse
+
+# Days after a prediction in which the predicted bout must take place
+RESOLVE_WINDOW_DAYS = int(os.environ.get('PREDICTION_RESOLVE_WINDOW_DAYS', 30))
+# Further days allowed for that bout's result to be scraped before the prediction is given up on
+RESOLVE_LAG_DAYS = int(os.environ.get('PREDICTION_RESOLVE_LAG_DAYS', 30))
+# Prediction ids per UPDATE (and per transaction)
+RESOLVE_BATCH = int(os.environ.get('PREDICTION_RESOLVE_BATCH', 250000))
+# Enough for a batch's join and DISTINCT ON to sort in memory
+RESOLVE_WORK_MEM = os.environ.get('PREDICTION_RESOLVE_WORK_MEM', '64MB')
+
+JOB = 'prediction_resolver'
+
+JOB_STATE_SQL = """
+CREATE TABLE IF NOT EXISTS job_state
+(
+    job        TEXT PRIMARY KEY,
+    high_water BIGINT      NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+RESOLVE_SQL = """
+    UPDATE predictions p
+    SET actual_winner = m.winner,
+        correct       = (p.predicted_winner = m.winner)::int,
+        weight_class  = COALESCE(p.weight_class, m.weight_class)
+    FROM (SELECT DISTINCT ON (q.id) q.id, q.timestamp,
+                 CASE f.Winner WHEN 'Red' THEN f.RedFighter
+                               WHEN 'Blue' THEN f.BlueFighter
+                               ELSE 'Draw' END AS winner,
+                 f.WeightClass AS weight_class
+          FROM predictions q
+          JOIN fights f
+            ON LEAST(f.RedFighter, f.BlueFighter) = LEAST(q.red_fighter, q.blue_fighter)
+           AND GREATEST(f.RedFighter, f.BlueFighter) = GREATEST(q.red_fighter, q.blue_fighter)
+           AND f.Date >= q.timestamp::date
+           AND f.Date <= q.timestamp::date + %(window)s
+          WHERE q.id > %(low)s AND q.id <= %(high)s
+            AND q.actual_winner IS NULL
+            AND f.Winner IS NOT NULL
+          ORDER BY q.id, f.Date) m
+    WHERE p.id > %(low)s AND p.id <= %(high)s
+      AND p.id = m.id
+      AND p.timestamp = m.timestamp
+"""
+
+# The mark moves up to just below the first prediction in the batch that is
+# still unresolved and could yet be resolved
+ADVANCE_SQL = """
+    SELECT COALESCE(MIN(id) - 1, %(high)s)
+    FROM predictions
+    WHERE id > %(low)s AND id <= %(high)s
+      AND actual_winner IS NULL
+      AND timestamp >= LOCALTIMESTAMP - make_interval(days => %(settle)s)
+"""
+
+
+def create_job_state(cursor):
+    cursor.execute(JOB_STATE_SQL)
+
+
+def high_water(cursor):
+    cursor.execute("SELECT high_water FROM job_state WHERE job = %s", (JOB,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def resolve(conn, batch=RESOLVE_BATCH):
+    """Resolve every prediction above the high-water mark that a scraped fight settles. Returns the count."""
+    cursor = conn.cursor()
+    resolved = 0
+    start = time.perf_counter()
+    try:
+        # One resolver at a time; a second run waits and then finds nothing left to do
+        cursor.execute("SELECT pg_advisory_lock(hashtext(%s))", (JOB,))
+        mark = high_water(cursor)
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM predictions")
+        last = cursor.fetchone()[0]
+        stuck = None   # the mark stops at the first prediction still waiting for its fight
+        low = mark
+        while low < last:
+            high = min(low + batch, last)
+            params = {'low': low, 'high': high, 'window': RESOLVE_WINDOW_DAYS,
+                      'settle': RESOLVE_WINDOW_DAYS + RESOLVE_LAG_DAYS}
+            cursor.execute("SELECT set_config('work_mem', %s, true)", (RESOLVE_WORK_MEM,))
+            cursor.execute(RESOLVE_SQL, params)
+            resolved += cursor.rowcount
+            if stuck is None:
+                cursor.execute(ADVANCE_SQL, params)
+                mark = cursor.fetchone()[0]
+                if mark < high:
+                    stuck = mark
+                cursor.execute("""INSERT INTO job_state (job, high_water) VALUES (%s, %s)
+                                  ON CONFLICT (job) DO UPDATE
+                                      SET high_water = excluded.high_water, updated_at = now()""", (JOB, mark))
+            conn.commit()
+            low = high
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (JOB,))
+        conn.commit()
+        cursor.close()
+    print(f"[Resolver] Resolved {resolved} predictions in {time.perf_counter() - start:.2f}s, "
+          f"high-water mark {mark}")
+    return resolved
+
+
+def status(conn):
+    cursor = conn.cursor()
+    mark = high_water(cursor)
+    cursor.execute("""
+        SELECT COUNT(*),
+               COUNT(*) FILTER (WHERE timestamp < LOCALTIMESTAMP - make_interval(days => %s))
+        FROM predictions
+        WHERE id > %s AND actual_winner IS NULL
+    """, (RESOLVE_WINDOW_DAYS + RESOLVE_LAG_DAYS, mark))
+    pending, expired = cursor.fetchone()
+    cursor.close()
+    print(f"high-water mark {mark}: {pending} unresolved predictions above it "
+          f"({expired} past the {RESOLVE_WINDOW_DAYS}+{RESOLVE_LAG_DAYS} day window)")
+
+
+def main():
+    from app.db import get_conn
+
+    parser = argparse.ArgumentParser(description="Resolve logged predictions against fight results")
+    parser.add_argument('command', choices=['run', 'status'])
+    args = parser.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.command == 'run':
+            resolve(conn)
+        else:
+            status(conn)
+    finally:
+        conn.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
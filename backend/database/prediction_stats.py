@@ -0,0 +1,344 @@
+"""
+Summary of the predictions log that /prediction_history reads instead of scanning it.
+
+prediction_stats keeps one row per (month, confidence bucket, weight class) with
+the number of predictions, how many are resolved and how many of those were
+correct. Statement-level triggers on predictions apply the delta of every
+INSERT / UPDATE / DELETE from its transition tables, so a batch logged by the
+prediction logger costs one grouped upsert, not one per row. Months whose raw
+partition has been retired (prediction_partitions.py) stay in the summary and
+are counted from prediction_daily by backfill and check.
+
+    python -m database.prediction_stats backfill   # rebuild from the predictions table
+    python -m database.prediction_stats check      # compare with full-scan queries (exit 1 on mismatch)
+"""
+import sys
+import argparse
+
+# The bucket boundaries /prediction_history has always used
+BUCKET_SQL = """
+CREATE OR REPLACE FUNCTION prediction_bucket(confidence REAL) RETURNS TEXT
+    LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+               WHEN confidence >= 0.70 THEN 'high'
+               WHEN confidence >= 0.55 THEN 'medium'
+               WHEN confidence < 0.55 THEN 'low'
+               ELSE 'none'
+           END
+$$
+"""
+
+TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS prediction_stats
+(
+    month        TEXT   NOT NULL,            -- to_char(timestamp, 'YYYY-MM'), '' if unknown
+    bucket       TEXT   NOT NULL,            -- prediction_bucket(confidence)
+    weight_class TEXT   NOT NULL,            -- fight weight class, '' until resolved
+    total        BIGINT NOT NULL DEFAULT 0,
+    resolved     BIGINT NOT NULL DEFAULT 0,  -- actual_winner IS NOT NULL
+    correct      BIGINT NOT NULL DEFAULT 0,  -- resolved and correct = 1
+    PRIMARY KEY (month, bucket, weight_class)
+)
+"""
+
+# Daily counts of predictions whose raw monthly partition has been retired
+# (see prediction_partitions.py); prediction_stats still includes them
+DAILY_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS prediction_daily
+(
+    day          DATE   NOT NULL,
+    bucket       TEXT   NOT NULL,
+    weight_class TEXT   NOT NULL,
+    total        BIGINT NOT NULL,
+    resolved     BIGINT NOT NULL,
+    correct      BIGINT NOT NULL,
+    PRIMARY KEY (day, bucket, weight_class)
+)
+"""
+
+# Grouped delta of a set of prediction rows; {rows} is a transition table or predictions itself
+_GROUPED = """
+    SELECT COALESCE(to_char(timestamp, 'YYYY-MM'), '')                 AS month,
+           prediction_bucket(confidence)                               AS bucket,
+           COALESCE(weight_class, '')                                  AS weight_class,
+           {sign} COUNT(*)                                             AS total,
+           {sign} COUNT(actual_winner)                                 AS resolved,
+           {sign} COUNT(*) FILTER (WHERE actual_winner IS NOT NULL
+                                     AND correct = 1)                  AS correct
+    FROM {rows}
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3
+"""
+
+_UPSERT = """
+        INSERT INTO prediction_stats AS s (month, bucket, weight_class, total, resolved, correct)
+        {grouped}
+        ON CONFLICT (month, bucket, weight_class) DO UPDATE
+            SET total    = s.total + excluded.total,
+                resolved = s.resolved + excluded.resolved,
+                correct  = s.correct + excluded.correct;
+"""
+
+APPLY_SQL = """
+CREATE OR REPLACE FUNCTION prediction_stats_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        {remove}
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        {add}
+    END IF;
+    RETURN NULL;
+END
+$$
+""".format(
+    remove=_UPSERT.format(grouped=_GROUPED.format(sign='-', rows='old_rows')),
+    add=_UPSERT.format(grouped=_GROUPED.format(sign='', rows='new_rows')),
+)
+
+# Resolved predictions take the weight class of the fight they were about.
+# Each bout is stored once, in either corner order, so the pair is matched
+# unordered (the leading columns of uq_fights_bout)
+WEIGHT_CLASS_SQL = """
+CREATE OR REPLACE FUNCTION prediction_weight_class() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.actual_winner IS NOT NULL AND NEW.weight_class IS NULL THEN
+        SELECT WeightClass INTO NEW.weight_class
+        FROM fights
+        WHERE LEAST(RedFighter, BlueFighter) = LEAST(NEW.red_fighter, NEW.blue_fighter)
+          AND GREATEST(RedFighter, BlueFighter) = GREATEST(NEW.red_fighter, NEW.blue_fighter)
+          AND WeightClass IS NOT NULL
+        ORDER BY Date DESC NULLS LAST
+        LIMIT 1;
+    END IF;
+    RETURN NEW;
+END
+$$
+"""
+
+TRIGGERS_SQL = [
+    """CREATE OR REPLACE TRIGGER prediction_weight_class
+           BEFORE INSERT OR UPDATE OF actual_winner ON predictions
+           FOR EACH ROW EXECUTE FUNCTION prediction_weight_class()""",
+    """CREATE OR REPLACE TRIGGER prediction_stats_insert
+           AFTER INSERT ON predictions REFERENCING NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION prediction_stats_apply()""",
+    """CREATE OR REPLACE TRIGGER prediction_stats_update
+           AFTER UPDATE ON predictions REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION prediction_stats_apply()""",
+    """CREATE OR REPLACE TRIGGER prediction_stats_delete
+           AFTER DELETE ON predictions REFERENCING OLD TABLE AS old_rows
+           FOR EACH STATEMENT EXECUTE FUNCTION prediction_stats_apply()""",
+]
+
+
+def create_prediction_stats(cursor):
+    """Create the summary table, functions and triggers; backfill (and return True) if the table is new."""
+    cursor.execute("SELECT to_regclass('prediction_stats') IS NULL")
+    is_new = cursor.fetchone()[0]
+    cursor.execute("ALTER TABLE predictions ADD COLUMN IF NOT EXISTS weight_class TEXT")
+    cursor.execute(BUCKET_SQL)
+    cursor.execute(TABLE_SQL)
+    cursor.execute(DAILY_TABLE_SQL)
+    cursor.execute(APPLY_SQL)
+    cursor.execute(WEIGHT_CLASS_SQL)
+    for sql in TRIGGERS_SQL:
+        cursor.execute(sql)
+    # Last 30 / last 10 resolved predictions are still read straight from the log
+    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_predictions_resolved_ts
+                      ON predictions (timestamp) WHERE actual_winner IS NOT NULL""")
+    if is_new:
+        backfill(cursor)
+    return is_new
+
+
+def backfill(cursor):
+    """Recompute prediction_stats from scratch; blocks prediction writes until the transaction ends."""
+    cursor.execute("LOCK TABLE predictions IN SHARE ROW EXCLUSIVE MODE")
+    # Resolved before the weight-class trigger existed; the UPDATE goes through the triggers
+    cursor.execute("""
+        UPDATE predictions p
+        SET weight_class = (SELECT f.WeightClass
+                            FROM fights f
+                            WHERE LEAST(f.RedFighter, f.BlueFighter) = LEAST(p.red_fighter, p.blue_fighter)
+                              AND GREATEST(f.RedFighter, f.BlueFighter) = GREATEST(p.red_fighter, p.blue_fighter)
+                              AND f.WeightClass IS NOT NULL
+                            ORDER BY f.Date DESC NULLS LAST
+                            LIMIT 1)
+        WHERE p.actual_winner IS NOT NULL AND p.weight_class IS NULL
+    """)
+    cursor.execute("DELETE FROM prediction_stats")
+    cursor.execute(f"""
+        INSERT INTO prediction_stats (month, bucket, weight_class, total, resolved, correct)
+        SELECT month, bucket, weight_class, SUM(total), SUM(resolved), SUM(correct)
+        FROM (({_GROUPED.format(sign='', rows='predictions')})
+              UNION ALL
+              SELECT to_char(day, 'YYYY-MM'), bucket, weight_class, total, resolved, correct
+              FROM prediction_daily) counted
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute("SELECT COUNT(*) FROM prediction_stats")
+    print(f"[PredictionStats] Backfilled {cursor.fetchone()[0]} summary rows")
+
+
+# ── reads ─────────────────────────────────────────────────────────────────────
+
+def read_summary(cursor):
+    """
+    The aggregates /prediction_history shows, from prediction_stats. SUMs of
+    BIGINT come back as NUMERIC, which psycopg2 reads as Decimal and the JSON
+    encoder writes as a string, so every value is cast to bigint or float8.
+    """
+    cursor.execute("""
+        SELECT SUM(resolved)::bigint, SUM(correct)::float8 / NULLIF(SUM(resolved), 0)
+        FROM prediction_stats
+    """)
+    resolved, accuracy = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT month, SUM(correct)::float8 / SUM(resolved) * 100
+        FROM prediction_stats
+        GROUP BY month
+        HAVING SUM(resolved) > 0
+        ORDER BY month DESC LIMIT 12
+    """)
+    accuracy_history = [row[1] for row in cursor.fetchall()]
+
+    cursor.execute("SELECT bucket, SUM(total)::bigint FROM prediction_stats GROUP BY bucket")
+    buckets = dict(cursor.fetchall())
+
+    cursor.execute("""
+        SELECT weight_class, SUM(correct)::float8 / SUM(resolved) * 100
+        FROM prediction_stats
+        WHERE weight_class <> ''
+        GROUP BY weight_class
+        HAVING SUM(resolved) > 0
+        ORDER BY 2 DESC
+    """)
+    by_weight_class = {row[0]: round(row[1], 1) for row in cursor.fetchall()}
+
+    return {
+        'total_predictions': resolved or 0,
+        'accuracy': accuracy or 0,
+        'accuracy_history': accuracy_history,
+        'confidence_distribution': {
+            'high': buckets.get('high') or 0,
+            'medium': buckets.get('medium') or 0,
+            'low': buckets.get('low') or 0,
+        },
+        'accuracy_by_weight_class': by_weight_class,
+    }
+
+
+# Every prediction, raw or rolled up, at the grain both sources share. The
+# buckets use the thresholds directly rather than prediction_bucket().
+_SCANNED = """
+    (SELECT COALESCE(to_char(timestamp, 'YYYY-MM'), '') AS month,
+            CASE WHEN confidence >= 0.70 THEN 'high'
+                 WHEN confidence >= 0.55 THEN 'medium'
+                 WHEN confidence < 0.55 THEN 'low' END AS bucket,
+            weight_class,
+            1 AS total,
+            CASE WHEN actual_winner IS NOT NULL THEN 1 ELSE 0 END AS resolved,
+            CASE WHEN actual_winner IS NOT NULL AND correct = 1 THEN 1 ELSE 0 END AS correct
+     FROM predictions
+     UNION ALL
+     SELECT to_char(day, 'YYYY-MM'), bucket, NULLIF(weight_class, ''), total, resolved, correct
+     FROM prediction_daily) scanned
+"""
+
+
+def scan_summary(cursor):
+    """Same aggregates computed by scanning predictions (and the daily rollups of retired months), for `check`."""
+    cursor.execute(f"""
+        SELECT SUM(resolved)::bigint, SUM(correct)::float8 / NULLIF(SUM(resolved), 0)
+        FROM {_SCANNED}
+    """)
+    resolved, accuracy = cursor.fetchone()
+
+    cursor.execute(f"""
+        SELECT month, SUM(correct)::float8 / SUM(resolved) * 100
+        FROM {_SCANNED}
+        GROUP BY month
+        HAVING SUM(resolved) > 0
+        ORDER BY month DESC LIMIT 12
+    """)
+    accuracy_history = [row[1] for row in cursor.fetchall()]
+
+    cursor.execute(f"""
+        SELECT (SUM(total) FILTER (WHERE bucket = 'high'))::bigint,
+               (SUM(total) FILTER (WHERE bucket = 'medium'))::bigint,
+               (SUM(total) FILTER (WHERE bucket = 'low'))::bigint
+        FROM {_SCANNED}
+    """)
+    high, medium, low = cursor.fetchone()
+
+    cursor.execute(f"""
+        SELECT weight_class, SUM(correct)::float8 / SUM(resolved) * 100
+        FROM {_SCANNED}
+        WHERE weight_class IS NOT NULL
+        GROUP BY weight_class
+        HAVING SUM(resolved) > 0
+        ORDER BY 2 DESC
+    """)
+    by_weight_class = {row[0]: round(row[1], 1) for row in cursor.fetchall()}
+
+    return {
+        'total_predictions': resolved or 0,
+        'accuracy': accuracy or 0,
+        'accuracy_history': accuracy_history,
+        'confidence_distribution': {'high': high or 0, 'medium': medium or 0, 'low': low or 0},
+        'accuracy_by_weight_class': by_weight_class,
+    }
+
+
+def check(cursor):
+    """Print every aggregate that differs between the summary and a full scan; True if none do."""
+    summary, scanned = read_summary(cursor), scan_summary(cursor)
+    mismatches = []
+    for key, expected in scanned.items():
+        got = summary[key]
+        if isinstance(expected, list):
+            same = len(got) == len(expected) and all(_close(a, b) for a, b in zip(got, expected))
+        elif isinstance(expected, dict):
+            same = got.keys() == expected.keys() and all(_close(got[k], expected[k]) for k in expected)
+        else:
+            same = _close(got, expected)
+        if not same:
+            mismatches.append(key)
+            print(f"[PredictionStats] {key}: summary={got} scan={expected}")
+    print(f"[PredictionStats] {len(scanned) - len(mismatches)}/{len(scanned)} aggregates match")
+    return not mismatches
+
+
+def _close(a, b):
+    return abs(float(a or 0) - float(b or 0)) < 1e-9
+
+
+def main():
+    from app.db import get_conn
+
+    parser = argparse.ArgumentParser(description="Maintain the prediction_stats summary table")
+    parser.add_argument('command', choices=['backfill', 'check'])
+    args = parser.parse_args()
+
+    conn = get_conn()
+    cursor = conn.cursor()
+    try:
+        if args.command == 'backfill':
+            if not create_prediction_stats(cursor):
+                backfill(cursor)
+            conn.commit()
+            ok = True
+        else:
+            ok = check(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import gc
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+timeout = 120
+
+# Import run:app (model, tree engine arrays, init_database) once in the master
+# and fork workers from it. GUNICORN_PRELOAD=0 goes back to per-worker loading.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far into the permanent generation: the
+    # workers' collector then never writes to those objects, and their pages
+    # stay shared with the master instead of being copied on first GC
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    server.log.info(f"[Startup] Worker {worker.pid} forked (preload_app={preload_app})")
+    if preload_app:
+        # The app was loaded before the fork; without preload each worker
+        # reports from run.py as it imports the app itself
+        from app import startup
+        startup.report(f" (preloaded in master {server.pid})")
+
+
+def worker_exit(server, worker):
+    # Commit predictions still queued for the write-behind logger
+    from app.services.prediction_logger import prediction_logger
+    prediction_logger.flush()
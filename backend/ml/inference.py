@@ -0,0 +1,159 @@
+import threading
+import numpy as np
+
+WEIGHT_CLASSES = {
+    'Strawweight': 0, 'Flyweight': 1, 'Bantamweight': 2, 'Featherweight': 3,
+    'Lightweight': 4, 'Welterweight': 5, 'Middleweight': 6,
+    'Light Heavyweight': 7, 'Heavyweight': 8,
+    'Catch Weight': 4, 'Openweight': 4
+}
+
+FEATURES = [
+    'RedOdds', 'BlueOdds', 'OddsRatio',
+    'SigStrLandedDif', 'SigStrPctDif', 'SigStrAbsorbedDif',
+    'TDLandedDif', 'TDPctDif', 'SubAttDif',
+    'RedFinishRate', 'BlueFinishRate', 'FinishRateDif',
+    'TotalRoundDif', 'TotalTitleBoutDif', 'WinDif', 'LossDif',
+    'WinStreakDif', 'LoseStreakDif', 'LongestWinStreakDif',
+    'HeightDif', 'ReachDif', 'AgeDif', 'RedAge', 'BlueAge',
+    'StanceMatch', 'NumberOfRounds', 'TitleBout', 'WeightClassNum',
+    'RankDif', 'RedRanked', 'BlueRanked',
+    'KODif', 'SubDif',
+    'RedRecency_SigStr', 'BlueRecency_SigStr', 'RecencySigStrDif',
+    'RedRecency_TD', 'BlueRecency_TD', 'RecencyTDDif',
+    'RedRecency_FinishRate', 'BlueRecency_FinishRate', 'RecencyFinishDif',
+]
+N_FEATURES = len(FEATURES)
+
+
+def fill_feature_row(out, red_stats, blue_stats, data):
+    """Write one bout's features into `out` (float64, length N_FEATURES) in FEATURES order."""
+    red_wc = red_stats.get('weight_class', 'Lightweight')
+
+    red_wins = max(red_stats.get('total_fights', 0) * 0.7, 1)
+    blue_wins = max(blue_stats.get('total_fights', 0) * 0.7, 1)
+
+    red_ko = red_stats.get('ko_wins', 0) or 0
+    blue_ko = blue_stats.get('ko_wins', 0) or 0
+    red_sub = round(red_stats.get('avg_sub_att', 0) or 0)
+    blue_sub = round(blue_stats.get('avg_sub_att', 0) or 0)
+
+    red_finish_rate = (red_ko + red_sub) / red_wins
+    blue_finish_rate = (blue_ko + blue_sub) / blue_wins
+
+    red_sig = red_stats.get('avg_sig_str', 0) or 0
+    blue_sig = blue_stats.get('avg_sig_str', 0) or 0
+    red_td = red_stats.get('avg_td_pct', 0) or 0
+    blue_td = blue_stats.get('avg_td_pct', 0) or 0
+    red_exp = red_stats.get('total_fights', 0) or 0
+    blue_exp = blue_stats.get('total_fights', 0) or 0
+    red_streak = red_stats.get('win_streak', 0) or 0
+    blue_streak = blue_stats.get('win_streak', 0) or 0
+    red_age = red_stats.get('age', 30) or 30
+    blue_age = blue_stats.get('age', 30) or 30
+
+    red_odds = float(data.get('red_odds', -150))
+    blue_odds = float(data.get('blue_odds', 130))
+
+    out[:] = (
+        # Betting odds
+        red_odds, blue_odds, red_odds / blue_odds if blue_odds != 0 else 1,
+        # Career striking
+        red_sig - blue_sig, red_sig - blue_sig, blue_sig - red_sig,
+        # Career grappling
+        red_td - blue_td, red_td - blue_td,
+        (red_stats.get('avg_sub_att', 0) or 0) - (blue_stats.get('avg_sub_att', 0) or 0),
+        # Finish ability
+        red_finish_rate, blue_finish_rate, red_finish_rate - blue_finish_rate,
+        # Experience
+        red_exp - blue_exp, 0, red_exp - blue_exp, 0,
+        # Streaks
+        red_streak - blue_streak, 0, red_streak - blue_streak,
+        # Physical
+        (red_stats.get('height', 180) or 180) - (blue_stats.get('height', 180) or 180),
+        (red_stats.get('reach', 180) or 180) - (blue_stats.get('reach', 180) or 180),
+        red_age - blue_age, red_age, blue_age,
+        # Stance + context
+        1 if red_stats.get('stance', 'Orthodox') == blue_stats.get('stance', 'Orthodox') else 0,
+        int(data.get('number_of_rounds', 3)),
+        1 if data.get('title_bout') == 'true' else 0,
+        WEIGHT_CLASSES.get(red_wc, 4),
+        # Rankings
+        0, 0, 0,
+        # KO/Sub
+        red_ko - blue_ko, red_sub - blue_sub,
+        # Recency
+        red_sig, blue_sig, red_sig - blue_sig,
+        red_td, blue_td, red_td - blue_td,
+        red_finish_rate, blue_finish_rate, red_finish_rate - blue_finish_rate,
+    )
+    return out
+
+
+def compute_model_features(red_stats, blue_stats, data):
+    """Feature dict keyed by FEATURES, for the DataFrame path and for inspection."""
+    row = fill_feature_row(np.empty(N_FEATURES), red_stats, blue_stats, data)
+    return dict(zip(FEATURES, row.tolist()))
+
+
+def build_feature_matrix(bouts):
+    """Stack (red_stats, blue_stats, data) tuples into an (n, N_FEATURES) float64 matrix."""
+    X = np.empty((len(bouts), N_FEATURES))
+    for i, (red_stats, blue_stats, data) in enumerate(bouts):
+        fill_feature_row(X[i], red_stats, blue_stats, data)
+    return X
+
+
+class FastPredictor:
+    """
+    Inference without pandas or the ColumnTransformer.
+
+    The fitted SimpleImputer medians and StandardScaler mean/scale are pulled out
+    of the training pipeline once; each call imputes and scales a preallocated
+    row in place and hands the array straight to the calibrated classifier.
+    Raises ValueError if the pipeline isn't the impute -> scale -> classifier
+    layout build_pipeline() produces, so callers can fall back to pipe.predict_proba.
+    """
+
+    def __init__(self, pipe, classifier=None):
+        preprocessor = pipe.named_steps['preprocessor']
+        fitted = [t for t in preprocessor.transformers_ if t[0] != 'remainder' or t[1] != 'drop']
+        if len(fitted) != 1 or list(fitted[0][2]) != FEATURES:
+            raise ValueError("Expected a single numeric transformer over FEATURES")
+
+        numeric = fitted[0][1]
+        imputer = numeric.named_steps['imputer']
+        scaler = numeric.named_steps['scaler']
+        if imputer.statistics_.shape[0] != N_FEATURES:
+            raise ValueError("Imputer dropped columns during fit")
+
+        self.fill_values = np.asarray(imputer.statistics_, dtype=np.float64)
+        self.mean = (np.asarray(scaler.mean_, dtype=np.float64)
+                     if scaler.with_mean else np.zeros(N_FEATURES))
+        self.scale = (np.asarray(scaler.scale_, dtype=np.float64)
+                      if scaler.with_std else np.ones(N_FEATURES))
+        self.classifier = classifier if classifier is not None else pipe.named_steps['classifier']
+        self._local = threading.local()
+
+    def _buffer(self):
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty((1, N_FEATURES))
+        return row
+
+    def transform(self, X):
+        """Impute and scale X in place; X must be a float64 (n, N_FEATURES) array."""
+        np.copyto(X, self.fill_values, where=np.isnan(X))
+        X -= self.mean
+        X /= self.scale
+        return X
+
+    def predict_proba_one(self, red_stats, blue_stats, data):
+        """[blue_prob, red_prob] for one bout."""
+        row = self._buffer()
+        fill_feature_row(row[0], red_stats, blue_stats, data)
+        return self.classifier.predict_proba(self.transform(row))[0]
+
+    def predict_proba(self, X):
+        """Class probabilities for a raw feature matrix (not modified)."""
+        return self.classifier.predict_proba(self.transform(np.array(X, dtype=np.float64)))
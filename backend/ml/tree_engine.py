@@ -0,0 +1,299 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+
+ARRAYS = ('split_index', 'threshold', 'children', 'default_left', 'value',
+          'roots', 'tree_model', 'base_margin', 'iso_x', 'iso_y', 'iso_offsets')
+
+# (rows x trees) cells walked at once; ~32k keeps the per-level temporaries in L2
+TILE_NODES = 32768
+
+
+class TreeEngine:
+    """
+    Serving-only evaluator for the calibrated XGBoost classifier.
+
+    Every tree of every calibrated fold is flattened into shared node arrays
+    (feature index, float32 threshold, interleaved left/right children, default
+    direction for NaN, leaf value). Leaves point at themselves, so a batch is
+    walked level by level with a handful of gathers over an (n_rows, n_trees)
+    node matrix for max_depth steps. Per fold, leaf values are summed onto the base margin in
+    float32 and passed through the sigmoid, the same way XGBoost does it, then
+    through that fold's isotonic map; the folds are averaged like
+    CalibratedClassifierCV.predict_proba.
+
+    Input is the preprocessed (imputed + scaled) feature matrix, i.e. this
+    replaces pipe.named_steps['classifier'], not the whole pipeline.
+    """
+
+    def __init__(self, arrays, meta):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.n_models = int(meta['n_models'])
+        self.max_depth = int(meta['max_depth'])
+        self.n_features = int(meta['n_features'])
+        bounds = np.flatnonzero(np.diff(self.tree_model)) + 1
+        self._model_slices = np.split(np.arange(self.tree_model.shape[0]), bounds)
+        self._model_slices = [(int(s[0]), int(s[-1]) + 1) for s in self._model_slices]
+
+    # ── export ────────────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_calibrated(cls, calibrated):
+        """Flatten a fitted CalibratedClassifierCV(XGBClassifier, method='isotonic')."""
+        folds = getattr(calibrated, 'calibrated_classifiers_', None)
+        if not folds:
+            raise ValueError("Classifier is not a fitted CalibratedClassifierCV")
+
+        nodes = {k: [] for k in ('split_index', 'threshold', 'children', 'default_left', 'value')}
+        roots, tree_model, base_margin = [], [], []
+        iso_x, iso_y, iso_offsets = [], [], [0]
+        max_depth, n_features, offset = 0, None, 0
+
+        for m, fold in enumerate(folds):
+            if fold.method != 'isotonic' or len(fold.calibrators) != 1:
+                raise ValueError("Only binary isotonic calibration is supported")
+            if not hasattr(fold.estimator, 'get_booster'):
+                raise ValueError(f"Unsupported base estimator {type(fold.estimator).__name__}")
+
+            learner = json.loads(fold.estimator.get_booster().save_raw('json'))['learner']
+            if learner['objective']['name'] != 'binary:logistic':
+                raise ValueError(f"Unsupported objective {learner['objective']['name']}")
+            params = learner['learner_model_param']
+            n_features = int(params['num_feature'])
+            # XGBoost's float32 ProbToMargin, -logf(1/p - 1), with a correctly rounded log
+            base_score = np.float32(params['base_score'].strip('[]'))
+            odds = np.float32(1) / base_score - np.float32(1)
+            base_margin.append(np.float32(-np.log(np.float64(odds))))
+
+            booster = fold.estimator.get_booster()
+            trees = learner['gradient_booster']['model']['trees']
+            n_rounds = _best_rounds(booster)
+            if n_rounds is not None:
+                per_round = int(learner['gradient_booster']['model']['gbtree_model_param']['num_parallel_tree'])
+                trees = trees[:n_rounds * per_round]
+
+            for tree in trees:
+                if any(tree['split_type']) or int(tree['tree_param']['num_deleted']):
+                    raise ValueError("Categorical or pruned trees are not supported")
+                left = np.asarray(tree['left_children'], dtype=np.int64)
+                right = np.asarray(tree['right_children'], dtype=np.int64)
+                leaf = left == -1
+                own = np.arange(left.shape[0])
+                nodes['children'].append(np.column_stack([np.where(leaf, own, left),
+                                                          np.where(leaf, own, right)]) + offset)
+                nodes['split_index'].append(np.where(leaf, 0, tree['split_indices']))
+                nodes['threshold'].append(np.asarray(tree['split_conditions'], dtype=np.float32))
+                nodes['default_left'].append(np.asarray(tree['default_left'], dtype=bool))
+                # For leaves XGBoost keeps the output in split_conditions
+                nodes['value'].append(np.where(leaf, np.asarray(tree['split_conditions'], dtype=np.float32), 0))
+                roots.append(offset)
+                tree_model.append(m)
+                max_depth = max(max_depth, _depth(left, right))
+                offset += left.shape[0]
+
+            iso = fold.calibrators[0]
+            # Keep the fitted dtype: sklearn interpolates in it (float32 for XGBoost scores)
+            iso_x.append(np.asarray(iso.X_thresholds_))
+            iso_y.append(np.asarray(iso.y_thresholds_))
+            iso_offsets.append(iso_offsets[-1] + len(iso.X_thresholds_))
+
+        arrays = {k: np.concatenate(v) for k, v in nodes.items()}
+        arrays['split_index'] = arrays['split_index'].astype(np.int32)
+        arrays['children'] = arrays['children'].astype(np.intp).ravel()
+        arrays['value'] = arrays['value'].astype(np.float32)
+        arrays['roots'] = np.asarray(roots, dtype=np.int32)
+        arrays['tree_model'] = np.asarray(tree_model, dtype=np.int32)
+        arrays['base_margin'] = np.asarray(base_margin, dtype=np.float32)
+        arrays['iso_x'] = np.concatenate(iso_x)
+        arrays['iso_y'] = np.concatenate(iso_y)
+        arrays['iso_offsets'] = np.asarray(iso_offsets, dtype=np.int64)
+        meta = {
+            'n_models': len(folds),
+            'n_trees': len(roots),
+            'n_nodes': int(offset),
+            'max_depth': max_depth,
+            'n_features': n_features,
+        }
+        return cls(arrays, meta)
+
+    @classmethod
+    def from_pipeline(cls, pipe):
+        return cls.from_calibrated(pipe.named_steps['classifier'])
+
+    def save(self, directory):
+        """One .npy per array plus meta.json, so load() can memory-map them."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+                  for name in ARRAYS}
+        return cls(arrays, meta)
+
+    @classmethod
+    def from_cache(cls, pipe, directory, version):
+        """
+        Memory-mapped engine for the model identified by `version`.
+
+        Each model version is exported once to its own directory/<version>/ and
+        every later call maps the same files read-only, so the node arrays sit
+        in the page cache once no matter how many processes serve the model.
+        The export is written to a directory private to this process and
+        renamed into place; when several workers reload at once the first
+        rename wins and the others map its copy. Older versions are removed
+        (processes still mapping them keep their files until they reload). If
+        the directory can't be written the in-memory export is returned instead.
+        """
+        target = os.path.join(directory, version)
+        engine = None
+        for _ in range(3):
+            try:
+                cached = cls.load(target, mmap_mode='r')
+                if cached.meta.get('model_version') == version:
+                    _prune(directory, keep=version)
+                    return cached
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError):
+                shutil.rmtree(target, ignore_errors=True)
+
+            if engine is None:
+                engine = cls.from_pipeline(pipe)
+                engine.meta['model_version'] = version
+            staging = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                staging = tempfile.mkdtemp(prefix=f'{version}.tmp', dir=directory)
+                engine.save(staging)
+                os.rename(staging, target)
+            except OSError as e:
+                if staging:
+                    shutil.rmtree(staging, ignore_errors=True)
+                if os.path.isdir(target):
+                    continue    # another worker's export landed first: map that one
+                print(f"[Model] Tree engine cache not written ({e}), keeping it in memory")
+                return engine
+            # Loop round to map the files just renamed into place
+        print("[Model] Tree engine cache kept changing under this process, keeping it in memory")
+        return engine
+
+    # ── inference ─────────────────────────────────────────────────────────────
+
+    def leaf_values(self, X):
+        """(n_rows, n_trees) float32 leaf outputs for a preprocessed float matrix."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        # Walk the batch in row tiles small enough for the node matrix to stay in cache
+        tile = max(1, TILE_NODES // self.roots.shape[0])
+        if X.shape[0] > tile:
+            return np.concatenate([self._walk(X[i:i + tile]) for i in range(0, X.shape[0], tile)])
+        return self._walk(X)
+
+    def _walk(self, X):
+        flat = X.ravel()
+        row_start = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[:, None]
+        has_nan = bool(np.isnan(flat).any())
+
+        node = np.empty((X.shape[0], self.roots.shape[0]), dtype=np.intp)
+        node[:] = self.roots
+        for _ in range(self.max_depth):
+            x = flat.take(row_start + self.split_index.take(node))
+            # children[2 * node] is the left child, children[2 * node + 1] the right
+            go_right = ~(x < self.threshold.take(node))
+            if has_nan:
+                go_right &= ~(np.isnan(x) & self.default_left.take(node))
+            node *= 2
+            node += go_right
+            node = self.children.take(node)
+        return self.value.take(node)
+
+    def fold_probabilities(self, X):
+        """(n_rows, n_models) uncalibrated positive-class probability of each fold's booster."""
+        leaves = self.leaf_values(X)
+        out = np.empty((leaves.shape[0], self.n_models), dtype=np.float32)
+        for m, (start, stop) in enumerate(self._model_slices):
+            # XGBoost adds trees one at a time onto the base margin in float32
+            terms = np.empty((leaves.shape[0], stop - start + 1), dtype=np.float32)
+            terms[:, 0] = self.base_margin[m]
+            terms[:, 1:] = leaves[:, start:stop]
+            margin = np.cumsum(terms, axis=1, dtype=np.float32)[:, -1]
+            # expf is correctly rounded in libm; numpy's float32 SIMD exp can be 1 ulp off
+            exp = np.exp(-margin.astype(np.float64)).astype(np.float32)
+            out[:, m] = np.float32(1) / (np.float32(1) + exp)
+        return out
+
+    def predict_proba(self, X):
+        """[P(blue), P(red)] per row, averaged over calibrated folds."""
+        raw = self.fold_probabilities(X)
+        proba = np.zeros((raw.shape[0], 2))
+        for m in range(self.n_models):
+            lo, hi = self.iso_offsets[m], self.iso_offsets[m + 1]
+            p = _isotonic(raw[:, m], self.iso_x[lo:hi], self.iso_y[lo:hi])
+            fold = np.empty_like(proba)
+            fold[:, 1] = p
+            fold[:, 0] = 1.0 - fold[:, 1]
+            fold[(1.0 < fold) & (fold <= 1.0 + 1e-5)] = 1.0
+            proba += fold
+        proba /= self.n_models
+        return proba
+
+    def max_abs_error(self, calibrated, X):
+        """Largest |p_engine - p_sklearn| on X; used to vet an export before serving it."""
+        return float(np.max(np.abs(self.predict_proba(X) - calibrated.predict_proba(X))))
+
+
+def _isotonic(t, xs, ys):
+    """IsotonicRegression.predict with out_of_bounds='clip', step for step (scipy interp1d)."""
+    t = np.clip(t.astype(xs.dtype), xs[0], xs[-1])
+    if xs.shape[0] == 1:
+        return np.repeat(ys, t.shape[0])
+    hi = np.searchsorted(xs, t).clip(1, xs.shape[0] - 1)
+    lo = hi - 1
+    slope = (ys[hi] - ys[lo]) / (xs[hi] - xs[lo])
+    return (slope * (t - xs[lo]) + ys[lo]).astype(xs.dtype)
+
+
+def _best_rounds(booster):
+    """Rounds XGBoost's own predict would use (early stopping), or None for all."""
+    try:
+        return int(booster.best_iteration) + 1
+    except (AttributeError, ValueError, TypeError):
+        return None
+
+
+def _depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        children = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+        if not children:
+            return depth
+        depth += 1
+        frontier = children
+
+
+def _prune(directory, keep):
+    """Remove finished exports of other model versions (and the old single-export layout) from `directory`."""
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return
+    for name in entries:
+        if name == keep or '.tmp' in name:
+            continue
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -3,7 +3,7 @@ import os
 import numpy as np
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
-from app.db import get_conn
+from app.services.fighter_store import get_fighter_store, DEFAULTS
 
 
 def get_data_path():
@@ -66,73 +66,43 @@ def preprocess_data(df):
 
 
 def get_fighter_stats(fighter_name):
-    conn = get_conn()
-    cursor = conn.cursor()
+    """Fighter row as a dict, with the name resolved by the store's name index (see FighterStore.resolve)."""
     try:
-        cursor.execute("SELECT * FROM fighters WHERE name = %s", (fighter_name,))
-        result = cursor.fetchone()
+        return get_fighter_store().find(fighter_name)
+    except Exception as e:
+        print(f"Error fetching fighter stats: {str(e)}")
+        return None
 
-        if not result:
-            cursor.execute("SELECT * FROM fighters WHERE name LIKE %s", (f'%{fighter_name}%',))
-            result = cursor.fetchone()
 
-        if result:
-            columns = [col[0] for col in cursor.description]
-            return dict(zip(columns, result))
-        return None
+def get_fighters_stats(fighter_names):
+    """Resolve several fighters at once. Returns {requested name: stats or None}."""
+    names = list(dict.fromkeys(n for n in fighter_names if n))
+    if not names:
+        return {}
+    try:
+        store = get_fighter_store()
     except Exception as e:
         print(f"Error fetching fighter stats: {str(e)}")
-        return None
-    finally:
-        cursor.close()
-        conn.close()
+        return dict.fromkeys(names)
+    return {name: store.find(name) for name in names}
 
 
-def fill_missing_stats(stats):
-    conn = get_conn()
-    cursor = conn.cursor()
+def get_population_defaults():
+    """Fallback values for missing fighter stats, averaged over the fighters table."""
     try:
-        cursor.execute("""
-            SELECT 
-                COALESCE(AVG(height), 180) AS height,
-                COALESCE(AVG(reach), 180) AS reach,
-                COALESCE(AVG(age), 30) AS age,
-                COALESCE(AVG(avg_sig_str), 100) AS avg_sig_str,
-                COALESCE(AVG(avg_td_pct), 30) AS avg_td_pct,
-                COALESCE(AVG(avg_sub_att), 1.5) AS avg_sub_att,
-                COALESCE(AVG(total_fights), 10) AS total_fights
-            FROM fighters
-        """)
-        medians = cursor.fetchone()
-        median_cols = [col[0] for col in cursor.description]
-        median_vals = dict(zip(median_cols, medians))
-
-        defaults = {
-            'height': 180,
-            'reach': 180,
-            'stance': 'Orthodox',
-            'age': 30,
-            'win_streak': 0,
-            'ko_wins': 0,
-            'weight_class': 'Lightweight',
-            'avg_sig_str': 100,
-            'avg_td_pct': 30,
-            'avg_sub_att': 1.5,
-            'total_fights': 10
-        }
-
-        for key in defaults:
-            if key in median_vals and median_vals[key] is not None:
-                defaults[key] = median_vals[key]
-
-        for key, value in defaults.items():
-            if key not in stats or pd.isna(stats.get(key)):
-                stats[key] = value
-
-        return stats
+        return get_fighter_store().defaults()
     except Exception as e:
         print(f"Error filling missing stats: {str(e)}")
-        return stats
-    finally:
-        cursor.close()
-        conn.close()
+        return dict(DEFAULTS)
+
+
+def fill_missing_stats(stats, defaults=None):
+    """Fill missing values in place. Pass `defaults` to reuse one lookup across fighters."""
+    if defaults is None:
+        defaults = get_population_defaults()
+
+    for key, value in defaults.items():
+        if key not in stats or pd.isna(stats.get(key)):
+            stats[key] = value
+
+    return stats
@@ -1,12 +1,21 @@
-from app import create_app
-from flask_cors import CORS
-from database.init_db import init_database
+from app import startup
 
-app = create_app()
-CORS(app)
+with startup.phase('imports'):
+    from app import create_app
+    from flask_cors import CORS
+    from database.init_db import init_database
 
-# Run DB init on every startup — creates tables if missing, deduplicates fighters
-init_database()
+    # Registering the blueprint imports routes, which loads the model (timed separately)
+    app = create_app()
+    CORS(app)
+
+# Creates or migrates the schema when it is behind; when it is current this is
+# one SELECT. Under gunicorn with preload_app this runs once in the master,
+# before any fork; the connection it opens is closed again so no worker inherits it.
+with startup.phase('db init'):
+    init_database()
+
+startup.report()
 
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
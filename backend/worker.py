@@ -0,0 +1,278 @@
+"""
+Runs the background jobs queued in the jobs table (POST /refresh_fighters).
+
+    python worker.py            # poll for jobs until stopped
+    python worker.py --once     # run whatever is queued, then exit
+
+Any number of workers may run; each job is claimed by exactly one. A running
+job heartbeats its progress into its row every JOB_HEARTBEAT seconds and picks
+up cancel requests there. Refresh jobs checkpoint after every letter, so a
+cancelled or failed job resumes (POST /jobs/<id>/resume) at the first letter
+it hadn't finished, and a job whose worker died is reclaimed from the same
+checkpoint once its heartbeat is JOB_STALE_AFTER seconds old. Every write to
+the row checks that this worker still holds the job, so a worker that stalled
+past that point stops instead of racing the one that took over. SIGTERM / ^C
+stop the current job at the next page and hand it back to the queue.
+
+Between jobs, workers also run the predictions partition maintenance once
+every PREDICTION_MAINTAIN_INTERVAL seconds (one worker per interval; see
+database/prediction_partitions.py).
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import string
+import argparse
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from app.services import jobs
+from app.db import connection
+from database.init_db import init_database
+from database.prediction_partitions import maintain_if_due
+from app.services.scrape_engine import CONCURRENCY
+from app.services.fighter_scraper import run_fighter_scraper, scrape_fighter_page
+
+# Seconds between polls while the queue is empty
+POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 5))
+# Seconds between a running job's heartbeats (progress writes and cancel checks)
+HEARTBEAT = float(os.environ.get('JOB_HEARTBEAT', 5))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Summary counts added up across a refresh job's letters
+SUMMED = ('fighters_updated', 'listed', 'skipped', 'refreshed', 'new', 'seconds_saved')
+
+shutdown = threading.Event()
+_current = None
+
+
+class JobControl:
+    """
+    The job being run: its stop signal and progress counters. A heartbeat
+    thread writes the progress to the job's row and sets `stop` when the row
+    has a cancel request, or sets `lost` and `stop` when the row has passed to
+    another worker.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.stop = threading.Event()
+        self.cancelled = False
+        self.lost = False
+        self.progress = dict(job['progress'])
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._base = 0
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+
+    def begin(self, **progress):
+        """Set the starting progress; the rate counts only fighters done from here on."""
+        with self._lock:
+            self.progress.update(progress)
+            self._base = self.progress.get('fighters_done', 0)
+            self._started = time.monotonic()
+        self._thread.start()
+
+    def advance(self, n=1):
+        with self._lock:
+            self.progress['fighters_done'] = self.progress.get('fighters_done', 0) + n
+
+    def update(self, **progress):
+        with self._lock:
+            self.progress.update(progress)
+
+    def snapshot(self):
+        with self._lock:
+            progress = dict(self.progress)
+            elapsed = time.monotonic() - self._started
+        done, total = progress.get('fighters_done', 0), progress.get('fighters_total')
+        rate = (done - self._base) / elapsed if elapsed > 0 else 0.0
+        progress['rate'] = round(rate, 2)
+        progress['eta_seconds'] = round(max(total - done, 0) / rate) if rate > 0 and total is not None else None
+        return progress
+
+    def close(self):
+        self._finished.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _heartbeat(self):
+        while not self._finished.wait(HEARTBEAT):
+            try:
+                if jobs.heartbeat(self.job['id'], WORKER_ID, self.snapshot()) and not self.cancelled:
+                    print(f"[Worker] Job {self.job['id']}: cancel requested")
+                    self.cancelled = True
+                    self.stop.set()
+            except jobs.JobLost:
+                print(f"[Worker] Job {self.job['id']} was reclaimed by another worker: stopping")
+                self.lost = True
+                self.stop.set()
+                return
+            except Exception as e:
+                print(f"[Worker] Heartbeat for job {self.job['id']} failed: {e}")
+
+
+# ── job kinds ─────────────────────────────────────────────────────────────────
+
+def count_listings(letters):
+    """
+    {letter: fighters listed}. The page cache keeps these pages, so the scrape
+    reads them again for free. Raises if a listing can't be fetched, rather
+    than sizing the job as if that letter were empty.
+    """
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        return dict(zip(letters, pool.map(lambda letter: len(scrape_fighter_page(letter, raise_errors=True)),
+                                          letters)))
+
+
+def refresh_fighters_job(control):
+    """
+    run_fighter_scraper one letter at a time, checkpointing the letters done and
+    their summed summaries. Returns the totals, or None if stopped before the end.
+    """
+    job = control.job
+    params = job['params']
+    checkpoint = dict(job['checkpoint'])
+    letters = params.get('letters') or list(string.ascii_lowercase)
+
+    sizes = checkpoint.get('letter_sizes')
+    if sizes is None:
+        sizes = checkpoint['letter_sizes'] = count_listings(letters)
+    done = checkpoint.setdefault('letters_done', [])
+    totals = checkpoint.setdefault('totals', {})
+    control.begin(fighters_done=sum(sizes.get(letter, 0) for letter in done),
+                  fighters_total=sum(sizes.values()),
+                  letters_done=len(done), letters_total=len(letters))
+    jobs.save_checkpoint(job['id'], WORKER_ID, checkpoint, control.snapshot())
+    if done:
+        print(f"[Worker] Job {job['id']}: resuming after {len(done)}/{len(letters)} letters")
+
+    for letter in letters:
+        if letter in done:
+            continue
+        if control.stop.is_set():
+            return None
+        control.update(current_letter=letter)
+        summary = run_fighter_scraper([letter], detail=params.get('detail', True),
+                                      incremental=params.get('incremental', False),
+                                      cancel=control.stop, on_progress=control.advance)
+        if summary['cancelled']:
+            # Partly done: the letter runs again on resume (incremental skips what was written)
+            return None
+        if summary['listing_errors']:
+            # Not checkpointed: the job fails here and a resume starts again at this letter
+            raise RuntimeError(f"Listing for letter {letter.upper()} could not be fetched")
+        done.append(letter)
+        sizes[letter] = summary['listed']
+        for key in SUMMED:
+            totals[key] = round(totals.get(key, 0) + summary[key], 1)
+        control.update(fighters_done=sum(sizes.get(l, 0) for l in done), fighters_total=sum(sizes.values()),
+                       letters_done=len(done))
+        jobs.save_checkpoint(job['id'], WORKER_ID, checkpoint, control.snapshot())
+    return totals
+
+
+HANDLERS = {
+    'refresh_fighters': refresh_fighters_job,
+}
+
+
+# ── main loop ─────────────────────────────────────────────────────────────────
+
+def run_job(job):
+    global _current
+    if job['cancel_requested']:
+        # Cancelled while its previous worker was dying
+        jobs.finish(job['id'], WORKER_ID, 'cancelled')
+        return
+    handler = HANDLERS.get(job['kind'])
+    if handler is None:
+        jobs.finish(job['id'], WORKER_ID, 'failed', error=f"Unknown job kind {job['kind']!r}")
+        return
+
+    print(f"[Worker] Running job {job['id']} ({job['kind']}, attempt {job['attempts']})")
+    control = _current = JobControl(job)
+    if shutdown.is_set():
+        control.stop.set()
+    result, error = None, None
+    try:
+        result = handler(control)
+    except jobs.JobLost:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        error = str(e)
+    finally:
+        _current = None
+        control.close()
+
+    if control.lost:
+        raise jobs.JobLost(job['id'])
+    if error is not None:
+        status = 'failed'
+    elif result is not None:
+        status = 'done'
+    elif control.cancelled:
+        status = 'cancelled'
+    else:
+        status = 'queued'    # worker shutting down: the next worker resumes from the checkpoint
+    jobs.finish(job['id'], WORKER_ID, status, result=result, error=error, progress=control.snapshot())
+
+
+def run_maintenance():
+    """Periodic upkeep between jobs: the predictions partitions, when due."""
+    try:
+        with connection() as conn:
+            if maintain_if_due(conn):
+                print("[Worker] Ran predictions partition maintenance")
+    except Exception as e:
+        print(f"[Worker] Partition maintenance failed: {e}")
+
+
+def _stop(signum, frame):
+    print(f"[Worker] Signal {signum}: stopping after the current page")
+    shutdown.set()
+    if _current is not None:
+        _current.stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--once', action='store_true', help='exit when the queue is empty')
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    init_database()
+    print(f"[Worker] {WORKER_ID} polling for jobs")
+    while not shutdown.is_set():
+        run_maintenance()
+        try:
+            job = jobs.claim(WORKER_ID)
+        except Exception as e:
+            print(f"[Worker] Claim failed: {e}")
+            job = None
+        if job is not None:
+            try:
+                run_job(job)
+            except jobs.JobLost:
+                # Its new worker carries on from the last checkpoint this one saved
+                print(f"[Worker] Job {job['id']} was reclaimed by another worker: dropped it")
+            except Exception as e:
+                # Its row couldn't be updated (e.g. the database went away); it stays 'running'
+                # until its heartbeat goes stale, then a worker reclaims it from its checkpoint
+                print(f"[Worker] Job {job['id']} failed to record its outcome: {e}")
+        elif args.once:
+            break
+        else:
+            shutdown.wait(POLL_INTERVAL)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()